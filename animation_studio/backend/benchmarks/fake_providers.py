@@ -0,0 +1,297 @@
+"""
+Faux fournisseurs locaux (Wavespeed, FAL AI, OpenAI) pour les benchmarks
+
+Reproduisent les endpoints utilisés par les services avec des latences tirées d'une loi
+log-normale, des taux d'échec et des réponses 429 configurables. Aucun crédit fournisseur
+n'est consommé.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from aiohttp import web
+
+@dataclass
+class LatencyProfile:
+    """Comportement simulé d'un endpoint fournisseur"""
+    median: float  # durée médiane du job (secondes)
+    sigma: float = 0.35  # dispersion log-normale (0 = durée fixe)
+    failure_rate: float = 0.0  # proportion de jobs terminés en échec
+    rate_limit_rate: float = 0.0  # proportion de soumissions refusées en 429
+    retry_after: float = 1.0  # en-tête Retry-After des réponses 429
+
+    def sample(self, rng: random.Random) -> float:
+        if self.sigma <= 0:
+            return self.median
+        return rng.lognormvariate(0, self.sigma) * self.median
+
+@dataclass
+class FakeJob:
+    provider: str
+    ready_at: float
+    failed: bool
+    output: Dict[str, Any] = field(default_factory=dict)
+    settled: bool = False
+
+@dataclass
+class ProviderCounters:
+    submissions: int = 0
+    polls: int = 0
+    rate_limited: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+class FakeProviders:
+    """Serveur aiohttp local servant les trois fournisseurs sous des préfixes distincts
+
+    - Wavespeed: POST /wavespeed/{model}, GET /wavespeed/predictions/{id}/result
+    - FAL AI: POST /fal/{model}, GET /fal/{model}/requests/{id}, PUT /fal/{model}/requests/{id}/cancel
+    - OpenAI: POST /openai/v1/chat/completions (réponse complète ou en streaming SSE)
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, LatencyProfile]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None
+    ):
+        self.profiles = {
+            "wavespeed": LatencyProfile(median=8.0),
+            "fal_audio": LatencyProfile(median=4.0),
+            "fal_ffmpeg": LatencyProfile(median=4.0),
+            "openai": LatencyProfile(median=1.5, sigma=0.25),
+            **(profiles or {})
+        }
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+
+        self.jobs: Dict[str, FakeJob] = {}
+        self.counters: Dict[str, ProviderCounters] = {name: ProviderCounters() for name in self.profiles}
+        self._runner: Optional[web.AppRunner] = None
+
+    # Cycle de vie
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/wavespeed/predictions/{job_id}/result", self.wavespeed_result)
+        app.router.add_post("/wavespeed/{model:.+}", self.wavespeed_submit)
+        app.router.add_put("/fal/{model:.+}/requests/{job_id}/cancel", self.fal_cancel)
+        app.router.add_get("/fal/{model:.+}/requests/{job_id}", self.fal_result)
+        app.router.add_post("/fal/{model:.+}", self.fal_submit)
+        app.router.add_post("/openai/v1/chat/completions", self.openai_chat)
+        return app
+
+    async def start(self) -> "FakeProviders":
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def environment(self) -> Dict[str, str]:
+        """Variables d'environnement pointant les services vers les faux fournisseurs"""
+        return {
+            "WAVESPEED_BASE_URL": f"{self.base_url}/wavespeed",
+            "FAL_QUEUE_BASE_URL": f"{self.base_url}/fal",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "OPENAI_API_KEY": "sk-benchmark",
+            "WAVESPEED_API_KEY": "benchmark",
+            "FAL_API_KEY": "benchmark"
+        }
+
+    # Jobs asynchrones (Wavespeed, FAL AI)
+
+    def _rate_limited(self, provider: str) -> Optional[web.Response]:
+        profile = self.profiles[provider]
+        if profile.rate_limit_rate and self.rng.random() < profile.rate_limit_rate:
+            self.counters[provider].rate_limited += 1
+            return web.json_response(
+                {"error": "rate limited"}, status=429, headers={"Retry-After": str(profile.retry_after)}
+            )
+        return None
+
+    def _create_job(self, provider: str) -> str:
+        profile = self.profiles[provider]
+        counters = self.counters[provider]
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = FakeJob(
+            provider=provider,
+            ready_at=time.monotonic() + profile.sample(self.rng),
+            failed=self.rng.random() < profile.failure_rate
+        )
+        counters.submissions += 1
+        counters.in_flight += 1
+        counters.max_in_flight = max(counters.max_in_flight, counters.in_flight)
+        return job_id
+
+    def _job_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Réponse de résultat d'un job (None si inconnu)"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        counters = self.counters[job.provider]
+        counters.polls += 1
+        if time.monotonic() < job.ready_at:
+            return {"status": "processing"}
+
+        # Premier constat de fin: le job quitte les jobs en cours
+        if not job.settled:
+            job.settled = True
+            counters.in_flight -= 1
+            if job.failed:
+                counters.failed += 1
+        if job.failed:
+            return {"status": "failed", "error": "échec simulé"}
+        return {"status": "completed", **job.output}
+
+    async def wavespeed_submit(self, request: web.Request) -> web.Response:
+        limited = self._rate_limited("wavespeed")
+        if limited:
+            return limited
+        await request.json()
+        job_id = self._create_job("wavespeed")
+        self.jobs[job_id].output["video"] = {"url": f"{self.base_url}/media/{job_id}.mp4"}
+        return web.json_response({"data": {"id": job_id, "status": "created"}})
+
+    async def wavespeed_result(self, request: web.Request) -> web.Response:
+        state = self._job_state(request.match_info["job_id"])
+        if state is None:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response(state)
+
+    def _fal_provider(self, model: str) -> str:
+        return "fal_ffmpeg" if "ffmpeg" in model else "fal_audio"
+
+    async def fal_submit(self, request: web.Request) -> web.Response:
+        provider = self._fal_provider(request.match_info["model"])
+        limited = self._rate_limited(provider)
+        if limited:
+            return limited
+        await request.json()
+        job_id = self._create_job(provider)
+        extension = "mp4" if provider == "fal_ffmpeg" else "wav"
+        media_url = f"{self.base_url}/media/{job_id}.{extension}"
+        if provider == "fal_ffmpeg":
+            self.jobs[job_id].output["video"] = {"url": media_url}
+        else:
+            self.jobs[job_id].output["outputs"] = [media_url]
+        return web.json_response({"request_id": job_id, "status": "IN_QUEUE"})
+
+    async def fal_result(self, request: web.Request) -> web.Response:
+        state = self._job_state(request.match_info["job_id"])
+        if state is None:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response(state)
+
+    async def fal_cancel(self, request: web.Request) -> web.Response:
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"error": "not found"}, status=404)
+        if job.settled:
+            return web.json_response({"status": "ALREADY_COMPLETED"}, status=400)
+        counters = self.counters[job.provider]
+        job.settled = True
+        job.failed = True
+        counters.in_flight -= 1
+        counters.cancelled += 1
+        return web.json_response({"status": "CANCELLATION_REQUESTED"})
+
+    # OpenAI (chat completions)
+
+    def _completion_content(self, body: Dict[str, Any]) -> str:
+        """Contenu JSON plausible selon le type d'appel (plan, idée ou scènes)"""
+        idea = {
+            "caption": "🌟 Une aventure de benchmark! #enfants #animation",
+            "idea": "Un petit robot explore une forêt lumineuse et se fait des amis",
+            "environment": "Forêt lumineuse aux couleurs pastel, style cartoon",
+            "sound": "Musique douce et carillons joyeux"
+        }
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            num_scenes = schema["properties"]["scenes"]["minItems"]
+            scenes = [
+                {"description": f"Scène {i + 1}: le robot avance, la caméra le suit en travelling doux"}
+                for i in range(num_scenes)
+            ]
+            return json.dumps({**idea, "scenes": scenes}, ensure_ascii=False)
+
+        user_prompt = body["messages"][-1]["content"]
+        match = re.search(r"Crée (\d+) scènes", user_prompt)
+        if match:
+            scenes = {
+                f"Scene {i + 1}": f"Scène {i + 1}: le robot avance, la caméra le suit en travelling doux"
+                for i in range(int(match.group(1)))
+            }
+            return json.dumps({"Idea": idea["idea"], "Environment": idea["environment"],
+                               "Sound": idea["sound"], **scenes}, ensure_ascii=False)
+
+        return json.dumps([{key.capitalize(): value for key, value in idea.items()}], ensure_ascii=False)
+
+    async def openai_chat(self, request: web.Request) -> web.Response:
+        limited = self._rate_limited("openai")
+        if limited:
+            return limited
+
+        body = await request.json()
+        counters = self.counters["openai"]
+        counters.submissions += 1
+        counters.in_flight += 1
+        counters.max_in_flight = max(counters.max_in_flight, counters.in_flight)
+        try:
+            content = self._completion_content(body)
+            duration = self.profiles["openai"].sample(self.rng)
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            base = {"id": completion_id, "created": int(time.time()), "model": body.get("model", "fake")}
+
+            if not body.get("stream"):
+                await asyncio.sleep(duration)
+                return web.json_response({
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }]
+                })
+
+            # Streaming: le contenu est réparti uniformément sur la durée tirée
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            pieces = [content[i:i + 24] for i in range(0, len(content), 24)]
+            for piece in pieces:
+                await asyncio.sleep(duration / len(pieces))
+                chunk = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+        finally:
+            counters.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: vars(counters).copy() for name, counters in self.counters.items()}
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark du pipeline d'animation contre des fournisseurs simulés
+
+Lance les faux serveurs Wavespeed / FAL AI / OpenAI, puis N animations simultanées,
+soit directement via AnimationPipeline (--mode pipeline), soit via l'API de main.py
+servie par uvicorn (--mode api). Affiche p50/p95/p99 par étape, le débit et la mémoire.
+
+Exemples:
+    python benchmarks/run_benchmark.py --animations 10
+    python benchmarks/run_benchmark.py --mode api --animations 20 --clip-latency 4 --rate-limit-rate 0.1
+    JOB_POLL_MIN_INTERVAL=0.5 python benchmarks/run_benchmark.py --json resultats.json
+
+Les réglages du serveur (polling, limites fournisseurs, STORY_PLAN_MODE...) se passent
+par les variables d'environnement habituelles.
+"""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import math
+import os
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Ajouter le répertoire backend au PYTHONPATH
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.fake_providers import FakeProviders, LatencyProfile
+
+class StageTimer:
+    """Durées observées par étape du pipeline"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, duration: float):
+        self.samples.setdefault(stage, []).append(duration)
+
+    def instrument(self, target: Any, method: str, stage: str):
+        """Chronomètre une méthode async (ou un générateur async, jusqu'à épuisement)"""
+        original = getattr(target, method)
+
+        if inspect.isasyncgenfunction(original):
+            @functools.wraps(original)
+            async def timed_stream(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    async for item in original(*args, **kwargs):
+                        yield item
+                finally:
+                    self.record(stage, time.perf_counter() - start)
+            setattr(target, method, timed_stream)
+            return
+
+        @functools.wraps(original)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        setattr(target, method, timed)
+
+    def instrument_pipeline(self, pipeline):
+        """Chronomètre les étapes d'un AnimationPipeline"""
+        self.instrument(pipeline.story_planner, "generate_story_plan", "story_plan")
+        self.instrument(pipeline.story_planner, "stream_story_plan", "story_plan")
+        self.instrument(pipeline.idea_generator, "generate_story_idea", "idea")
+        self.instrument(pipeline.scene_creator, "create_scenes_from_idea", "scenes")
+        self.instrument(pipeline.scene_creator, "stream_scenes_from_idea", "scenes")
+        self.instrument(pipeline.video_generator, "generate_video_clip", "clip")
+        self.instrument(pipeline.audio_generator, "generate_audio_for_video", "audio")
+        self.instrument(pipeline.video_assembler, "assemble_final_video", "assembly")
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile par rang le plus proche"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        stage: {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(max(values), 3)
+        }
+        for stage, values in samples.items() if values
+    }
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def configure_environment(providers: FakeProviders, cache_dir: str):
+    """Pointe la configuration vers les faux fournisseurs (avant l'import de config)"""
+    os.environ.update(providers.environment())
+    os.environ["WEBHOOK_BASE_URL"] = ""
+    os.environ["CACHE_DIR"] = cache_dir
+    os.environ["CLIP_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("JOB_STORE_BACKEND", "memory")
+
+async def run_pipeline_mode(args, timer: StageTimer) -> List[Dict[str, Any]]:
+    """N animations simultanées directement via AnimationPipeline"""
+    from models.schemas import AnimationRequest
+    from services.animation_pipeline import AnimationPipeline
+    from services.http_client import http_client
+    from services.job_store import job_store
+
+    pipeline = AnimationPipeline()
+    timer.instrument_pipeline(pipeline)
+    await http_client.start()
+    await job_store.start()
+
+    async def one_animation() -> Dict[str, Any]:
+        request = AnimationRequest(theme=args.theme, duration=args.duration, coalesce=False)
+        start = time.perf_counter()
+        result = await pipeline.generate_animation(request)
+        end = time.perf_counter()
+        timer.record("animation", end - start)
+        return {"status": result.status.value, "started": start, "finished": end}
+
+    try:
+        return await asyncio.gather(*(one_animation() for _ in range(args.animations)))
+    finally:
+        await job_store.close()
+        await http_client.close()
+
+async def run_api_mode(args, timer: StageTimer) -> List[Dict[str, Any]]:
+    """N animations simultanées via POST /generate sur main.py (file + workers compris)"""
+    import aiohttp
+    import uvicorn
+    import main
+
+    timer.instrument_pipeline(main.pipeline)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            await server_task
+        await asyncio.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+
+    async def one_animation(session: aiohttp.ClientSession) -> Dict[str, Any]:
+        start = time.perf_counter()
+        payload = {"theme": args.theme, "duration": args.duration, "coalesce": False}
+        async with session.post(f"{base_url}/generate", json=payload) as response:
+            if response.status != 200:
+                return {"status": f"rejected ({response.status})", "started": start, "finished": time.perf_counter()}
+            animation_id = (await response.json())["animation_id"]
+
+        while True:
+            await asyncio.sleep(args.status_interval)
+            async with session.get(f"{base_url}/status/{animation_id}") as response:
+                status = (await response.json()).get("data", {}).get("status")
+            if status in ("completed", "failed", "cancelled"):
+                end = time.perf_counter()
+                timer.record("animation", end - start)
+                return {"status": status, "started": start, "finished": end}
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(*(one_animation(session) for _ in range(args.animations)))
+    finally:
+        server.should_exit = True
+        await server_task
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    profiles = {
+        "wavespeed": LatencyProfile(args.clip_latency, args.sigma, args.failure_rate, args.rate_limit_rate),
+        "fal_audio": LatencyProfile(args.audio_latency, args.sigma, args.failure_rate, args.rate_limit_rate),
+        "fal_ffmpeg": LatencyProfile(args.assembly_latency, args.sigma, args.failure_rate, args.rate_limit_rate),
+        "openai": LatencyProfile(args.openai_latency, args.sigma, 0.0, args.rate_limit_rate)
+    }
+    providers = await FakeProviders(profiles, seed=args.seed).start()
+    cache_dir = tempfile.mkdtemp(prefix="benchmark_cache_")
+    configure_environment(providers, cache_dir)
+
+    timer = StageTimer()
+    tracemalloc.start()
+    try:
+        runner = run_api_mode if args.mode == "api" else run_pipeline_mode
+        animations = await runner(args, timer)
+    finally:
+        await providers.close()
+    # Première soumission -> dernière fin (hors démarrage et arrêt du serveur)
+    wall_time = max(a["finished"] for a in animations) - min(a["started"] for a in animations)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    completed = sum(1 for animation in animations if animation["status"] == "completed")
+    report = {
+        "mode": args.mode,
+        "animations": args.animations,
+        "completed": completed,
+        "failed": len(animations) - completed,
+        "wall_time": round(wall_time, 2),
+        "throughput_per_minute": round(completed / wall_time * 60, 2) if wall_time else 0.0,
+        "stages": summarize(timer.samples),
+        "memory": {
+            "python_peak_mb": round(peak_bytes / 1024 ** 2, 1),
+            # ru_maxrss: kilo-octets sous Linux
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None
+        },
+        "providers": providers.get_stats()
+    }
+    return report
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 Benchmark ({report['mode']}): {report['completed']}/{report['animations']} animations "
+          f"en {report['wall_time']}s - {report['throughput_per_minute']} animations/min")
+    print(f"\n{'Étape':<12}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<12}{stats['count']:>6}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}{stats['max']:>10}")
+    print(f"\n{'Fournisseur':<12}{'jobs':>8}{'polls':>8}{'429':>6}{'échecs':>8}{'max simult.':>13}")
+    for name, counters in report["providers"].items():
+        print(f"{name:<12}{counters['submissions']:>8}{counters['polls']:>8}{counters['rate_limited']:>6}"
+              f"{counters['failed']:>8}{counters['max_in_flight']:>13}")
+    memory = report["memory"]
+    print(f"\n💾 Mémoire: pic Python {memory['python_peak_mb']} Mo, RSS max {memory['max_rss_mb']} Mo")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline contre des fournisseurs simulés")
+    parser.add_argument("--mode", choices=["pipeline", "api"], default="pipeline")
+    parser.add_argument("--animations", type=int, default=5, help="animations simultanées")
+    parser.add_argument("--theme", default="space")
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--clip-latency", type=float, default=8.0, help="durée médiane d'un clip Wavespeed (s)")
+    parser.add_argument("--audio-latency", type=float, default=4.0, help="durée médiane de l'audio FAL (s)")
+    parser.add_argument("--assembly-latency", type=float, default=4.0, help="durée médiane de l'assemblage FAL (s)")
+    parser.add_argument("--openai-latency", type=float, default=1.5, help="durée médiane d'un appel OpenAI (s)")
+    parser.add_argument("--sigma", type=float, default=0.35, help="dispersion log-normale des durées")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="proportion de jobs en échec")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="proportion de soumissions en 429")
+    parser.add_argument("--status-interval", type=float, default=0.25, help="polling client de /status (mode api)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", help="écrit aussi le rapport en JSON")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    benchmark_report = asyncio.run(run_benchmark(arguments))
+    print_report(benchmark_report)
+    if arguments.json_path:
+        Path(arguments.json_path).write_text(json.dumps(benchmark_report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"📝 Rapport écrit dans {arguments.json_path}")
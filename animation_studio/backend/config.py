@@ -14,13 +14,41 @@ class Config:
     # API Endpoints
     WAVESPEED_BASE_URL = os.getenv("WAVESPEED_BASE_URL", "https://api.wavespeed.ai/api/v3")
     WAVESPEED_MODEL = os.getenv("WAVESPEED_MODEL", "bytedance/seedance-v1-pro-t2v-480p")
+    # Coût indicatif d'un clip Wavespeed (estimations de /costs)
+    WAVESPEED_COST_PER_CLIP = float(os.getenv("WAVESPEED_COST_PER_CLIP", "0.30"))
+    COST_CURRENCY = os.getenv("COST_CURRENCY", "EUR")
     
     # FAL AI Models
     FAL_AUDIO_MODEL = os.getenv("FAL_AUDIO_MODEL", "fal-ai/mmaudio-v2")
     FAL_FFMPEG_MODEL = os.getenv("FAL_FFMPEG_MODEL", "fal-ai/ffmpeg-api/compose")
     
+    # Assemblage final: "fal" (FFmpeg distant) ou "local" (FFmpeg sur le serveur)
+    ASSEMBLY_BACKEND = os.getenv("ASSEMBLY_BACKEND", "fal")
+    FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+    FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+    FFMPEG_MAX_PROCESSES = int(os.getenv("FFMPEG_MAX_PROCESSES", "0"))  # 0 = nombre de cœurs
+    
+    # Pipeline Engine: "real" (fournisseurs), "demo" ou "debug" (fournisseurs simulés)
+    PIPELINE_ENGINE = os.getenv("PIPELINE_ENGINE", "real")
+    SIMULATED_DELAY_SCALE = float(os.getenv("SIMULATED_DELAY_SCALE", "1"))
+    SIMULATED_VIDEO_URL = os.getenv(
+        "SIMULATED_VIDEO_URL",
+        "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4"
+    )
+    
     # Generation Settings
     TEXT_MODEL = os.getenv("TEXT_MODEL", "gpt-4o-mini")
+    # Génération de l'histoire: "single" (idée + scènes en un appel) ou "two_step" (deux appels)
+    STORY_PLAN_MODE = os.getenv("STORY_PLAN_MODE", "single")
+    SCENE_STREAMING = os.getenv("SCENE_STREAMING", "true").lower() == "true"
+    # Réserve de plans d'histoire générés à l'avance par thème × durée (taille 0 = désactivée)
+    STORY_POOL_SIZE = int(os.getenv("STORY_POOL_SIZE", "0"))
+    STORY_POOL_LOW_WATER = int(os.getenv("STORY_POOL_LOW_WATER", "1"))
+    STORY_POOL_THEMES = os.getenv("STORY_POOL_THEMES", "")  # vide = tous les thèmes
+    STORY_POOL_DURATIONS = os.getenv("STORY_POOL_DURATIONS", "")  # vide = toutes les durées
+    STORY_POOL_WARM_CONCURRENCY = int(os.getenv("STORY_POOL_WARM_CONCURRENCY", "2"))
+    STORY_POOL_RETRY_DELAY = float(os.getenv("STORY_POOL_RETRY_DELAY", "60"))
+    STORY_POOL_HISTORY = int(os.getenv("STORY_POOL_HISTORY", "5000"))
     CARTOON_STYLE = os.getenv("CARTOON_STYLE", "2D cartoon animation, Disney style, vibrant colors, smooth animation")
     DEFAULT_DURATION = int(os.getenv("DEFAULT_DURATION", "30"))
     VIDEO_ASPECT_RATIO = os.getenv("VIDEO_ASPECT_RATIO", "9:16")
@@ -38,7 +66,95 @@ class Config:
     CACHE_DIR = Path(os.getenv("CACHE_DIR", "../cache"))
     MAX_CACHE_SIZE_GB = int(os.getenv("MAX_CACHE_SIZE_GB", "10"))
     CACHE_CLEANUP_HOURS = int(os.getenv("CACHE_CLEANUP_HOURS", "24"))
+    CLIP_CACHE_ENABLED = os.getenv("CLIP_CACHE_ENABLED", "true").lower() == "true"
+    # URL publique du serveur (clips en cache servis sous /cache), vide = chemins relatifs /cache/...
+    # (l'assemblage FAL AI des clips en cache a besoin de cette URL pour les télécharger)
+    PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")
+
+    # HTTP Client Settings (sessions partagées vers les fournisseurs)
+    FAL_QUEUE_BASE_URL = os.getenv("FAL_QUEUE_BASE_URL", "https://queue.fal.run")
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "30"))
+    HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+    HTTP_DNS_CACHE_SECONDS = int(os.getenv("HTTP_DNS_CACHE_SECONDS", "300"))
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "120"))
+    HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "15"))
+    
+    # Job Completion Settings (webhooks + polling adaptatif)
+    WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+    JOB_POLL_MIN_INTERVAL = float(os.getenv("JOB_POLL_MIN_INTERVAL", "2"))
+    JOB_POLL_MAX_INTERVAL = float(os.getenv("JOB_POLL_MAX_INTERVAL", "15"))
+    JOB_POLL_BACKOFF_FACTOR = float(os.getenv("JOB_POLL_BACKOFF_FACTOR", "1.5"))
+    JOB_DURATION_HISTORY = int(os.getenv("JOB_DURATION_HISTORY", "50"))
+    JOB_POLL_TICK = float(os.getenv("JOB_POLL_TICK", "0.25"))
+    JOB_POLL_WHEEL_SLOTS = int(os.getenv("JOB_POLL_WHEEL_SLOTS", "512"))
+    JOB_POLL_JITTER = float(os.getenv("JOB_POLL_JITTER", "0.1"))
+    JOB_POLL_MAX_RATE = float(os.getenv("JOB_POLL_MAX_RATE", "20"))  # polls/s, 0 = illimité
+    VIDEO_JOB_TIMEOUT = float(os.getenv("VIDEO_JOB_TIMEOUT", "600"))
+    AUDIO_JOB_TIMEOUT = float(os.getenv("AUDIO_JOB_TIMEOUT", "300"))
+    ASSEMBLY_JOB_TIMEOUT = float(os.getenv("ASSEMBLY_JOB_TIMEOUT", "600"))
+    
+    # Job Store Settings (sqlite: partagé entre workers, memory: processus unique)
+    JOB_STORE_BACKEND = os.getenv("JOB_STORE_BACKEND", "sqlite")
+    JOB_STORE_PATH = Path(os.getenv("JOB_STORE_PATH", "../data/jobs.db"))
+    JOB_STORE_FLUSH_INTERVAL = float(os.getenv("JOB_STORE_FLUSH_INTERVAL", "0.5"))
+    # Reprise des animations interrompues (arrêt, ou plantage: bail non renouvelé depuis LEASE_TTL)
+    JOB_RESUME_ENABLED = os.getenv("JOB_RESUME_ENABLED", "true").lower() == "true"
+    # Jobs sans bail (créés avant les baux): repris sans nouvelles depuis STALE_AFTER
+    JOB_RESUME_STALE_AFTER = float(os.getenv("JOB_RESUME_STALE_AFTER", "900"))
+    # Bail d'un job sur son worker, renouvelé toutes les LEASE_TTL / 3 secondes
+    JOB_LEASE_TTL = float(os.getenv("JOB_LEASE_TTL", "60"))
+    # Clés d'idempotence de /generate et /generate-quick (en-tête Idempotency-Key)
+    IDEMPOTENCY_KEY_TTL = float(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+    # Réservation sans job créé (requête d'origine interrompue) libérée après ce délai
+    IDEMPOTENCY_PENDING_TIMEOUT = float(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", "30"))
+    IDEMPOTENCY_KEY_MAX_LENGTH = int(os.getenv("IDEMPOTENCY_KEY_MAX_LENGTH", "255"))
+    
+    # Progress Streaming Settings (SSE / WebSocket)
+    PROGRESS_STREAM_HISTORY = int(os.getenv("PROGRESS_STREAM_HISTORY", "200"))
+    PROGRESS_STREAM_RETENTION = float(os.getenv("PROGRESS_STREAM_RETENTION", "300"))
+    PROGRESS_STREAM_HEARTBEAT = float(os.getenv("PROGRESS_STREAM_HEARTBEAT", "15"))
+    PROGRESS_STREAM_POLL_INTERVAL = float(os.getenv("PROGRESS_STREAM_POLL_INTERVAL", "1"))
     
+    # Generation Queue Settings (pool de workers asynchrones)
+    GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "4"))
+    GENERATION_QUEUE_MAX_SIZE = int(os.getenv("GENERATION_QUEUE_MAX_SIZE", "100"))
+    GENERATION_DRAIN_TIMEOUT = float(os.getenv("GENERATION_DRAIN_TIMEOUT", "60"))
+    
+    # Provider Rate Limits (partagées par toutes les animations du processus)
+    WAVESPEED_MAX_CONCURRENT_JOBS = int(os.getenv("WAVESPEED_MAX_CONCURRENT_JOBS", "6"))
+    WAVESPEED_REQUESTS_PER_SECOND = float(os.getenv("WAVESPEED_REQUESTS_PER_SECOND", "1"))
+    WAVESPEED_BURST = int(os.getenv("WAVESPEED_BURST", "3"))
+    FAL_AUDIO_MAX_CONCURRENT_JOBS = int(os.getenv("FAL_AUDIO_MAX_CONCURRENT_JOBS", "4"))
+    FAL_FFMPEG_MAX_CONCURRENT_JOBS = int(os.getenv("FAL_FFMPEG_MAX_CONCURRENT_JOBS", "4"))
+    FAL_REQUESTS_PER_SECOND = float(os.getenv("FAL_REQUESTS_PER_SECOND", "2"))
+    FAL_BURST = int(os.getenv("FAL_BURST", "4"))
+    OPENAI_MAX_CONCURRENT_REQUESTS = int(os.getenv("OPENAI_MAX_CONCURRENT_REQUESTS", "8"))
+    OPENAI_REQUESTS_PER_SECOND = float(os.getenv("OPENAI_REQUESTS_PER_SECOND", "3"))
+    OPENAI_BURST = int(os.getenv("OPENAI_BURST", "6"))
+    RATE_LIMIT_THROTTLE_SECONDS = float(os.getenv("RATE_LIMIT_THROTTLE_SECONDS", "10"))
+    
+    # Endpoint Circuit Breaker Settings (variantes d'URL de secours, disjoncteur par variante)
+    WAVESPEED_BASE_URL_FALLBACKS = os.getenv("WAVESPEED_BASE_URL_FALLBACKS", "")  # séparées par des virgules
+    FAL_QUEUE_BASE_URL_FALLBACKS = os.getenv("FAL_QUEUE_BASE_URL_FALLBACKS", "")
+    CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))
+    CIRCUIT_MIN_FAILURES = int(os.getenv("CIRCUIT_MIN_FAILURES", "3"))
+    CIRCUIT_FAILURE_RATIO = float(os.getenv("CIRCUIT_FAILURE_RATIO", "0.5"))
+    CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "30"))
+    
+    # Clip Retry Settings (relances Wavespeed, doublon au-delà du quantile de latence, budget par animation)
+    CLIP_MAX_ATTEMPTS = int(os.getenv("CLIP_MAX_ATTEMPTS", "3"))
+    CLIP_RETRY_BASE_DELAY = float(os.getenv("CLIP_RETRY_BASE_DELAY", "2"))
+    CLIP_RETRY_MAX_DELAY = float(os.getenv("CLIP_RETRY_MAX_DELAY", "30"))
+    CLIP_HEDGE_ENABLED = os.getenv("CLIP_HEDGE_ENABLED", "false").lower() == "true"
+    CLIP_HEDGE_QUANTILE = float(os.getenv("CLIP_HEDGE_QUANTILE", "0.95"))
+    CLIP_HEDGE_MIN_DELAY = float(os.getenv("CLIP_HEDGE_MIN_DELAY", "20"))
+    CLIP_RETRY_BUDGET = int(os.getenv("CLIP_RETRY_BUDGET", "4"))  # soumissions supplémentaires par animation
+    
+    # ETA Settings (durées apprises par étape, sauvegardées dans CACHE_DIR/eta_model.json)
+    ETA_MIN_SAMPLES = int(os.getenv("ETA_MIN_SAMPLES", "5"))
+    ETA_QUANTILE = float(os.getenv("ETA_QUANTILE", "0.5"))  # 0.5 ou 0.9
+
     @classmethod
     def validate_api_keys(cls):
         """Valide que les clés API essentielles sont configurées"""
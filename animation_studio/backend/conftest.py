@@ -0,0 +1,4 @@
+# Configuration pytest du backend (lancer depuis ce dossier: python -m pytest)
+
+# Script de test manuel contre un serveur lancé (python test_jwt_auth.py), pas un test unitaire
+collect_ignore = ["test_jwt_auth.py"]
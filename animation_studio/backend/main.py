@@ -1,19 +1,34 @@
 import asyncio
 import os
+import time
+import uuid
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
-from typing import Dict, Any
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager, aclosing
+from typing import Dict, Any, Optional
 
 from config import config
 from models.schemas import (
-    AnimationRequest, AnimationResult, AnimationProgress, 
+    AnimationRequest, AnimationResult, 
     DiagnosticResponse, AnimationTheme, AnimationDuration
 )
 from services.animation_pipeline import AnimationPipeline
 from services.real_animation_generator import RealAnimationGenerator
+from services.http_client import http_client
+from services.job_waiter import completion_waiter
+from services.job_store import job_store, TERMINAL_STATUSES
+from services.progress_stream import progress_broadcaster
+from services.job_queue import generation_queue, QueueFullError, QueueClosedError
+from services.rate_limiter import rate_limiter
+from services.clip_cache import clip_cache
+from services.endpoint_registry import endpoint_registry
+from services.request_coalescer import request_coalescer
+from services.idempotency import idempotency_keys, IdempotencyKeyMismatchError, IdempotencyKeyInProgressError
+from services.metrics import metrics
+from services.eta_estimator import eta_estimator
 
 # Import des modules d'authentification JWT
 try:
@@ -56,7 +71,30 @@ except ImportError:
         return {"sub": "dummy", "email": "dummy@example.com"}
 
 # Pipeline global
-pipeline = AnimationPipeline()
+pipeline = AnimationPipeline(
+    http_client=http_client,
+    completion_waiter=completion_waiter,
+    job_store=job_store,
+    progress_broadcaster=progress_broadcaster,
+    rate_limiter=rate_limiter
+)
+
+# Jauges lues au scrape de /metrics
+metrics.gauge_callback("generation_queue_depth", "Jobs en attente dans la file de génération",
+                       lambda: generation_queue.depth)
+metrics.gauge_callback("generation_jobs_in_flight", "Jobs en cours dans le pool de workers",
+                       lambda: generation_queue.in_flight)
+metrics.gauge_callback("active_animations", "Animations non terminées dans le stockage des jobs",
+                       lambda: job_store.count_jobs(exclude_statuses=TERMINAL_STATUSES))
+metrics.gauge_callback("clip_cache_hits_total", "Clips servis depuis le cache", lambda: clip_cache.hits, "counter")
+metrics.gauge_callback("clip_cache_misses_total", "Clips absents du cache", lambda: clip_cache.misses, "counter")
+metrics.gauge_callback("clip_cache_size_bytes", "Taille du cache de clips", lambda: clip_cache.size_bytes)
+metrics.gauge_callback("story_pool_hits_total", "Animations démarrées sur un plan préchauffé",
+                       lambda: pipeline.story_pool.hits, "counter")
+metrics.gauge_callback("story_pool_misses_total", "Animations sans plan préchauffé disponible",
+                       lambda: pipeline.story_pool.misses, "counter")
+metrics.gauge_callback("coalesced_requests_total", "Requêtes rattachées à une génération identique en cours",
+                       lambda: request_coalescer.coalesced, "counter")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -66,6 +104,7 @@ async def lifespan(app: FastAPI):
     
     # Mode rapide par défaut
     print("⚡ Mode démarrage rapide")
+    print(f"⚙️ Moteur de pipeline: {pipeline.engine}")
     # Validation ultra-rapide des clés
     if config.OPENAI_API_KEY:
         print("✅ Clé OpenAI détectée")
@@ -74,11 +113,48 @@ async def lifespan(app: FastAPI):
     if config.FAL_API_KEY:
         print("✅ Clé FAL AI détectée")
     
+    # Sessions HTTP partagées vers les fournisseurs (keep-alive, cache DNS)
+    await http_client.start([config.WAVESPEED_BASE_URL, config.FAL_QUEUE_BASE_URL])
+    
+    # Écriture groupée des progressions dans le stockage des jobs
+    await job_store.start()
+    
+    # Pool de workers consommant la file de génération
+    await generation_queue.start()
+    
+    # Cache disque des clips (index LRU + nettoyage périodique)
+    await clip_cache.start()
+    
+    # Réserve de plans d'histoire préchauffés (remplie en arrière-plan)
+    await pipeline.story_pool.start()
+    
+    # Durées apprises par étape (estimations du temps restant)
+    eta_estimator.load()
+    
+    # Animations interrompues: reprises là où elles en étaient (jobs fournisseurs non resoumis),
+    # puis surveillance des baux expirés (animations d'un worker planté)
+    resume_task = None
+    if config.JOB_RESUME_ENABLED:
+        resume_interrupted_animations()
+        resume_task = asyncio.create_task(resume_expired_leases_loop())
+    
     yield
     
     # Shutdown
     print("🛑 Arrêt du serveur...")
+    if resume_task is not None:
+        resume_task.cancel()
+    # Avec la reprise activée, les jobs fournisseurs en cours sont conservés (pas annulés)
+    before_cancel = completion_waiter.begin_shutdown if config.JOB_RESUME_ENABLED else None
+    for job_id in await generation_queue.drain(before_cancel):
+        if not (config.JOB_RESUME_ENABLED and pipeline.mark_interrupted(job_id)):
+            mark_job_failed(job_id, "Génération interrompue par l'arrêt du serveur")
     pipeline.cleanup_old_animations()
+    eta_estimator.save()
+    await pipeline.story_pool.close()
+    await job_store.close()
+    await clip_cache.close()
+    await http_client.close()
 
 # Création de l'app FastAPI
 app = FastAPI(
@@ -97,8 +173,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Cache pour stocker les callbacks de progression
-progress_callbacks: Dict[str, Any] = {}
+# Clips en cache servis par l'application (voir PUBLIC_BASE_URL)
+app.mount("/cache/clips", StaticFiles(directory=clip_cache.directory, check_dir=False), name="clip_cache")
+# Vidéos assemblées localement (ASSEMBLY_BACKEND=local)
+app.mount("/cache/renders", StaticFiles(directory=config.CACHE_DIR / "renders", check_dir=False), name="renders")
 
 @app.get("/")
 async def root():
@@ -111,7 +189,12 @@ async def root():
             "diagnostic": "/diagnostic",
             "generate": "/generate",
             "status": "/status/{animation_id}",
-            "themes": "/themes"
+            "status_stream": "/status/{animation_id}/stream",
+            "status_websocket": "/status/{animation_id}/ws",
+            "cancel": "DELETE /animations/{animation_id}",
+            "themes": "/themes",
+            "costs": "/costs",
+            "webhooks": "/webhooks/{provider}"
         }
     }
 
@@ -163,25 +246,142 @@ async def get_themes():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur récupération thèmes: {str(e)}")
 
+def mark_job_failed(job_id: str, error: str):
+    """Marque un job comme échoué dans le stockage (pipeline ou génération rapide)"""
+    job = job_store.get_job(job_id)
+    if not job:
+        return
+    if job["kind"] == "pipeline":
+        result = {**(job["result"] or {}), "status": "failed", "error_message": error}
+    else:
+        result = {"error": error}
+    job_store.record_progress(job_id, "failed", result=result)
+
+def cancel_generation(job_id: str) -> Optional[str]:
+    """Annule un job de ce worker ("running", "queued" ou None s'il n'y est pas)"""
+    state = generation_queue.cancel(job_id)
+    if state == "queued":
+        # Jamais démarré: personne d'autre ne mettra son statut à jour
+        job = job_store.get_job(job_id)
+        if job and job["kind"] == "pipeline":
+            result = {**(job["result"] or {}), "status": "cancelled", "error_message": "Animation annulée"}
+            progress_broadcaster.publish(job_id, "cancelled", result)
+        else:
+            result = {"error": "Animation annulée"}
+        job_store.record_progress(job_id, "cancelled", result=result)
+    return state
+
+def cancel_if_abandoned(animation_id: str):
+    """Annule l'animation si plus aucun client ne suit son flux (cancel_on_disconnect)"""
+    if progress_broadcaster.subscriber_count(animation_id) == 0:
+        job = job_store.get_job(animation_id)
+        if job and job["status"] not in TERMINAL_STATUSES and cancel_generation(animation_id):
+            print(f"🛑 Animation {animation_id} annulée: client déconnecté")
+
+def enqueue_generation(job_id: str, job, priority: int = 5):
+    """Met un job en file; 503 si la file est pleine ou fermée"""
+    try:
+        generation_queue.submit(job_id, job, priority=priority)
+    except (QueueFullError, QueueClosedError) as e:
+        mark_job_failed(job_id, str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+
+def resume_interrupted_animations():
+    """Remet en file les animations interrompues par un arrêt ou un plantage"""
+    resumed = 0
+    for animation_id, request in pipeline.claim_interrupted_animations():
+        job = lambda request=request, animation_id=animation_id: pipeline.generate_animation(
+            request, animation_id=animation_id
+        )
+        try:
+            enqueue_generation(animation_id, job, priority=request.priority)
+            resumed += 1
+        except HTTPException:
+            pass
+    if resumed:
+        print(f"♻️ {resumed} animation(s) interrompue(s) reprise(s)")
+
+async def resume_expired_leases_loop():
+    """Reprend périodiquement les animations dont le worker a cessé de renouveler le bail"""
+    while True:
+        await asyncio.sleep(config.JOB_LEASE_TTL)
+        try:
+            resume_interrupted_animations()
+        except Exception as e:
+            print(f"Avertissement: reprise des animations échouée: {e}")
+
+def enqueue_coalesced(fingerprint: Optional[str], job_id: str, job, priority: int = 5):
+    """Met en file un job regroupable; libère son empreinte s'il est refusé"""
+    try:
+        enqueue_generation(job_id, job, priority=priority)
+    except HTTPException:
+        if fingerprint:
+            request_coalescer.release(fingerprint, job_id)
+        raise
+
+def begin_idempotent_request(scope: str, idempotency_key: Optional[str], **params: Any) -> Optional[str]:
+    """Job déjà créé pour cette clé d'idempotence (nouvelle tentative du client), sinon None
+
+    Sans clé, rien n'est réservé. Une clé réutilisée avec d'autres paramètres est refusée (422);
+    une clé dont la requête d'origine n'a pas encore créé son job est signalée (409).
+    """
+    if not idempotency_key:
+        return None
+    try:
+        return idempotency_keys.begin(scope, idempotency_key, idempotency_keys.fingerprint(**params))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyKeyInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "1"})
+
+@app.get("/costs")
+async def get_cost_estimates():
+    """Coûts estimés d'une animation pour chaque durée (clips Wavespeed)"""
+    cost_estimates = {}
+    for duration in [d.value for d in AnimationDuration]:
+        scene_durations = pipeline.scene_creator.calculate_scene_distribution(duration)
+        cost_estimates[f"{duration}s"] = {
+            "scenes_count": len(scene_durations),
+            "cost_per_clip": config.WAVESPEED_COST_PER_CLIP,
+            "total_estimated_cost": round(len(scene_durations) * config.WAVESPEED_COST_PER_CLIP, 2),
+            "duration_per_scene": scene_durations[0]
+        }
+    
+    return {
+        "cost_estimates": cost_estimates,
+        "currency": config.COST_CURRENCY,
+        "notes": f"Estimations basées sur {config.WAVESPEED_COST_PER_CLIP:.2f} {config.COST_CURRENCY} par clip Wavespeed"
+    }
+
 @app.post("/generate", response_model=AnimationResult)
-async def generate_animation(request: AnimationRequest, background_tasks: BackgroundTasks):
-    """Génère un dessin animé basé sur la requête"""
+async def generate_animation(
+    request: AnimationRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Met en file la génération d'un dessin animé et rend la main immédiatement
+
+    Avec l'en-tête Idempotency-Key, une nouvelle tentative retrouve l'animation de la
+    première requête (même identifiant, statut courant) au lieu d'en lancer une autre.
+    """
     try:
         # Valider la requête
         if request.duration not in [30, 60, 120, 180, 240, 300]:
             raise HTTPException(status_code=400, detail="Durée non supportée")
         
-        # Démarrer la génération en arrière-plan
-        def progress_callback(progress: AnimationProgress):
-            progress_callbacks[progress.animation_id] = progress
-        
-        # Générer l'animation
-        result = await pipeline.generate_animation(request, progress_callback)
-        
-        # Nettoyer le cache de progression
-        if result.animation_id in progress_callbacks:
-            del progress_callbacks[result.animation_id]
+        existing_id = begin_idempotent_request("generate", idempotency_key, **request.model_dump(mode="json"))
+        if existing_id:
+            return pipeline.get_animation_status(existing_id)
         
+        try:
+            result = start_pipeline_generation(request)
+        except BaseException:
+            if idempotency_key:
+                idempotency_keys.abandon("generate", idempotency_key)
+            raise
+        if idempotency_key:
+            idempotency_keys.complete("generate", idempotency_key, result.animation_id)
         return result
         
     except HTTPException:
@@ -189,20 +389,56 @@ async def generate_animation(request: AnimationRequest, background_tasks: Backgr
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur génération: {str(e)}")
 
+def start_pipeline_generation(request: AnimationRequest) -> AnimationResult:
+    """Enregistre et met en file une animation du pipeline (ou rejoint une génération identique)"""
+    # Une génération identique est déjà en cours: partager son job
+    fingerprint = None
+    if request.coalesce:
+        fingerprint = request_coalescer.fingerprint(
+            "pipeline",
+            theme=request.theme.value,
+            duration=request.duration,
+            custom_prompt=request.custom_prompt or ""
+        )
+        leader_id = request_coalescer.get_leader(fingerprint)
+        existing = pipeline.get_animation_status(leader_id) if leader_id else None
+        if existing:
+            return existing
+    
+    # Enregistrer l'animation puis la confier au pool de workers
+    # (suivi via /status/{id} ou /status/{id}/stream)
+    result = pipeline.register_animation(request)
+    job = lambda: pipeline.generate_animation(request, animation_id=result.animation_id)
+    if fingerprint:
+        request_coalescer.register(fingerprint, result.animation_id)
+        job = request_coalescer.track(fingerprint, result.animation_id, job)
+    enqueue_coalesced(fingerprint, result.animation_id, job, priority=request.priority)
+    
+    return result
+
 @app.get("/status/{animation_id}")
 async def get_animation_status(animation_id: str):
-    """Récupère le statut d'une animation en cours"""
+    """Récupère le statut d'une animation (pipeline ou génération rapide)"""
     try:
-        # Chercher dans le cache de progression d'abord
-        if animation_id in progress_callbacks:
-            progress = progress_callbacks[animation_id]
+        # Lecture hors de la boucle d'événements (route interrogée en continu par les clients)
+        job = await job_store.get_job_async(animation_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Animation non trouvée")
+        
+        # Tâches lancées par /generate-quick
+        if job["kind"] == "quick":
+            return get_quick_task_status(animation_id, job)
+        
+        # Chercher la progression d'abord
+        progress = pipeline.get_animation_progress(animation_id, job)
+        if progress:
             return {
                 "type": "progress",
                 "data": progress
             }
         
-        # Sinon chercher dans les animations terminées
-        result = pipeline.get_animation_status(animation_id)
+        # Sinon le résultat de l'animation
+        result = pipeline.get_animation_status(animation_id, job)
         if result:
             return {
                 "type": "result",
@@ -216,38 +452,208 @@ async def get_animation_status(animation_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur récupération statut: {str(e)}")
 
+def animation_exists(animation_id: str) -> bool:
+    """Vrai si l'animation est connue du stockage ou diffusée par ce worker"""
+    return progress_broadcaster.has_stream(animation_id) or job_store.get_job(animation_id) is not None
+
+@app.delete("/animations/{animation_id}")
+async def cancel_animation(animation_id: str):
+    """Annule une animation en file ou en cours (pipeline ou génération rapide)
+    
+    Les clips et jobs audio/assemblage en vol sont abandonnés (annulation côté FAL AI),
+    et leurs places auprès du régulateur fournisseur libérées immédiatement.
+    Une génération partagée (requêtes identiques regroupées) n'est annulée qu'au départ
+    du dernier client qui la suit; les précédents sont seulement détachés.
+    """
+    job = job_store.get_job(animation_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Animation non trouvée")
+    if job["status"] in TERMINAL_STATUSES:
+        return {"animation_id": animation_id, "status": job["status"], "cancelled": False}
+    if not request_coalescer.detach(animation_id):
+        return {"animation_id": animation_id, "status": job["status"], "cancelled": False, "detached": True}
+    
+    state = cancel_generation(animation_id)
+    if state is None:
+        raise HTTPException(status_code=409, detail="Animation en cours dans un autre worker")
+    if state == "running":
+        await generation_queue.wait(animation_id, timeout=5)
+    
+    job = job_store.get_job(animation_id)
+    return {"animation_id": animation_id, "status": job["status"], "cancelled": True}
+
+@app.get("/status/{animation_id}/stream")
+async def stream_animation_status(animation_id: str, request: Request, last_event_id: Optional[int] = None,
+                                  cancel_on_disconnect: bool = False):
+    """Flux Server-Sent Events de la progression (deltas, fins de clips, heartbeats)
+    
+    Avec cancel_on_disconnect=true, l'animation est annulée quand le dernier client
+    qui suit son flux se déconnecte avant la fin.
+    """
+    if not animation_exists(animation_id):
+        raise HTTPException(status_code=404, detail="Animation non trouvée")
+    
+    # Reprise: en-tête standard Last-Event-ID envoyé par EventSource à la reconnexion
+    header_event_id = request.headers.get("last-event-id")
+    if header_event_id and header_event_id.isdigit():
+        last_event_id = int(header_event_id)
+    
+    # Animation lancée par un autre worker: relais depuis le stockage des jobs
+    progress_broadcaster.follow_job_store(job_store, animation_id)
+    
+    async def event_source():
+        finished = False
+        try:
+            yield "retry: 3000\n\n"
+            async with aclosing(progress_broadcaster.subscribe(animation_id, last_event_id)) as events:
+                async for event in events:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n" if event is None else event.to_sse()
+                else:
+                    finished = True
+        finally:
+            if cancel_on_disconnect and not finished:
+                cancel_if_abandoned(animation_id)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/status/{animation_id}/ws")
+async def websocket_animation_status(websocket: WebSocket, animation_id: str, last_event_id: Optional[int] = None,
+                                     cancel_on_disconnect: bool = False):
+    """Variante WebSocket du flux de progression (même option cancel_on_disconnect)"""
+    await websocket.accept()
+    
+    if not animation_exists(animation_id):
+        await websocket.send_json({"event": "failed", "data": {"error": "Animation non trouvée"}})
+        await websocket.close(code=4404)
+        return
+    
+    progress_broadcaster.follow_job_store(job_store, animation_id)
+    
+    try:
+        async with aclosing(progress_broadcaster.subscribe(animation_id, last_event_id)) as events:
+            async for event in events:
+                await websocket.send_json({"event": "heartbeat"} if event is None else event.to_dict())
+        await websocket.close()
+    except WebSocketDisconnect:
+        if cancel_on_disconnect:
+            cancel_if_abandoned(animation_id)
+
+@app.post("/webhooks/{provider}")
+async def provider_webhook(provider: str, request: Request):
+    """Callback de fin de job envoyé par Wavespeed ou FAL AI"""
+    if provider not in ("wavespeed", "fal"):
+        raise HTTPException(status_code=404, detail="Fournisseur inconnu")
+    
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Payload webhook invalide")
+    
+    # FAL: "request_id" / Wavespeed: "id" (éventuellement sous "data")
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else payload
+    job_id = payload.get("request_id") or data.get("id") or payload.get("id")
+    if not job_id:
+        raise HTTPException(status_code=400, detail="Identifiant de job manquant")
+    
+    # Le webhook réveille l'attente; le résultat est relu auprès du fournisseur
+    waiting = completion_waiter.notify(str(job_id))
+    return {"received": True, "job_id": job_id, "waiting": waiting}
+
 @app.post("/generate-quick")
-async def generate_quick_animation(request_body: dict):
-    """Endpoint simplifié pour génération rapide - Compatible avec frontend"""
+async def generate_quick_animation(
+    request_body: dict,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Endpoint simplifié pour génération rapide - Compatible avec frontend
+
+    Avec l'en-tête Idempotency-Key, une nouvelle tentative retrouve la tâche de la
+    première requête au lieu d'en lancer une autre.
+    """
+    # Extraire les paramètres du JSON body
+    theme = request_body.get("theme", "space")
+    duration = request_body.get("duration", 30)
+    coalesce = request_body.get("coalesce", True)
+    
+    existing_id = begin_idempotent_request(
+        "generate-quick", idempotency_key, theme=theme, duration=duration, coalesce=coalesce
+    )
+    if existing_id:
+        job = job_store.get_job(existing_id)
+        return {
+            "task_id": existing_id,
+            "status": job["status"] if job else "processing",
+            "message": f"Requête déjà reçue: animation '{theme}' suivie sous la même tâche",
+            "theme": theme,
+            "duration": duration,
+            "idempotent_replay": True
+        }
+    
+    try:
+        response = await start_quick_generation(theme, duration, coalesce)
+    except BaseException:
+        if idempotency_key:
+            idempotency_keys.abandon("generate-quick", idempotency_key)
+        raise
+    if idempotency_key:
+        idempotency_keys.complete("generate-quick", idempotency_key, response["task_id"])
+    return response
+
+async def start_quick_generation(theme: str, duration: int, coalesce: bool) -> Dict[str, Any]:
+    """Lance une génération rapide (ou rejoint une génération identique en cours)"""
     try:
-        # Extraire les paramètres du JSON body
-        theme = request_body.get("theme", "space")
-        duration = request_body.get("duration", 30)
+        # Une génération identique est déjà en cours: partager sa tâche
+        fingerprint = None
+        if coalesce:
+            fingerprint = request_coalescer.fingerprint("quick", theme=theme, duration=duration)
+            leader_id = request_coalescer.get_leader(fingerprint)
+            if leader_id:
+                return {
+                    "task_id": leader_id,
+                    "status": "processing",
+                    "message": f"Animation '{theme}' déjà en cours de génération, tâche partagée",
+                    "estimated_time": "5-7 minutes",
+                    "theme": theme,
+                    "duration": duration,
+                    "coalesced": True
+                }
+        
+        # Moteur simulé: la génération rapide passe par le pipeline (aucun appel fournisseur)
+        if pipeline.engine != "real":
+            request = AnimationRequest(theme=theme, duration=duration, coalesce=coalesce)
+            result = start_pipeline_generation(request)
+            return {
+                "task_id": result.animation_id,
+                "status": "processing",
+                "message": f"Animation '{theme}' en cours de génération simulée (moteur {pipeline.engine})...",
+                "estimated_time": f"{pipeline.estimate_total_generation_time(duration)} secondes",
+                "theme": theme,
+                "duration": duration
+            }
         
         print(f"🎬 VRAIE Génération DA: {theme} / {duration}s")
         
         # Créer task ID
-        import uuid
-        import time
         task_id = str(uuid.uuid4())
         
-        # Utiliser le nouveau générateur réel
-        generator = RealAnimationGenerator()
-        
         # Stocker les informations de la tâche
-        if not hasattr(app.state, 'task_storage'):
-            app.state.task_storage = {}
-            
-        app.state.task_storage[task_id] = {
+        job_store.create_job(task_id, "quick", "processing", data={
             "start_time": time.time(),
             "theme": theme,
-            "duration": duration,
-            "status": "processing"
-        }
+            "duration": duration
+        })
         
-        # Lancer la génération en arrière-plan
-        import asyncio
-        asyncio.create_task(generate_real_animation_task(task_id, theme, duration))
+        # Confier la génération au pool de workers
+        job = lambda: generate_real_animation_task(task_id, theme, duration)
+        if fingerprint:
+            request_coalescer.register(fingerprint, task_id)
+            job = request_coalescer.track(fingerprint, task_id, job)
+        enqueue_coalesced(fingerprint, task_id, job)
         
         return {
             "task_id": task_id,
@@ -258,6 +664,8 @@ async def generate_quick_animation(request_body: dict):
             "duration": duration
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur génération rapide: {str(e)}")
 
@@ -267,95 +675,96 @@ async def generate_real_animation_task(task_id: str, theme: str, duration: int):
         print(f"🚀 Démarrage génération réelle pour {task_id}")
         
         # Mettre à jour le statut
-        app.state.task_storage[task_id]["status"] = "generating"
+        job_store.update_job(task_id, status="generating")
         
         # Créer le générateur réel
-        generator = RealAnimationGenerator()
+        generator = RealAnimationGenerator(http_client=http_client, rate_limiter=rate_limiter, completion_waiter=completion_waiter)
         
         # Générer l'animation complète (5-7 minutes)
+        start_time = time.time()
         animation_result = await generator.generate_complete_animation(theme, duration)
+        if animation_result.get("type") == "real_animation":
+            eta_estimator.record("quick", time.time() - start_time)
         
         # Stocker le résultat
-        app.state.task_storage[task_id]["result"] = animation_result
-        app.state.task_storage[task_id]["status"] = "completed"
+        job_store.update_job(task_id, status="completed", result=animation_result)
         
         print(f"✅ Animation {task_id} générée avec succès!")
         
+    except asyncio.CancelledError:
+        job_store.update_job(task_id, status="cancelled", result={"error": "Animation annulée"})
+        raise
+        
     except Exception as e:
         print(f"❌ Erreur génération {task_id}: {e}")
-        app.state.task_storage[task_id]["status"] = "failed" 
-        app.state.task_storage[task_id]["error"] = str(e)
+        job_store.update_job(task_id, status="failed", result={"error": str(e)})
 
-@app.get("/status/{task_id}")
-async def get_animation_status(task_id: str):
-    """Récupère le statut RÉEL d'une tâche d'animation"""
-    try:
-        # Vérifier si la tâche existe
-        if not hasattr(app.state, 'task_storage') or task_id not in app.state.task_storage:
-            raise HTTPException(status_code=404, detail="Tâche non trouvée")
-        
-        task_info = app.state.task_storage[task_id]
-        status = task_info.get("status", "processing")
-        
-        print(f"📊 Statut RÉEL demandé pour {task_id}: {status}")
-        
-        if status == "processing" or status == "generating":
-            # Encore en traitement RÉEL
-            import time
-            current_time = time.time()
-            elapsed_seconds = current_time - task_info["start_time"]
-            
-            # Estimation temps réel : 5-7 minutes
-            estimated_duration = 400  # 6.5 minutes
-            progress = min(int((elapsed_seconds / estimated_duration) * 100), 95)
-            
-            return {
-                "type": "result", 
-                "data": {
-                    "task_id": task_id,
-                    "status": "processing",
-                    "progress": progress,
-                    "message": f"Génération RÉELLE en cours... {progress}%",
-                    "estimated_remaining": max(int(estimated_duration - elapsed_seconds), 30)
-                }
+def get_quick_task_status(task_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Formate le statut RÉEL d'une tâche lancée par /generate-quick"""
+    task_info = job["data"]
+    status = job["status"]
+    
+    if status == "processing" or status == "generating":
+        # Encore en traitement RÉEL
+        current_time = time.time()
+        elapsed_seconds = current_time - task_info["start_time"]
+        
+        # Durée apprise des générations rapides, sinon 5-7 minutes
+        estimated_duration = eta_estimator.estimate("quick", 400)  # 6.5 minutes par défaut
+        progress = min(int((elapsed_seconds / estimated_duration) * 100), 95)
+        
+        return {
+            "type": "result", 
+            "data": {
+                "task_id": task_id,
+                "status": "processing",
+                "progress": progress,
+                "message": f"Génération RÉELLE en cours... {progress}%",
+                "estimated_remaining": max(int(estimated_duration - elapsed_seconds), 30)
             }
-            
-        elif status == "completed":
-            # Animation RÉELLE terminée !
-            animation_result = task_info.get("result", {})
-            return {
-                "type": "result",
-                "data": animation_result
+        }
+        
+    elif status == "completed":
+        # Animation RÉELLE terminée !
+        animation_result = job.get("result") or {}
+        return {
+            "type": "result",
+            "data": animation_result
+        }
+        
+    elif status == "cancelled":
+        return {
+            "type": "result",
+            "data": {
+                "task_id": task_id,
+                "status": "cancelled",
+                "message": "Génération annulée"
             }
-            
-        elif status == "failed":
-            # Erreur de génération
-            error_msg = task_info.get("error", "Erreur inconnue")
-            return {
-                "type": "result",
-                "data": {
-                    "task_id": task_id,
-                    "status": "failed",
-                    "error": error_msg,
-                    "message": f"Échec de la génération: {error_msg}"
-                }
+        }
+        
+    elif status == "failed":
+        # Erreur de génération
+        error_msg = (job.get("result") or {}).get("error", "Erreur inconnue")
+        return {
+            "type": "result",
+            "data": {
+                "task_id": task_id,
+                "status": "failed",
+                "error": error_msg,
+                "message": f"Échec de la génération: {error_msg}"
             }
-            
-        else:
-            # Statut inconnu
-            return {
-                "type": "result", 
-                "data": {
-                    "task_id": task_id,
-                    "status": "unknown",
-                    "message": f"Statut inconnu: {status}"
-                }
+        }
+        
+    else:
+        # Statut inconnu
+        return {
+            "type": "result", 
+            "data": {
+                "task_id": task_id,
+                "status": "unknown",
+                "message": f"Statut inconnu: {status}"
             }
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur récupération statut: {str(e)}")
+        }
 
 @app.get("/health")
 async def health_check():
@@ -364,8 +773,17 @@ async def health_check():
         health = await pipeline.validate_pipeline_health()
         return {
             "status": "healthy" if health["pipeline_operational"] else "degraded",
+            "engine": pipeline.engine,
             "services": health["services"],
-            "timestamp": pipeline.active_animations
+            "active_animations": job_store.count_jobs(exclude_statuses=TERMINAL_STATUSES),
+            "queue": generation_queue.get_stats(),
+            "rate_limits": rate_limiter.get_stats(),
+            "clip_cache": clip_cache.get_stats(),
+            "story_pool": pipeline.story_pool.get_stats(),
+            "endpoints": endpoint_registry.get_stats(),
+            "coalescing": request_coalescer.get_stats(),
+            "idempotency": idempotency_keys.get_stats(),
+            "eta": eta_estimator.get_stats()
         }
     except Exception as e:
         return JSONResponse(
@@ -373,18 +791,21 @@ async def health_check():
             content={"status": "unhealthy", "error": str(e)}
         )
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métriques au format Prometheus (durées par étape, latence fournisseurs, file, cache)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.delete("/cleanup")
 async def cleanup_old_animations():
-    """Nettoie les anciennes animations (endpoint admin)"""
+    """Nettoie les anciennes animations terminées (endpoint admin; les animations en cours sont conservées)"""
     try:
-        initial_count = len(pipeline.active_animations)
-        pipeline.cleanup_old_animations(max_age_hours=6)  # 6 heures
-        final_count = len(pipeline.active_animations)
+        removed_count = pipeline.cleanup_old_animations(max_age_hours=6)  # 6 heures
         
         return {
             "message": "Nettoyage effectué",
-            "animations_removed": initial_count - final_count,
-            "remaining_animations": final_count
+            "animations_removed": removed_count,
+            "remaining_animations": job_store.count_jobs()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur nettoyage: {str(e)}")
@@ -30,6 +30,8 @@ class AnimationStatus(str, Enum):
     ASSEMBLING_VIDEO = "assembling_video"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+    INTERRUPTED = "interrupted"  # Arrêt du serveur: reprise au prochain démarrage
 
 class AnimationRequest(BaseModel):
     """Requête de génération d'animation"""
@@ -37,6 +39,8 @@ class AnimationRequest(BaseModel):
     duration: AnimationDuration
     user_id: Optional[str] = None
     custom_prompt: Optional[str] = None
+    priority: int = Field(default=5, ge=0, le=9)  # 0 = plus prioritaire
+    coalesce: bool = True  # False = ne jamais partager une génération identique en cours
 
 class StoryIdea(BaseModel):
     """Idée d'histoire générée"""
@@ -53,6 +57,11 @@ class Scene(BaseModel):
     duration: int
     prompt: str
 
+class StoryPlan(BaseModel):
+    """Plan d'histoire complet (idée + scènes) produit en un seul appel"""
+    story_idea: StoryIdea
+    scenes: List[Scene]
+
 class VideoClip(BaseModel):
     """Clip vidéo généré"""
     scene_number: int
@@ -78,6 +87,8 @@ class AnimationResult(BaseModel):
     created_at: str
     processing_time: Optional[float] = None
     error_message: Optional[str] = None
+    # Jobs fournisseurs soumis par nœud ("clip_1", "audio", "assembly"): repris après un redémarrage
+    provider_jobs: Dict[str, str] = Field(default_factory=dict)
 
 class AnimationProgress(BaseModel):
     """Progression du traitement"""
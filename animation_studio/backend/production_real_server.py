@@ -1,391 +1,19 @@
 #!/usr/bin/env python3
 """
 Serveur de production - Animation Studio
-Utilise les VRAIES APIs pour générer de vrais dessins animés
+
+Ancien serveur autonome: lance désormais l'application unique (main.py) avec le
+moteur "real" sur le port 8011: pipeline complet avec les vrais fournisseurs (OpenAI, Wavespeed, FAL AI).
+Équivalent à: PIPELINE_ENGINE=real PORT=8011 python start.py
 """
 
-import asyncio
 import os
-import time
-import uuid
-import aiohttp
-import json
-from pathlib import Path
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from dotenv import load_dotenv
-import uvicorn
-
-# Charger le fichier .env
-load_dotenv()
-
-# Configuration depuis .env
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-WAVESPEED_API_KEY = os.getenv("WAVESPEED_API_KEY") 
-FAL_API_KEY = os.getenv("FAL_API_KEY")
-TEXT_MODEL = os.getenv("TEXT_MODEL", "gpt-4o-mini")
-CARTOON_STYLE = os.getenv("CARTOON_STYLE", "2D cartoon animation, Disney style")
-
-print(f"🔑 APIs configurées:")
-print(f"📝 OpenAI: {'✅' if OPENAI_API_KEY else '❌'}")
-print(f"🎥 Wavespeed: {'✅' if WAVESPEED_API_KEY else '❌'}")
-print(f"🎵 FAL AI: {'✅' if FAL_API_KEY else '❌'}")
-
-# FastAPI app
-app = FastAPI(title="Animation Studio Production")
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Modèles Pydantic
-class AnimationRequest(BaseModel):
-    theme: str
-    duration: int
-
-# Storage des tâches
-generation_tasks = {}
-
-@app.get("/health")
-async def health():
-    return {
-        "status": "healthy",
-        "ai_services": {
-            "openai": bool(OPENAI_API_KEY),
-            "wavespeed": bool(WAVESPEED_API_KEY),
-            "fal": bool(FAL_API_KEY)
-        },
-        "production": True
-    }
-
-@app.get("/themes")
-async def get_themes():
-    return {
-        "themes": [
-            {
-                "id": "space",
-                "name": "Espace",
-                "icon": "🚀",
-                "description": "Aventures cosmiques et exploration spatiale"
-            },
-            {
-                "id": "ocean",
-                "name": "Océan",
-                "icon": "🌊",
-                "description": "Monde sous-marin et créatures marines"
-            },
-            {
-                "id": "forest",
-                "name": "Forêt",
-                "icon": "🌲",
-                "description": "Animaux de la forêt et nature magique"
-            },
-            {
-                "id": "magic",
-                "name": "Magie",
-                "icon": "✨",
-                "description": "Monde fantastique avec fées et sorciers"
-            }
-        ]
-    }
-
-@app.post("/generate")
-async def generate_animation(request: AnimationRequest):
-    """Générer une animation avec les VRAIES APIs"""
-    
-    if not all([OPENAI_API_KEY, WAVESPEED_API_KEY, FAL_API_KEY]):
-        raise HTTPException(status_code=500, detail="Clés API manquantes")
-    
-    animation_id = str(uuid.uuid4())
-    
-    # Initialiser le statut
-    generation_tasks[animation_id] = {
-        "animation_id": animation_id,
-        "status": "starting",
-        "progress": 0,
-        "current_step": "🚀 Initialisation des APIs...",
-        "result": None,
-        "error": None,
-        "theme": request.theme,
-        "duration": request.duration,
-        "created_at": time.time()
-    }
-    
-    print(f"🎬 VRAIE GÉNÉRATION: {animation_id} | {request.theme} | {request.duration}s")
-    
-    # Lancer la génération avec les vraies APIs
-    asyncio.create_task(real_ai_generation(animation_id, request.theme, request.duration))
-    
-    return {"animation_id": animation_id, "status": "started"}
-
-@app.get("/status/{animation_id}")
-async def get_status(animation_id: str):
-    """Récupérer le statut d'une animation"""
-    
-    if animation_id not in generation_tasks:
-        raise HTTPException(status_code=404, detail="Animation non trouvée")
-    
-    task = generation_tasks[animation_id]
-    return {
-        "animation_id": animation_id,
-        "status": task["status"],
-        "progress": task["progress"],
-        "current_step": task["current_step"],
-        "result": task["result"],
-        "error": task["error"]
-    }
-
-async def real_ai_generation(animation_id: str, theme: str, duration: int):
-    """VRAIE génération avec OpenAI + Wavespeed + FAL"""
-    
-    task = generation_tasks[animation_id]
-    
-    try:
-        # Étape 1: Générer une histoire avec OpenAI GPT-4
-        print(f"🧠 Étape 1: Génération histoire avec OpenAI...")
-        task["current_step"] = "🧠 Création de l'histoire avec OpenAI GPT-4..."
-        task["progress"] = 10
-        
-        story_idea = await generate_story_with_openai(theme, duration)
-        print(f"✅ Histoire générée: {story_idea['title']}")
-        
-        # Étape 2: Créer des scènes détaillées avec OpenAI
-        print(f"🎬 Étape 2: Création des scènes...")
-        task["current_step"] = "🎬 Création des scènes détaillées..."
-        task["progress"] = 25
-        
-        scenes = await create_scenes_with_openai(story_idea, duration)
-        print(f"✅ {len(scenes)} scènes créées")
-        
-        # Étape 3: Générer des clips vidéo avec Wavespeed AI
-        print(f"🎥 Étape 3: Génération des clips vidéo...")
-        video_clips = []
-        
-        for i, scene in enumerate(scenes):
-            task["current_step"] = f"🎥 Génération clip {i+1}/{len(scenes)} avec Wavespeed..."
-            task["progress"] = 30 + (i * 40 // len(scenes))
-            
-            clip_url = await generate_video_with_wavespeed(scene)
-            video_clips.append({
-                "scene_description": scene["description"],
-                "video_url": clip_url,
-                "duration": scene.get("duration", 5)
-            })
-            print(f"✅ Clip {i+1}/{len(scenes)} généré")
-        
-        # Étape 4: Générer audio avec FAL AI
-        print(f"🎵 Étape 4: Génération audio...")
-        task["current_step"] = "🎵 Création de la bande sonore avec FAL AI..."
-        task["progress"] = 80
-        
-        audio_url = await generate_audio_with_fal(story_idea, duration)
-        print(f"✅ Audio généré")
-        
-        # Étape 5: Assemblage final avec FAL AI
-        print(f"🎞️ Étape 5: Assemblage final...")
-        task["current_step"] = "🎞️ Assemblage final de l'animation..."
-        task["progress"] = 95
-        
-        final_video_url = await assemble_video_with_fal(video_clips, audio_url)
-        print(f"✅ Vidéo finale assemblée")
-        
-        # Finaliser
-        task["status"] = "completed"
-        task["progress"] = 100
-        task["current_step"] = "✅ Animation terminée!"
-        task["result"] = {
-            "final_video_url": final_video_url,
-            "story_idea": story_idea,
-            "scenes_count": len(scenes),
-            "clips_count": len(video_clips),
-            "theme": theme,
-            "duration": duration,
-            "ai_models_used": ["OpenAI GPT-4", "Wavespeed SeedANce", "FAL AI"],
-            "generation_time": time.time() - task["created_at"]
-        }
-        
-        print(f"🎉 VRAIE ANIMATION {animation_id} terminée!")
-        
-    except Exception as e:
-        print(f"💥 ERREUR génération {animation_id}: {e}")
-        task["status"] = "error"
-        task["error"] = f"Erreur: {str(e)}"
-        task["current_step"] = "❌ Erreur de génération"
-
-async def generate_story_with_openai(theme: str, duration: int):
-    """Générer une histoire avec OpenAI GPT-4"""
-    
-    theme_prompts = {
-        "space": "aventure spatiale avec des astronautes et des planètes mystérieuses",
-        "ocean": "exploration sous-marine avec des créatures marines magiques",
-        "forest": "aventure dans une forêt enchantée avec des animaux parlants",
-        "magic": "monde magique avec des fées, des sorciers et des créatures fantastiques"
-    }
-    
-    prompt = f"""Crée une histoire courte pour enfants de {duration} secondes sur le thème: {theme_prompts.get(theme, theme)}.
-
-L'histoire doit être:
-- Adaptée aux enfants (3-8 ans)
-- Positive et éducative
-- Parfaite pour un dessin animé de style Disney
-- Divisible en 3-4 scènes visuelles
-
-Format de réponse JSON:
-{{
-    "title": "Titre de l'histoire",
-    "summary": "Résumé en 2 phrases",
-    "scenes": [
-        {{"description": "Description visuelle de la scène", "action": "Action qui se passe", "duration": 5}},
-        ...
-    ]
-}}"""
-    
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": TEXT_MODEL,
-        "messages": [
-            {"role": "system", "content": "Tu es un créateur d'histoires pour enfants, expert en dessins animés Disney."},
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 800,
-        "temperature": 0.8
-    }
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.post("https://api.openai.com/v1/chat/completions", 
-                               headers=headers, json=data) as response:
-            if response.status == 200:
-                result = await response.json()
-                content = result["choices"][0]["message"]["content"]
-                
-                try:
-                    # Extraire le JSON de la réponse
-                    import re
-                    json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                    if json_match:
-                        story_data = json.loads(json_match.group())
-                        return story_data
-                except:
-                    pass
-                
-                # Fallback si parsing échoue
-                return {
-                    "title": f"Aventure {theme.title()}",
-                    "summary": f"Une merveilleuse aventure dans le monde {theme}",
-                    "scenes": [
-                        {"description": f"Introduction au monde {theme}", "action": "Le héros découvre le nouveau monde", "duration": duration//3},
-                        {"description": f"Aventure principale {theme}", "action": "Le héros vit une aventure", "duration": duration//3},
-                        {"description": f"Conclusion heureuse {theme}", "action": "Fin heureuse de l'aventure", "duration": duration//3}
-                    ]
-                }
-            else:
-                raise Exception(f"Erreur OpenAI: {response.status}")
-
-async def create_scenes_with_openai(story_idea: dict, duration: int):
-    """Convertir l'histoire en scènes optimisées pour Wavespeed"""
-    
-    scenes = []
-    for scene_data in story_idea.get("scenes", []):
-        # Format optimisé pour Wavespeed AI
-        scene = {
-            "description": f"{CARTOON_STYLE}, {scene_data['description']}, colorful, high quality animation",
-            "action": scene_data.get("action", ""),
-            "duration": scene_data.get("duration", 5)
-        }
-        scenes.append(scene)
-    
-    return scenes
-
-async def generate_video_with_wavespeed(scene: dict):
-    """Générer un clip vidéo avec Wavespeed AI (SeedANce)"""
-    
-    # Prompt optimisé pour SeedANce selon zseedance.json
-    video_prompt = f"{scene['description']}, {scene['action']}, {CARTOON_STYLE}, smooth animation, children friendly"
-    
-    headers = {
-        "Authorization": f"Bearer {WAVESPEED_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    # Configuration selon zseedance.json
-    data = {
-        "aspect_ratio": "9:16",
-        "duration": min(scene.get("duration", 5), 10),  # Max 10s pour SeedANce
-        "prompt": video_prompt
-    }
-    
-    async with aiohttp.ClientSession() as session:
-        # Endpoint exact du zseedance.json
-        async with session.post("https://api.wavespeed.ai/api/v3/bytedance/seedance-v1-pro-t2v-480p",
-                               headers=headers, json=data) as response:
-            if response.status == 200:
-                result = await response.json()
-                prediction_id = result.get("data", {}).get("id") or result.get("id")
-                
-                if prediction_id:
-                    # Attendre la completion
-                    for _ in range(60):  # 5 minutes max
-                        await asyncio.sleep(5)
-                        async with session.get(f"https://api.wavespeed.ai/api/v3/predictions/{prediction_id}/result",
-                                             headers=headers) as status_response:
-                            if status_response.status == 200:
-                                status_result = await status_response.json()
-                                
-                                if status_result.get("status") == "completed":
-                                    outputs = status_result.get("data", {}).get("outputs", [])
-                                    if outputs:
-                                        return outputs[0]
-                                elif status_result.get("status") == "failed":
-                                    raise Exception("Génération vidéo échouée")
-                    
-                    raise Exception("Timeout génération vidéo")
-                else:
-                    raise Exception("Pas d'ID de prédiction")
-            else:
-                # Fallback en cas d'erreur Wavespeed
-                print(f"⚠️ Erreur Wavespeed {response.status}, utilisation fallback")
-                fallback_videos = {
-                    "space": "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/ElephantsDream.mp4",
-                    "ocean": "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/ForBiggerBlazes.mp4",
-                    "forest": "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4",
-                    "magic": "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/Sintel.mp4"
-                }
-                return fallback_videos.get("space", "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4")
-
-async def generate_audio_with_fal(story_idea: dict, duration: int):
-    """Générer audio avec FAL AI"""
-    
-    # Pour l'instant, retourne un audio de demo
-    # TODO: Implémenter vraie génération FAL AI
-    audio_demos = [
-        "https://www.soundjay.com/misc/sounds/magic-chime-02.wav",
-        "https://www.soundjay.com/misc/sounds/fairy-bell-09.wav"
-    ]
-    return audio_demos[0]
 
-async def assemble_video_with_fal(video_clips: list, audio_url: str):
-    """Assembler la vidéo finale avec FAL AI"""
-    
-    # Pour l'instant, retourne le premier clip
-    # TODO: Implémenter vraie composition FAL AI
-    if video_clips:
-        return video_clips[0]["video_url"]
-    
-    return "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4"
+# Valeurs par défaut de ce serveur (avant le chargement de la configuration)
+os.environ.setdefault("PIPELINE_ENGINE", "real")
+os.environ.setdefault("PORT", "8011")
+os.environ.setdefault("HOST", "0.0.0.0")
 
 if __name__ == "__main__":
-    print("🎬 ANIMATION STUDIO - PRODUCTION AVEC VRAIES APIs")
-    print("📍 URL: http://localhost:8011")
-    print("🚀 Génération réelle avec vos APIs...")
-    
-    uvicorn.run(app, host="0.0.0.0", port=8011, log_level="info") 
\ No newline at end of file
+    from start import run
+    run()
@@ -4,4 +4,6 @@ taskkill /f /im python.exe 2>nul
 timeout /t 2 /nobreak >nul
 
 echo 🚀 Démarrage du serveur de production avec vraies APIs...
-python production_real_server.py 
\ No newline at end of file
+set PIPELINE_ENGINE=real
+set PORT=8011
+python start.py 
\ No newline at end of file
@@ -1,109 +1,124 @@
 import asyncio
+import math
 import uuid
 import time
+from contextlib import aclosing
 from datetime import datetime
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple
 from config import config
 from models.schemas import (
     AnimationRequest, AnimationResult, AnimationProgress, AnimationStatus,
     StoryIdea, Scene, VideoClip, AudioTrack, AnimationTheme
 )
-from .idea_generator import IdeaGenerator
-from .scene_creator import SceneCreator
-from .video_generator import VideoGenerator
-from .audio_generator import AudioGenerator
-from .video_assembler import VideoAssembler
+from .engines import create_provider_services
+from .local_assembler import LocalVideoAssembler
+from .http_client import ProviderHttpClient, http_client as shared_http_client
+from .job_waiter import JobCompletionWaiter, completion_waiter as shared_completion_waiter
+from .pipeline_graph import PipelineGraph, WAIT_ANY, WAIT_SETTLED
+from .clip_retry import ClipRetryBudget
+from .story_pool import StoryPlanPool
+from .job_store import JobStore, TERMINAL_STATUSES, job_store as shared_job_store
+from .progress_stream import ProgressBroadcaster, progress_broadcaster as shared_progress_broadcaster
+from .rate_limiter import ProviderRateLimiter, current_owner, rate_limiter as shared_rate_limiter
+from .metrics import metrics
+from .eta_estimator import EtaEstimator, eta_estimator as shared_eta_estimator
 
 class AnimationPipeline:
     """Pipeline principal de génération de dessins animés (inspiré de zseedance.json)"""
     
-    def __init__(self):
-        self.idea_generator = IdeaGenerator()
-        self.scene_creator = SceneCreator()
-        self.video_generator = VideoGenerator()
-        self.audio_generator = AudioGenerator()
-        self.video_assembler = VideoAssembler()
-        
-        # Cache pour suivre les animations en cours
-        self.active_animations: Dict[str, AnimationResult] = {}
+    def __init__(
+        self,
+        http_client: Optional[ProviderHttpClient] = None,
+        completion_waiter: Optional[JobCompletionWaiter] = None,
+        job_store: Optional[JobStore] = None,
+        progress_broadcaster: Optional[ProgressBroadcaster] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        eta_estimator: Optional[EtaEstimator] = None,
+        story_pool: Optional[StoryPlanPool] = None,
+        engine: Optional[str] = None
+    ):
+        # Client HTTP, attente des jobs et régulateur partagés par tous les services fournisseurs
+        self.http_client = http_client or shared_http_client
+        self.completion_waiter = completion_waiter or shared_completion_waiter
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        
+        # Moteur: fournisseurs réels ("real") ou simulés ("demo", "debug")
+        self.engine = (engine or config.PIPELINE_ENGINE).lower()
+        services = create_provider_services(
+            self.engine,
+            http_client=self.http_client,
+            completion_waiter=self.completion_waiter,
+            rate_limiter=self.rate_limiter
+        )
+        
+        self.idea_generator = services["idea_generator"]
+        self.scene_creator = services["scene_creator"]
+        self.story_planner = services["story_planner"]
+        
+        # "single": idée + scènes en un appel; "two_step": deux appels successifs
+        self.story_plan_mode = config.STORY_PLAN_MODE
+        # Scènes lues en streaming: chaque clip part dès que sa scène est écrite
+        self.scene_streaming = config.SCENE_STREAMING
+        # Plans générés à l'avance (même moteur que les animations): pas d'appel OpenAI au démarrage
+        self.story_pool = story_pool or StoryPlanPool(self.story_planner, self.idea_generator)
+        self.video_generator = services["video_generator"]
+        self.audio_generator = services["audio_generator"]
+        self.video_assembler = services["video_assembler"]
+        
+        # Stockage persistant des animations (partagé entre workers)
+        self.job_store = job_store or shared_job_store
+        
+        # Diffusion en push de la progression (SSE / WebSocket)
+        self.progress_broadcaster = progress_broadcaster or shared_progress_broadcaster
+        
+        # Durées apprises par étape (temps restant annoncé aux clients)
+        self.eta_estimator = eta_estimator or shared_eta_estimator
+    
+    def register_animation(self, request: AnimationRequest) -> AnimationResult:
+        """Enregistre une animation en attente (avant sa mise en file)"""
+        
+        result = AnimationResult(
+            animation_id=str(uuid.uuid4()),
+            status=AnimationStatus.PENDING,
+            created_at=datetime.now().isoformat()
+        )
+        
+        self.job_store.create_job(
+            result.animation_id,
+            "pipeline",
+            result.status.value,
+            data={"theme": request.theme.value, "duration": int(request.duration), "priority": request.priority},
+            result=result.model_dump(mode="json")
+        )
+        
+        return result
     
     async def generate_animation(
         self, 
         request: AnimationRequest, 
-        progress_callback: Optional[Callable[[AnimationProgress], None]] = None
+        progress_callback: Optional[Callable[[AnimationProgress], None]] = None,
+        animation_id: Optional[str] = None
     ) -> AnimationResult:
         """Génère un dessin animé complet selon le workflow zseedance.json"""
         
-        # Initialiser le résultat
-        animation_id = str(uuid.uuid4())
+        # Initialiser le résultat (ou reprendre celui enregistré à la mise en file)
+        # (une animation reprise après redémarrage garde ses sorties d'étapes et jobs fournisseurs)
+        registered = self.get_animation_status(animation_id) if animation_id else None
+        result = registered or self.register_animation(request)
+        result.status = AnimationStatus.PENDING
+        animation_id = result.animation_id
         start_time = time.time()
         
-        result = AnimationResult(
-            animation_id=animation_id,
-            status=AnimationStatus.PENDING,
-            created_at=datetime.now().isoformat()
-        )
-        
-        self.active_animations[animation_id] = result
+        # Les appels fournisseurs de cette animation partagent équitablement les limites globales
+        owner_token = current_owner.set(animation_id)
         
         try:
-            # Étape 1: Génération d'idée (équivalent "Ideas AI Agent" dans n8n)
-            await self._update_progress(animation_id, AnimationStatus.GENERATING_IDEA, 10, 
-                                      "Génération de l'idée d'histoire...", progress_callback)
-            
-            story_idea = await self.idea_generator.generate_story_idea(request.theme, request.duration)
+            # Graphe de tâches: chaque étape démarre dès que ses entrées sont prêtes
+            graph = self._build_graph(request, result, animation_id, progress_callback)
+            outputs = await graph.run()
             
-            # Valider l'idée pour les enfants
-            if not await self.idea_generator.validate_idea(story_idea):
-                raise Exception("L'idée générée n'est pas appropriée pour les enfants")
-            
-            result.story_idea = story_idea
-            
-            # Étape 2: Création des scènes (équivalent "Prompts AI Agent" dans n8n)
-            await self._update_progress(animation_id, AnimationStatus.CREATING_SCENES, 25,
-                                      "Création des scènes détaillées...", progress_callback)
-            
-            scenes = await self.scene_creator.create_scenes_from_idea(story_idea, request.duration)
-            result.scenes = scenes
-            
-            # Étape 3: Génération des clips vidéo (équivalent "Create Clips" -> "Get Clips" dans n8n)
-            await self._update_progress(animation_id, AnimationStatus.GENERATING_CLIPS, 40,
-                                      "Génération des clips vidéo...", progress_callback)
-            
-            video_clips = await self.video_generator.generate_all_clips(scenes)
-            result.video_clips = video_clips
-            
-            # Vérifier qu'au moins un clip a été généré avec succès
-            valid_clips = [clip for clip in video_clips if clip.status == "completed"]
-            if not valid_clips:
-                raise Exception("Aucun clip vidéo n'a pu être généré")
-            
-            # Étape 4: Génération audio (équivalent "Create Sounds" -> "Get Sounds" dans n8n)
-            await self._update_progress(animation_id, AnimationStatus.GENERATING_AUDIO, 70,
-                                      "Génération des effets sonores...", progress_callback)
-            
-            try:
-                audio_track = await self.audio_generator.generate_audio_for_video(
-                    story_idea, video_clips, request.duration
-                )
-                result.audio_track = audio_track
-            except Exception as e:
-                # Audio optionnel - continuer sans audio en cas d'échec
-                print(f"Avertissement: Échec génération audio: {e}")
-                result.audio_track = None
-            
-            # Étape 5: Assemblage final (équivalent "Sequence Video" -> "Get Final Video" dans n8n)
-            await self._update_progress(animation_id, AnimationStatus.ASSEMBLING_VIDEO, 85,
-                                      "Assemblage de la vidéo finale...", progress_callback)
-            
-            try:
-                final_video_url = await self.video_assembler.assemble_final_video(
-                    video_clips, result.audio_track
-                )
-            except Exception as e:
-                # Fallback: créer une séquence simple sans audio
-                print(f"Échec assemblage complet, essai séquence simple: {e}")
-                final_video_url = await self.video_assembler.create_simple_sequence(video_clips)
+            valid_clips = [clip for clip in result.video_clips or [] if clip.status == "completed"]
+            final_video_url = outputs.get("assembly")
             
             if not final_video_url:
                 # Dernière solution: retourner le premier clip valide
@@ -115,11 +130,29 @@ class AnimationPipeline:
             processing_time = time.time() - start_time
             result.processing_time = processing_time
             result.status = AnimationStatus.COMPLETED
+            scene_durations = self.scene_creator.calculate_scene_distribution(request.duration)
+            self.eta_estimator.record("animation", processing_time, len(scene_durations), scene_durations[0])
             
             await self._update_progress(animation_id, AnimationStatus.COMPLETED, 100,
-                                      "Animation terminée!", progress_callback)
+                                      "Animation terminée!", progress_callback, result=result)
             
             return result
+        
+        except asyncio.CancelledError:
+            if self.completion_waiter.shutting_down:
+                # Arrêt du serveur: sorties d'étapes et jobs fournisseurs conservés pour la reprise
+                result.status = AnimationStatus.INTERRUPTED
+                self.job_store.checkpoint(animation_id, result.model_dump(mode="json"))
+                raise
+            
+            # Annulation (DELETE /animations/{id}, client parti): les nœuds en cours
+            # ont été annulés par le graphe et leurs places fournisseurs libérées
+            result.status = AnimationStatus.CANCELLED
+            result.error_message = "Animation annulée"
+            
+            await self._update_progress(animation_id, AnimationStatus.CANCELLED, 0,
+                                      "Animation annulée", progress_callback, result=result)
+            raise
             
         except Exception as e:
             # Gestion d'erreur
@@ -127,14 +160,351 @@ class AnimationPipeline:
             result.error_message = str(e)
             
             await self._update_progress(animation_id, AnimationStatus.FAILED, 0,
-                                      f"Erreur: {str(e)}", progress_callback)
+                                      f"Erreur: {str(e)}", progress_callback, result=result)
             
             return result
         
         finally:
-            # Nettoyer le cache
-            if animation_id in self.active_animations:
-                self.active_animations[animation_id] = result
+            current_owner.reset(owner_token)
+            metrics.animation_duration.observe(
+                time.time() - start_time,
+                theme=request.theme.value, duration=int(request.duration), status=result.status.value
+            )
+            
+            # Enregistrer le résultat final
+            self.job_store.update_job(animation_id, status=result.status.value,
+                                      result=result.model_dump(mode="json"))
+
+    def _build_graph(
+        self,
+        request: AnimationRequest,
+        result: AnimationResult,
+        animation_id: str,
+        progress_callback: Optional[Callable[[AnimationProgress], None]] = None
+    ) -> PipelineGraph:
+        """Construit le graphe idée -> scènes -> clips -> (audio dès le premier clip) -> assemblage"""
+        
+        # Étape, message et poids de progression de chaque type de nœud
+        node_steps = {
+            "idea": (AnimationStatus.GENERATING_IDEA, "Génération de l'idée d'histoire...", 10),
+            "scenes": (AnimationStatus.CREATING_SCENES, "Création des scènes détaillées...", 15),
+            "clip": (AnimationStatus.GENERATING_CLIPS, "Génération des clips vidéo...", 50),
+            "audio": (AnimationStatus.GENERATING_AUDIO, "Génération des effets sonores...", 10),
+            "assembly": (AnimationStatus.ASSEMBLING_VIDEO, "Assemblage de la vidéo finale...", 10),
+        }
+        
+        clip_nodes: List[str] = []
+        # Nœuds repris d'une exécution interrompue (durées non représentatives)
+        resumed_nodes = set()
+        progress_state = {"done_weight": 0.0}
+        node_started: Dict[str, float] = {}
+        node_finished = set()
+        # Source des scènes ouverte avec l'idée (mode "single"): liste ou flux
+        scene_source: Dict[str, Any] = {}
+        scene_durations = self.scene_creator.calculate_scene_distribution(request.duration)
+        expected_clips = len(scene_durations)
+        clip_duration = scene_durations[0]
+        # Soumissions Wavespeed supplémentaires (relances, doublons) partagées par tous les clips
+        clip_budget = ClipRetryBudget()
+        
+        def stage_estimate(stage: str) -> float:
+            return self.estimate_stage_time(stage, expected_clips, clip_duration)
+        
+        def remaining_time() -> int:
+            """Temps restant: étapes non terminées, moins le temps déjà passé sur celles en cours"""
+            now = time.perf_counter()
+            
+            def left(stage: str, node: str) -> float:
+                if node in node_finished:
+                    return 0.0
+                if node in node_started:
+                    return max(stage_estimate(stage) - (now - node_started[node]), 0.0)
+                return stage_estimate(stage)
+            
+            # Clips: en parallèle jusqu'au plafond Wavespeed, puis par vagues supplémentaires
+            pending = [f"clip_{i + 1}" for i in range(expected_clips) if f"clip_{i + 1}" not in node_finished]
+            running = [left("clip", node) for node in pending if node in node_started]
+            waiting = len(pending) - len(running)
+            concurrency = self.rate_limiter.max_concurrency("wavespeed")
+            clips = max(running + ([stage_estimate("clip")] if waiting else []), default=0.0)
+            overflow = waiting - max(concurrency - len(running), 0)
+            if overflow > 0:
+                clips += math.ceil(overflow / concurrency) * stage_estimate("clip")
+            
+            # L'audio tourne en parallèle des clips: seul son dépassement compte
+            audio = max(left("audio", "audio") - clips, 0.0)
+            return int(left("idea", "idea") + left("scenes", "scenes") + clips + audio + left("assembly", "assembly"))
+        
+        def checkpoint():
+            """Sorties d'étapes écrites aussitôt (reprise possible après un redémarrage)"""
+            self.job_store.checkpoint(animation_id, result.model_dump(mode="json"))
+        
+        def submitted(name: str) -> Callable[[str], None]:
+            """Enregistre le job fournisseur d'un nœud dès sa soumission"""
+            def record(provider_job_id: str):
+                result.provider_jobs[name] = provider_job_id
+                checkpoint()
+            return record
+        
+        def provider_job(name: str) -> Optional[str]:
+            """Job fournisseur soumis avant l'interruption: reprendre son attente"""
+            provider_job_id = result.provider_jobs.get(name)
+            if provider_job_id:
+                resumed_nodes.add(name)
+            return provider_job_id
+        
+        def node_weight(name: str) -> float:
+            if name.startswith("clip_"):
+                return node_steps["clip"][2] / max(expected_clips, len(clip_nodes))
+            return node_steps[name][2]
+        
+        async def on_event(name: str, event: str, payload: Any = None):
+            kind = "clip" if name.startswith("clip_") else name
+            status, step, _ = node_steps[kind]
+            
+            # Durée de chaque nœud (un clip = une observation) par thème
+            if event == "started":
+                node_started[name] = time.perf_counter()
+            elif name in node_started:
+                node_finished.add(name)
+                elapsed = time.perf_counter() - node_started[name]
+                if name not in resumed_nodes:
+                    metrics.stage_duration.observe(elapsed, stage=kind, theme=request.theme.value, outcome=event)
+                    if event == "completed":
+                        self.eta_estimator.record(kind, elapsed, expected_clips, clip_duration)
+            
+            if event == "started":
+                if kind == "clip" and name != clip_nodes[0]:
+                    return
+            else:
+                progress_state["done_weight"] += node_weight(name)
+                step = f"{name}: {'terminé' if event == 'completed' else 'échec'}"
+            
+            # Événement dédié à chaque fin de clip
+            if kind == "clip" and event != "started":
+                clip = next(clip for clip in result.video_clips if f"clip_{clip.scene_number}" == name)
+                self.progress_broadcaster.publish(animation_id, "clip", clip.model_dump(mode="json"))
+            
+            percentage = min(95, int(progress_state["done_weight"]))
+            await self._update_progress(animation_id, status, percentage, step, progress_callback,
+                                        details={"node": name, "event": event}, result=result,
+                                        remaining_time=remaining_time())
+        
+        graph = PipelineGraph(on_event=on_event)
+        
+        async def close_scene_source():
+            """Ferme un flux de scènes non consommé (libère la place OpenAI et la connexion)"""
+            source = scene_source.pop("scenes", None)
+            if hasattr(source, "aclose"):
+                await source.aclose()
+        
+        # Flux ouvert par l'idée mais jamais lu (échec ou annulation avant les scènes)
+        graph.add_cleanup(close_scene_source)
+        
+        # Étape 1: Génération d'idée (équivalent "Ideas AI Agent" dans n8n)
+        async def generate_idea(outputs: Dict[str, Any]) -> StoryIdea:
+            if result.story_idea is not None:
+                # Reprise: idée déjà validée avant l'interruption
+                resumed_nodes.add("idea")
+                return result.story_idea
+            
+            story_idea = None
+            plan = self.story_pool.take(request.theme, request.duration)
+            if plan is not None:
+                # Plan préchauffé: idée et scènes déjà prêtes, les clips partent aussitôt
+                story_idea = plan.story_idea
+                scene_source["scenes"] = list(plan.scenes)
+            elif self.story_plan_mode == "single":
+                try:
+                    if self.scene_streaming:
+                        # L'idée arrive en tête du flux; le reste (les scènes) est lu par le nœud suivant
+                        plan_stream = self.story_planner.stream_story_plan(request.theme, request.duration)
+                        story_idea = await plan_stream.__anext__()
+                        scene_source["scenes"] = plan_stream
+                    else:
+                        plan = await self.story_planner.generate_story_plan(request.theme, request.duration)
+                        story_idea = plan.story_idea
+                        scene_source["scenes"] = plan.scenes
+                except Exception as e:
+                    print(f"Avertissement: plan en un appel échoué, génération en deux étapes: {e}")
+            
+            if story_idea is None:
+                story_idea = await self.idea_generator.generate_story_idea(request.theme, request.duration)
+            
+            # Valider l'idée pour les enfants
+            try:
+                if not await self.idea_generator.validate_idea(story_idea):
+                    raise Exception("L'idée générée n'est pas appropriée pour les enfants")
+            except BaseException:
+                await close_scene_source()
+                raise
+            
+            result.story_idea = story_idea
+            checkpoint()
+            return story_idea
+        
+        # Étape 2: Création des scènes (équivalent "Prompts AI Agent" dans n8n)
+        async def create_scenes(outputs: Dict[str, Any]) -> List[Scene]:
+            # Reprise: scènes complètes déjà écrites, clips terminés ou en cours conservés
+            # (des scènes incomplètes sont régénérées: aucun clip n'en dépend encore durablement)
+            previous_clips: Dict[int, VideoClip] = {}
+            source = scene_source.pop("scenes", None)
+            if result.scenes and len(result.scenes) == expected_clips:
+                resumed_nodes.add("scenes")
+                previous_clips = {clip.scene_number: clip for clip in result.video_clips or []}
+                if hasattr(source, "aclose"):
+                    await source.aclose()
+                source = list(result.scenes)
+            elif result.scenes:
+                result.provider_jobs = {}
+            if source is None:
+                if self.scene_streaming:
+                    source = self.scene_creator.stream_scenes_from_idea(outputs["idea"], request.duration)
+                else:
+                    source = await self.scene_creator.create_scenes_from_idea(outputs["idea"], request.duration)
+            
+            result.scenes = []
+            result.video_clips = []
+            
+            # Un nœud par clip, déclaré dès que sa scène est connue (il démarre aussitôt)
+            def add_scene(scene: Scene):
+                result.scenes.append(scene)
+                clip = previous_clips.get(scene.scene_number) or VideoClip(
+                    scene_number=scene.scene_number, video_url="", duration=scene.duration, status="pending"
+                )
+                result.video_clips.append(clip)
+                clip_nodes.append(f"clip_{scene.scene_number}")
+                graph.add_node(clip_nodes[-1], make_clip_node(len(clip_nodes) - 1, scene), deps=("idea",), optional=True)
+            
+            if isinstance(source, list):
+                for scene in source:
+                    add_scene(scene)
+            else:
+                # Flux fermé dans tous les cas (échec ou annulation en cours de lecture)
+                async with aclosing(source):
+                    async for scene in source:
+                        add_scene(scene)
+            scenes = result.scenes
+            checkpoint()
+            
+            graph.add_node("audio", generate_audio, deps=tuple(clip_nodes), wait_for=WAIT_ANY, optional=True)
+            graph.add_node("assembly", assemble, deps=tuple(clip_nodes) + ("audio",), wait_for=WAIT_SETTLED)
+            return scenes
+        
+        # Étape 3: Génération des clips vidéo (équivalent "Create Clips" -> "Get Clips" dans n8n)
+        def make_clip_node(index: int, scene: Scene):
+            name = f"clip_{scene.scene_number}"
+            
+            async def generate_clip(outputs: Dict[str, Any]) -> VideoClip:
+                if result.video_clips[index].status == "completed":
+                    # Reprise: clip terminé avant l'interruption
+                    resumed_nodes.add(name)
+                    return result.video_clips[index]
+                
+                # Concurrence bornée par le régulateur global Wavespeed
+                clip = await self.video_generator.generate_video_clip(
+                    scene, provider_job_id=provider_job(name), on_submitted=submitted(name), budget=clip_budget
+                )
+                result.video_clips[index] = clip
+                if clip.status != "completed":
+                    # Prédiction en échec: une reprise devra la resoumettre
+                    result.provider_jobs.pop(name, None)
+                    checkpoint()
+                    raise Exception(clip.status)
+                checkpoint()
+                return clip
+            return generate_clip
+        
+        # Étape 4: Génération audio dès le premier clip réussi (équivalent "Create Sounds" dans n8n)
+        async def generate_audio(outputs: Dict[str, Any]) -> Optional[AudioTrack]:
+            if result.audio_track is not None and result.audio_track.audio_url:
+                # Reprise: piste audio terminée avant l'interruption
+                resumed_nodes.add("audio")
+                return result.audio_track
+            
+            first_clips = [outputs[name] for name in clip_nodes if name in outputs]
+            try:
+                audio_track = await self.audio_generator.generate_audio_for_video(
+                    outputs["idea"], first_clips, request.duration,
+                    provider_job_id=provider_job("audio"), on_submitted=submitted("audio")
+                )
+            except Exception as e:
+                # Audio optionnel - continuer sans audio en cas d'échec
+                print(f"Avertissement: Échec génération audio: {e}")
+                audio_track = None
+            result.audio_track = audio_track
+            checkpoint()
+            return audio_track
+        
+        # Étape 5: Assemblage final (équivalent "Sequence Video" -> "Get Final Video" dans n8n)
+        async def assemble(outputs: Dict[str, Any]) -> str:
+            video_clips = result.video_clips
+            
+            # Vérifier qu'au moins un clip a été généré avec succès
+            if not any(clip.status == "completed" for clip in video_clips):
+                raise Exception("Aucun clip vidéo n'a pu être généré")
+            
+            try:
+                return await self.video_assembler.assemble_final_video(
+                    video_clips, result.audio_track,
+                    provider_job_id=provider_job("assembly"), on_submitted=submitted("assembly")
+                )
+            except Exception as e:
+                # Fallback: créer une séquence simple sans audio
+                print(f"Échec assemblage complet, essai séquence simple: {e}")
+                return await self.video_assembler.create_simple_sequence(video_clips)
+        
+        graph.add_node("idea", generate_idea)
+        graph.add_node("scenes", create_scenes, deps=("idea",))
+        return graph
+
+    def mark_interrupted(self, animation_id: str) -> bool:
+        """Marque une animation non terminée comme interrompue (reprise au prochain démarrage)"""
+        job = self.job_store.get_job(animation_id)
+        if not job or job["kind"] != "pipeline" or job["status"] in TERMINAL_STATUSES:
+            return False
+        result = {**(job["result"] or {}), "status": AnimationStatus.INTERRUPTED.value}
+        self.job_store.record_progress(animation_id, AnimationStatus.INTERRUPTED.value, result=result)
+        self.job_store.flush()
+        # Arrêt propre: reprise immédiate sans attendre l'expiration du bail
+        self.job_store.release_lease(animation_id)
+        return True
+
+    def claim_interrupted_animations(self) -> List[Tuple[str, AnimationRequest]]:
+        """Animations à reprendre (au démarrage, puis périodiquement)
+        
+        Interrompues par un arrêt, ou dont le bail n'est plus renouvelé (worker planté).
+        Une animation encore suivie par un worker vivant n'est jamais reprise. Chaque
+        animation est réclamée de façon atomique: un seul worker la reprend.
+        """
+        now = time.time()
+        stale_before = now - config.JOB_RESUME_STALE_AFTER
+        claimed = []
+        for status in AnimationStatus:
+            if status.value in TERMINAL_STATUSES:
+                continue
+            for job in self.job_store.list_jobs(status=status.value, kind="pipeline", limit=1000):
+                lease_expires_at = job.get("lease_expires_at")
+                if lease_expires_at is not None:
+                    if lease_expires_at > now:
+                        continue
+                elif status != AnimationStatus.INTERRUPTED and job["updated_at"] > stale_before:
+                    # Job sans bail (créé avant les baux): ancienne règle d'inactivité
+                    continue
+                try:
+                    request = AnimationRequest(
+                        theme=job["data"]["theme"],
+                        duration=job["data"]["duration"],
+                        priority=job["data"].get("priority", 5),
+                        coalesce=False
+                    )
+                except (KeyError, ValueError) as e:
+                    print(f"Avertissement: animation {job['job_id']} non reprise: {e}")
+                    continue
+                if self.job_store.claim_job(job["job_id"], job["status"], job["updated_at"],
+                                            AnimationStatus.PENDING.value):
+                    claimed.append((job["job_id"], request))
+        return claimed
 
     async def _update_progress(
         self, 
@@ -142,7 +512,10 @@ class AnimationPipeline:
         status: AnimationStatus, 
         percentage: int,
         current_step: str,
-        callback: Optional[Callable[[AnimationProgress], None]] = None
+        callback: Optional[Callable[[AnimationProgress], None]] = None,
+        details: Optional[Dict[str, Any]] = None,
+        result: Optional[AnimationResult] = None,
+        remaining_time: Optional[int] = None
     ):
         """Met à jour la progression et appelle le callback si fourni"""
         
@@ -150,43 +523,95 @@ class AnimationPipeline:
             animation_id=animation_id,
             status=status,
             progress_percentage=percentage,
-            current_step=current_step
+            current_step=current_step,
+            details=details
         )
         
-        # Estimer le temps restant
-        if status != AnimationStatus.COMPLETED and status != AnimationStatus.FAILED:
-            estimated_total_time = self.estimate_total_generation_time()
-            remaining_time = int(estimated_total_time * (100 - percentage) / 100)
+        # Estimer le temps restant (au prorata du total estimé si l'appelant ne le fournit pas)
+        if status not in (AnimationStatus.COMPLETED, AnimationStatus.FAILED, AnimationStatus.CANCELLED):
+            if remaining_time is None:
+                remaining_time = int(self.estimate_total_generation_time() * (100 - percentage) / 100)
             progress.estimated_remaining_time = remaining_time
         
+        # Écriture groupée dans le stockage (immédiate pour les statuts terminaux)
+        self.job_store.record_progress(
+            animation_id,
+            status.value,
+            progress=progress.model_dump(mode="json"),
+            result=result.model_dump(mode="json") if result else None
+        )
+        
+        # Diffusion aux clients connectés: delta de progression, puis résultat si terminé
+        self.progress_broadcaster.publish_progress(animation_id, progress.model_dump(mode="json"))
+        if status in (AnimationStatus.COMPLETED, AnimationStatus.FAILED, AnimationStatus.CANCELLED):
+            self.progress_broadcaster.publish(
+                animation_id, status.value, result.model_dump(mode="json") if result else {}
+            )
+        
         if callback:
             callback(progress)
 
-    def get_animation_status(self, animation_id: str) -> Optional[AnimationResult]:
-        """Récupère le statut d'une animation en cours"""
-        return self.active_animations.get(animation_id)
+    def get_animation_status(self, animation_id: str, job: Optional[Dict[str, Any]] = None) -> Optional[AnimationResult]:
+        """Récupère le statut d'une animation (depuis le stockage partagé, ou du job déjà lu)"""
+        job = job or self.job_store.get_job(animation_id)
+        if not job or job["kind"] != "pipeline" or not job["result"]:
+            return None
+        return AnimationResult(**job["result"])
 
-    def estimate_total_generation_time(self) -> int:
-        """Estime le temps total de génération en secondes"""
+    def get_animation_progress(self, animation_id: str, job: Optional[Dict[str, Any]] = None) -> Optional[AnimationProgress]:
+        """Récupère la dernière progression d'une animation encore en cours (ou du job déjà lu)"""
+        job = job or self.job_store.get_job(animation_id)
+        if not job or job["kind"] != "pipeline" or job["status"] in TERMINAL_STATUSES:
+            return None
+        if not job["progress"]:
+            return None
+        return AnimationProgress(**job["progress"])
+
+    def estimate_stage_time(self, stage: str, scene_count: int, clip_duration: int) -> float:
+        """Durée estimée d'une étape: apprise si assez d'observations, sinon valeur d'expérience"""
         
         # Basé sur l'expérience du workflow zseedance.json
-        idea_time = 30          # Génération d'idée: 30s
-        scenes_time = 45        # Création scènes: 45s
-        video_time = 300        # Génération vidéo: 5 minutes (le plus long)
-        audio_time = 90         # Génération audio: 1.5 minutes
-        assembly_time = 120     # Assemblage: 2 minutes
+        defaults = {
+            "idea": 30,         # Génération d'idée: 30s
+            "scenes": 45,       # Création scènes: 45s
+            "clip": 120,        # Un clip SeedANce: 2 minutes
+            "audio": 90,        # Génération audio: 1.5 minutes
+            "assembly": 120     # Assemblage: 2 minutes
+        }
+        return self.eta_estimator.estimate(stage, defaults[stage], scene_count, clip_duration)
+    
+    def estimate_total_generation_time(self, duration: int = None) -> int:
+        """Estime le temps total de génération en secondes"""
+        
+        scene_durations = self.scene_creator.calculate_scene_distribution(duration or config.DEFAULT_DURATION)
+        scene_count, clip_duration = len(scene_durations), scene_durations[0]
         
-        return idea_time + scenes_time + video_time + audio_time + assembly_time
+        # Durée totale observée pour ce format, sinon somme des étapes du chemin critique
+        learned = self.eta_estimator.estimate("animation", None, scene_count, clip_duration)
+        if learned is not None:
+            return int(learned)
+        
+        waves = math.ceil(scene_count / self.rate_limiter.max_concurrency("wavespeed"))
+        stage = lambda name: self.estimate_stage_time(name, scene_count, clip_duration)
+        clips = waves * stage("clip")
+        return int(stage("idea") + stage("scenes") + clips + max(stage("audio") - clips, 0) + stage("assembly"))
 
     async def validate_pipeline_health(self) -> Dict[str, Any]:
         """Valide que tous les services du pipeline sont opérationnels"""
         
         health_check = {
             "pipeline_operational": True,
+            "engine": self.engine,
             "services": {},
             "estimated_generation_time": self.estimate_total_generation_time()
         }
         
+        # Moteur simulé: aucun fournisseur appelé, aucune clé nécessaire
+        if self.engine != "real":
+            for name in ("idea_generator", "video_generator", "audio_generator", "video_assembler"):
+                health_check["services"][name] = {"status": "simulated", "engine": self.engine}
+            return health_check
+        
         # Tester OpenAI (vérification de clé seulement, pas d'appel API)
         try:
             # Vérification rapide des clés sans appel API
@@ -210,10 +635,17 @@ class AnimationPipeline:
             "model": config.FAL_AUDIO_MODEL
         }
         
-        health_check["services"]["video_assembler"] = {
-            "status": "configured" if config.FAL_API_KEY else "missing_api_key",
-            "model": config.FAL_FFMPEG_MODEL
-        }
+        if isinstance(self.video_assembler, LocalVideoAssembler):
+            health_check["services"]["video_assembler"] = {
+                "status": "configured" if self.video_assembler.is_available() else "missing_ffmpeg",
+                "backend": "local",
+                "max_processes": self.video_assembler.max_processes
+            }
+        else:
+            health_check["services"]["video_assembler"] = {
+                "status": "configured" if config.FAL_API_KEY else "missing_api_key",
+                "model": config.FAL_FFMPEG_MODEL
+            }
         
         return health_check
 
@@ -221,15 +653,8 @@ class AnimationPipeline:
         """Retourne les thèmes supportés avec leurs descriptions"""
         return self.idea_generator.get_theme_prompts()
 
-    def cleanup_old_animations(self, max_age_hours: int = 24):
-        """Nettoie les anciennes animations du cache"""
-        current_time = time.time()
-        
-        to_remove = []
-        for animation_id, result in self.active_animations.items():
-            creation_time = datetime.fromisoformat(result.created_at).timestamp()
-            if current_time - creation_time > (max_age_hours * 3600):
-                to_remove.append(animation_id)
-        
-        for animation_id in to_remove:
-            del self.active_animations[animation_id] 
\ No newline at end of file
+    def cleanup_old_animations(self, max_age_hours: int = 24) -> int:
+        """Supprime les anciennes animations terminées du stockage (et leurs rendus locaux)"""
+        if isinstance(self.video_assembler, LocalVideoAssembler):
+            self.video_assembler.cleanup_old_renders(max_age_hours)
+        return self.job_store.delete_jobs_older_than(max_age_hours * 3600)
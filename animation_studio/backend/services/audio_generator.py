@@ -1,37 +1,72 @@
 import asyncio
-import aiohttp
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 from config import config
 from models.schemas import StoryIdea, VideoClip, AudioTrack
+from .http_client import ProviderHttpClient, ProviderHTTPError, http_client as shared_http_client
+from .job_waiter import JobCompletionWaiter, completion_waiter as shared_completion_waiter
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter, retry_after
+from .endpoint_registry import ProviderEndpointRegistry, endpoint_registry as shared_endpoint_registry
+from .metrics import metrics
+from .eta_estimator import eta_estimator
 
 class AudioGenerator:
     """Service de génération audio via FAL AI (basé sur mmaudio-v2 du workflow zseedance.json)"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[ProviderHttpClient] = None,
+        completion_waiter: Optional[JobCompletionWaiter] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        endpoints: Optional[ProviderEndpointRegistry] = None
+    ):
         self.fal_api_key = config.FAL_API_KEY
         self.audio_model = config.FAL_AUDIO_MODEL
-        self.base_url = "https://queue.fal.run"
+        self.http_client = http_client or shared_http_client
+        self.completion_waiter = completion_waiter or shared_completion_waiter
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        # Variante d'URL FAL AI qui répond (disjoncteur sur les variantes en échec)
+        self.endpoints = endpoints or shared_endpoint_registry
     
-    async def generate_audio_for_video(self, story_idea: StoryIdea, video_clips: List[VideoClip], total_duration: int) -> AudioTrack:
-        """Génère une piste audio complète pour la vidéo"""
+    async def generate_audio_for_video(
+        self,
+        story_idea: StoryIdea,
+        video_clips: List[VideoClip],
+        total_duration: int,
+        provider_job_id: Optional[str] = None,
+        on_submitted: Optional[Callable[[str], None]] = None
+    ) -> AudioTrack:
+        """Génère une piste audio complète pour la vidéo
+        
+        provider_job_id reprend l'attente d'un job FAL AI déjà soumis (sans le resoumettre);
+        on_submitted reçoit l'identifiant d'un nouveau job dès sa soumission.
+        """
         
         # Adapter le prompt audio pour les enfants (basé sur zseedance.json mais modifié)
         audio_prompt = self.create_child_friendly_audio_prompt(story_idea)
         
         try:
-            # 1. Soumettre la requête de génération audio
-            audio_data = await self._submit_audio_generation(audio_prompt, total_duration, video_clips)
-            
-            if not audio_data or "request_id" not in audio_data:
-                raise Exception("Réponse invalide de l'API FAL AI")
-            
-            request_id = audio_data["request_id"]
-            
-            # 2. Attendre le traitement (équivalent du "Wait for Sounds" dans n8n)
-            await asyncio.sleep(min(total_duration * 3, 60))  # Attente adaptative
-            
-            # 3. Récupérer le résultat
-            result = await self._get_audio_result(request_id)
+            # Place réservée auprès du régulateur global pendant toute la durée du job
+            async with self.rate_limiter.acquire("fal_audio", self.audio_model):
+                # 1. Soumettre la requête de génération audio (sauf job repris)
+                request_id = provider_job_id
+                if request_id is None:
+                    audio_data = await self._submit_audio_generation(audio_prompt, total_duration, video_clips)
+                    
+                    if not audio_data or "request_id" not in audio_data:
+                        raise Exception("Réponse invalide de l'API FAL AI")
+                    
+                    request_id = audio_data["request_id"]
+                    if on_submitted:
+                        on_submitted(request_id)
+                
+                # 2. Attendre le traitement et récupérer le résultat (webhook ou polling adaptatif)
+                try:
+                    result = await self._get_audio_result(request_id)
+                except asyncio.CancelledError:
+                    # Animation annulée: abandonner aussi le job côté FAL AI (sauf arrêt du serveur)
+                    if self.completion_waiter.should_cancel_provider_job():
+                        self._cancel_audio_generation(request_id)
+                    raise
             
             if not result or "audio_url" not in result:
                 raise Exception("Erreur lors de la récupération de l'audio")
@@ -97,65 +132,90 @@ class AudioGenerator:
         if reference_video_url:
             audio_params["video_url"] = reference_video_url
         
-        url = f"{self.base_url}/{self.audio_model}"
+        return await self.endpoints.call("fal", lambda base_url: self._submit_to(base_url, audio_params))
+
+    async def _submit_to(self, base_url: str, audio_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Soumission sur une variante d'URL FAL AI"""
+        
+        url = self.completion_waiter.with_webhook(
+            f"{base_url}/{self.audio_model}", "fal", "fal_webhook"
+        )
         
         headers = {
             "Authorization": f"Key {self.fal_api_key}",
             "Content-Type": "application/json"
         }
         
-        async with aiohttp.ClientSession() as session:
+        with metrics.time(metrics.job_phase_duration, stage="audio", phase="submit"):
+            session = await self.http_client.get_session(url)
             async with session.post(url, json=audio_params, headers=headers) as response:
+                if response.status == 429:
+                    self.rate_limiter.throttle("fal_audio", self.audio_model, retry_after(response))
                 if response.status not in [200, 201]:
                     error_text = await response.text()
-                    raise Exception(f"Erreur API FAL AI {response.status}: {error_text}")
-                
+                    raise ProviderHTTPError(response.status, f"Erreur API FAL AI {response.status}: {error_text}")
+            
                 return await response.json()
 
+    def _cancel_audio_generation(self, request_id: str):
+        """Demande à FAL AI d'annuler une génération audio (sans attendre la réponse)"""
+        self.http_client.send_in_background(
+            "PUT",
+            f"{self.endpoints.preferred('fal')}/{self.audio_model}/requests/{request_id}/cancel",
+            headers={"Authorization": f"Key {self.fal_api_key}"}
+        )
+
     async def _get_audio_result(self, request_id: str) -> Dict[str, Any]:
         """Récupère le résultat d'une génération audio"""
         
-        url = f"{self.base_url}/{self.audio_model}/requests/{request_id}"
+        return await self.completion_waiter.wait_for(
+            "audio",
+            request_id,
+            lambda: self._check_audio_result(request_id),
+            timeout=config.AUDIO_JOB_TIMEOUT
+        )
+
+    async def _check_audio_result(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Interroge FAL AI une fois: résultat si terminé, None si encore en cours"""
+        
+        try:
+            return await self.endpoints.call("fal", lambda base_url: self._check_at(base_url, request_id))
+        except ProviderHTTPError as e:
+            # Erreur transitoire (ou disjoncteur ouvert): réessayer au prochain poll (timeout global)
+            print(f"Avertissement: récupération audio {e.status}: {e}")
+            return None
+
+    async def _check_at(self, base_url: str, request_id: str) -> Optional[Dict[str, Any]]:
+        """Poll sur une variante d'URL FAL AI"""
+        
+        url = f"{base_url}/{self.audio_model}/requests/{request_id}"
         
         headers = {
             "Authorization": f"Key {self.fal_api_key}"
         }
         
-        max_retries = 8
-        retry_delay = 10  # secondes
-        
-        for attempt in range(max_retries):
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Vérifier si la génération est terminée
-                        if result.get("status") == "completed":
-                            # Extraire l'URL audio du résultat
-                            if "outputs" in result and len(result["outputs"]) > 0:
-                                audio_url = result["outputs"][0]
-                                return {"audio_url": audio_url}
-                            else:
-                                raise Exception("Aucun fichier audio généré")
-                        
-                        elif result.get("status") == "failed":
-                            raise Exception(f"Génération audio échouée: {result.get('error', 'Erreur inconnue')}")
-                        
-                        # Si en cours, attendre et réessayer
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_delay)
-                            continue
-                    
+        session = await self.http_client.get_session(url)
+        async with session.get(url, headers=headers) as response:
+            if response.status == 200:
+                result = await response.json()
+                
+                # Vérifier si la génération est terminée
+                if result.get("status") == "completed":
+                    # Extraire l'URL audio du résultat
+                    if "outputs" in result and len(result["outputs"]) > 0:
+                        audio_url = result["outputs"][0]
+                        return {"audio_url": audio_url}
                     else:
-                        error_text = await response.text()
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Erreur lors de la récupération audio {response.status}: {error_text}")
-        
-        raise Exception("Timeout: La génération audio n'a pas abouti dans les temps")
+                        raise Exception("Aucun fichier audio généré")
+                
+                elif result.get("status") == "failed":
+                    raise Exception(f"Génération audio échouée: {result.get('error', 'Erreur inconnue')}")
+                
+                # Encore en cours
+                return None
+            
+            error_text = await response.text()
+            raise ProviderHTTPError(response.status, error_text)
 
     async def validate_audio_url(self, url: str) -> bool:
         """Valide qu'une URL audio est accessible"""
@@ -163,9 +223,9 @@ class AudioGenerator:
             return False
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.head(url) as response:
-                    return response.status == 200 and "audio" in response.headers.get("content-type", "")
+            session = await self.http_client.get_session(url)
+            async with session.head(url) as response:
+                return response.status == 200 and "audio" in response.headers.get("content-type", "")
         except:
             return False
 
@@ -175,4 +235,5 @@ class AudioGenerator:
         base_time = 60  # 1 minute de base
         duration_factor = duration * 2  # 2 secondes par seconde de vidéo
         
-        return base_time + duration_factor 
\ No newline at end of file
+        # Durée apprise sur les générations passées, si disponible
+        return int(eta_estimator.estimate("audio", base_time + duration_factor)) 
\ No newline at end of file
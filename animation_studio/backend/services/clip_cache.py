@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from config import config
+from .http_client import ProviderHttpClient, http_client as shared_http_client
+
+class ClipCache:
+    """Cache disque des clips vidéo, adressé par contenu, avec éviction LRU
+
+    La clé est un hash du modèle, du prompt optimisé, de la durée, du format et de la
+    résolution: une scène identique n'est jamais régénérée (ni payée) deux fois. Les
+    fichiers sont écrits dans un fichier temporaire puis renommés (écriture atomique).
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, directory: Path = None, max_size_gb: float = None, max_age_hours: float = None,
+                 http_client: Optional[ProviderHttpClient] = None):
+        self.directory = Path(directory or config.CACHE_DIR) / "clips"
+        self.max_size_bytes = int((max_size_gb if max_size_gb is not None else config.MAX_CACHE_SIZE_GB) * 1024 ** 3)
+        self.max_age_seconds = (max_age_hours if max_age_hours is not None else config.CACHE_CLEANUP_HOURS) * 3600
+        self.http_client = http_client or shared_http_client
+
+        # Index LRU en mémoire: clé -> taille en octets (le plus ancien en tête)
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._loaded = False
+        self._downloads: Dict[str, asyncio.Task] = {}
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, duration: int, aspect_ratio: str, resolution: str) -> str:
+        """Clé de cache d'un clip (sha256 des paramètres de génération)"""
+        payload = json.dumps([model, prompt, int(duration), aspect_ratio, resolution], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _video_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp4"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self._index.values())
+
+    def _scan_directory(self) -> List[Tuple[float, str, int]]:
+        """Clips présents sur disque: (date de modification, clé, taille), du plus ancien au plus récent"""
+        entries = []
+        if self.directory.exists():
+            for video_path in self.directory.glob("*/*.mp4"):
+                try:
+                    stat = video_path.stat()
+                except OSError:
+                    # Fichier supprimé entre le parcours et la lecture (éviction concurrente)
+                    continue
+                entries.append((stat.st_mtime, video_path.stem, stat.st_size))
+        entries.sort()
+        return entries
+
+    def _set_index(self, entries: List[Tuple[float, str, int]]):
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._loaded = True
+
+    def _load_index(self):
+        """Reconstruit l'index depuis le disque (ordre d'accès = date de modification)"""
+        if not self._loaded:
+            self._set_index(self._scan_directory())
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Métadonnées d'un clip en cache (None si absent)"""
+        self._load_index()
+        if key not in self._index:
+            self.misses += 1
+            return None
+
+        try:
+            metadata = json.loads(self._meta_path(key).read_text(encoding="utf-8"))
+            # Accès récent: sur disque pour les redémarrages (échoue si le clip a été évincé entre-temps)
+            os.utime(self._video_path(key))
+        except (OSError, ValueError):
+            # Entrée illisible ou supprimée: traitée comme absente, le clip sera régénéré
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        # Accès récent: en fin de liste LRU
+        self._index.move_to_end(key)
+        self.hits += 1
+        return metadata
+
+    def clip_url(self, key: str, metadata: Dict[str, Any]) -> str:
+        """URL à utiliser pour un clip en cache
+
+        Toujours servi par l'application (l'URL du fournisseur peut expirer): URL absolue
+        si une URL publique est configurée, sinon chemin relatif /cache/clips/...
+        """
+        relative = f"/cache/clips/{key[:2]}/{key}.mp4"
+        if config.PUBLIC_BASE_URL:
+            return f"{config.PUBLIC_BASE_URL.rstrip('/')}{relative}"
+        return relative
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Chemin local d'un clip en cache"""
+        path = self._video_path(key)
+        return path if key in self._index and path.exists() else None
+
+    def store_in_background(self, key: str, source_url: str, metadata: Dict[str, Any]):
+        """Télécharge et met en cache un clip sans bloquer le pipeline"""
+        if key in self._downloads:
+            return
+        task = asyncio.create_task(self.store(key, source_url, metadata))
+        self._downloads[key] = task
+        task.add_done_callback(lambda _: self._downloads.pop(key, None))
+
+    async def store(self, key: str, source_url: str, metadata: Dict[str, Any]) -> bool:
+        """Télécharge le clip puis l'écrit de manière atomique (fichier temporaire + rename)"""
+        self._load_index()
+        video_path = self._video_path(key)
+        meta_path = self._meta_path(key)
+        video_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_video = video_path.with_suffix(f".mp4.{os.getpid()}.tmp")
+        tmp_meta = meta_path.with_suffix(f".json.{os.getpid()}.tmp")
+
+        try:
+            size = 0
+            session = await self.http_client.get_session(source_url)
+            async with session.get(source_url) as response:
+                if response.status != 200:
+                    raise Exception(f"Téléchargement du clip impossible ({response.status})")
+                with open(tmp_video, "wb") as file:
+                    async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                        file.write(chunk)
+                        size += len(chunk)
+
+            entry = {**metadata, "key": key, "source_url": source_url, "size": size, "created_at": time.time()}
+            tmp_meta.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+
+            # Vidéo d'abord: une vidéo sans métadonnées est ignorée (puis supprimée) à la lecture
+            os.replace(tmp_video, video_path)
+            os.replace(tmp_meta, meta_path)
+        except Exception as e:
+            print(f"Avertissement: mise en cache du clip {key[:12]} échouée: {e}")
+            return False
+        finally:
+            # Fichiers temporaires restants (échec ou annulation)
+            for tmp in (tmp_video, tmp_meta):
+                tmp.unlink(missing_ok=True)
+
+        self._index[key] = size
+        self._index.move_to_end(key)
+        self.evict()
+        return True
+
+    def _delete_files(self, keys: List[str]):
+        for key in keys:
+            for path in (self._video_path(key), self._meta_path(key)):
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError as e:
+                    print(f"Avertissement: suppression du clip en cache {path} impossible: {e}")
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        self._delete_files([key])
+
+    def _pop_least_recently_used(self) -> List[str]:
+        """Retire de l'index les clips les moins récemment utilisés au-delà de la taille maximale"""
+        keys = []
+        total = self.size_bytes
+        while self._index and total > self.max_size_bytes:
+            key, size = self._index.popitem(last=False)
+            total -= size
+            keys.append(key)
+        return keys
+
+    def evict(self) -> int:
+        """Supprime les clips les moins récemment utilisés au-delà de la taille maximale"""
+        keys = self._pop_least_recently_used()
+        self._delete_files(keys)
+        return len(keys)
+
+    def _find_expired(self, keys: List[str], limit: float) -> List[str]:
+        expired = []
+        for key in keys:
+            try:
+                if self._video_path(key).stat().st_mtime < limit:
+                    expired.append(key)
+            except OSError:
+                expired.append(key)
+        return expired
+
+    async def cleanup(self) -> int:
+        """Supprime les clips inutilisés depuis CACHE_CLEANUP_HOURS puis applique la limite de taille
+
+        L'index n'est lu et modifié que sur la boucle d'événements (get et store y tournent);
+        seuls les accès disque (parcours, stat, suppressions) passent par un thread.
+        """
+        if not self._loaded:
+            entries = await asyncio.to_thread(self._scan_directory)
+            if not self._loaded:
+                self._set_index(entries)
+
+        limit = time.time() - self.max_age_seconds
+        expired = await asyncio.to_thread(self._find_expired, list(self._index), limit)
+        for key in expired:
+            self._index.pop(key, None)
+        removed = expired + self._pop_least_recently_used()
+        await asyncio.to_thread(self._delete_files, removed)
+        return len(removed)
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(3600)
+            try:
+                removed = await self.cleanup()
+                if removed:
+                    print(f"🧹 Cache clips: {removed} clip(s) supprimé(s)")
+            except Exception as e:
+                print(f"Avertissement: nettoyage du cache échoué: {e}")
+
+    async def start(self):
+        """Charge l'index et démarre le nettoyage périodique (appelé dans le lifespan)"""
+        await self.cleanup()
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def close(self):
+        """Arrête le nettoyage et abandonne les téléchargements en cours"""
+        tasks = list(self._downloads.values())
+        if self._cleanup_task is not None:
+            tasks.append(self._cleanup_task)
+            self._cleanup_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._index),
+            "size_mb": round(self.size_bytes / 1024 ** 2, 1),
+            "max_size_gb": round(self.max_size_bytes / 1024 ** 3, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "downloads_in_progress": len(self._downloads)
+        }
+
+# Instance globale partagée
+clip_cache = ClipCache()
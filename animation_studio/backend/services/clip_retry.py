@@ -0,0 +1,145 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config import config
+from .http_client import ProviderHTTPError
+from .job_waiter import JobCompletionWaiter, completion_waiter as shared_completion_waiter
+from .metrics import metrics
+
+# Une tentative: (prédiction à reprendre ou None, rappel appelé avec la prédiction soumise) -> résultat
+ClipAttempt = Callable[[Optional[str], Callable[[str], None]], Awaitable[Dict[str, Any]]]
+
+class ClipRetryBudget:
+    """Soumissions Wavespeed supplémentaires (relances + doublons) permises pour une animation"""
+
+    def __init__(self, extra_submissions: Optional[int] = None):
+        self.remaining = extra_submissions if extra_submissions is not None else config.CLIP_RETRY_BUDGET
+        self.spent = 0
+
+    def try_spend(self) -> bool:
+        """Réserve une soumission supplémentaire (False si le budget est épuisé)"""
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        self.spent += 1
+        return True
+
+class ClipRetryPolicy:
+    """Politique de génération d'un clip: relances et doublon contre la latence de queue
+
+    - erreur transitoire (429, 5xx, réseau, job échoué ou expiré): nouvelle soumission
+      après un backoff exponentiel avec jitter, jusqu'à CLIP_MAX_ATTEMPTS tentatives;
+    - clip plus lent que le quantile CLIP_HEDGE_QUANTILE des jobs observés (option
+      CLIP_HEDGE_ENABLED): une soumission en double est lancée, la première réussie
+      est gardée et l'autre abandonnée (sa place fournisseur est libérée);
+    - chaque soumission supplémentaire consomme le budget de l'animation.
+    """
+
+    def __init__(self, completion_waiter: Optional[JobCompletionWaiter] = None):
+        self.completion_waiter = completion_waiter or shared_completion_waiter
+        self.max_attempts = max(1, config.CLIP_MAX_ATTEMPTS)
+        self.base_delay = config.CLIP_RETRY_BASE_DELAY
+        self.max_delay = config.CLIP_RETRY_MAX_DELAY
+        self.hedge_enabled = config.CLIP_HEDGE_ENABLED
+        self.hedge_quantile = config.CLIP_HEDGE_QUANTILE
+        self.hedge_min_delay = config.CLIP_HEDGE_MIN_DELAY
+
+    @staticmethod
+    def is_transient(error: BaseException) -> bool:
+        """Une nouvelle soumission a des chances d'aboutir (pas une requête refusée)"""
+        if isinstance(error, ProviderHTTPError):
+            return error.status == 429 or error.status >= 500
+        # Réseau, réponse invalide, job échoué ou expiré côté fournisseur
+        return True
+
+    def backoff(self, attempt: int) -> float:
+        """Délai avant la tentative suivante (backoff exponentiel, jitter entre 50 et 100%)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Durée après la soumission au-delà de laquelle un doublon est lancé (None: jamais)"""
+        if not self.hedge_enabled:
+            return None
+        threshold = self.completion_waiter.duration_quantile("video", self.hedge_quantile)
+        if threshold is None:
+            # Pas encore assez de jobs observés pour situer la queue de distribution
+            return None
+        return max(threshold, self.hedge_min_delay)
+
+    async def run(self, attempt: ClipAttempt, provider_job_id: Optional[str] = None,
+                  budget: Optional[ClipRetryBudget] = None,
+                  on_submitted: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Exécute les tentatives d'un clip (la première reprend provider_job_id s'il est fourni)
+
+        on_submitted reçoit la prédiction qui porte le clip: celle de chaque nouvelle
+        tentative dès sa soumission, celle d'un doublon seulement s'il l'emporte.
+        """
+        budget = budget or ClipRetryBudget()
+        attempt_number = 1
+        while True:
+            try:
+                return await self._hedged(attempt, provider_job_id, budget, on_submitted)
+            except Exception as e:
+                if attempt_number >= self.max_attempts or not self.is_transient(e) or not budget.try_spend():
+                    raise
+                delay = self.backoff(attempt_number)
+                print(f"Avertissement: clip en échec ({e}), tentative {attempt_number + 1} dans {delay:.1f}s")
+                metrics.clip_extra_submissions.inc(kind="retry")
+                await asyncio.sleep(delay)
+                attempt_number += 1
+                provider_job_id = None
+
+    async def _hedged(self, attempt: ClipAttempt, provider_job_id: Optional[str],
+                      budget: ClipRetryBudget, on_submitted: Optional[Callable[[str], None]]) -> Dict[str, Any]:
+        """Une tentative, doublée si elle dépasse le seuil de latence"""
+        submitted = asyncio.Event()
+        hedge_prediction_id: Optional[str] = None
+
+        def primary_submitted(prediction_id: str):
+            submitted.set()
+            # Enregistrée aussitôt: une reprise après redémarrage attendra cette prédiction
+            if on_submitted and prediction_id != provider_job_id:
+                on_submitted(prediction_id)
+
+        def hedge_submitted(prediction_id: str):
+            nonlocal hedge_prediction_id
+            hedge_prediction_id = prediction_id
+
+        primary = asyncio.create_task(attempt(provider_job_id, primary_submitted))
+        pending = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                # Le délai court depuis la soumission (l'attente d'une place n'est pas de la latence)
+                submission = asyncio.create_task(submitted.wait())
+                try:
+                    await asyncio.wait({primary, submission}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    submission.cancel()
+                if not primary.done():
+                    done, _ = await asyncio.wait({primary}, timeout=delay)
+                    if not done and budget.try_spend():
+                        print(f"Avertissement: clip plus lent que {delay:.0f}s, soumission en double")
+                        metrics.clip_extra_submissions.inc(kind="hedge")
+                        pending.add(asyncio.create_task(attempt(None, hedge_submitted)))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            metrics.clip_extra_submissions.inc(kind="hedge_won")
+                            # Le doublon l'emporte: sa prédiction remplace celle de la tentative principale
+                            if on_submitted and hedge_prediction_id:
+                                on_submitted(hedge_prediction_id)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Tentative perdante (ou animation annulée): abandonnée, sa place est libérée
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+import aiohttp
+from config import config
+from .http_client import ProviderHTTPError
+from .metrics import metrics
+
+T = TypeVar("T")
+
+class CircuitBreaker:
+    """Disjoncteur d'un endpoint: fermé, ouvert ou semi-ouvert
+
+    Fermé: les requêtes passent et leurs résultats alimentent une fenêtre glissante.
+    Ouvert: trop d'échecs dans la fenêtre, l'endpoint n'est plus sollicité pendant le
+    délai de refroidissement. Semi-ouvert: une seule requête d'essai passe; son succès
+    referme le disjoncteur, son échec le rouvre pour un nouveau délai.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: float, min_failures: int, failure_ratio: float, cooldown: float):
+        self.window = window
+        self.min_failures = min_failures
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+        # Résultats récents: (timestamp, succès)
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    def _prune(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def allow(self) -> bool:
+        """Autorise une requête (en semi-ouvert: une seule requête d'essai à la fois)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = self.HALF_OPEN
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record(self, success: bool) -> Optional[str]:
+        """Enregistre le résultat d'une requête autorisée (retourne le nouvel état s'il change)"""
+        now = time.monotonic()
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+            if success:
+                self._outcomes.clear()
+                self.state = self.CLOSED
+            else:
+                self.state = self.OPEN
+                self.opened_at = now
+            return self.state
+
+        self._outcomes.append((now, success))
+        self._prune(now)
+        if success or self.state != self.CLOSED:
+            return None
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        if failures >= self.min_failures and failures / len(self._outcomes) >= self.failure_ratio:
+            self.state = self.OPEN
+            self.opened_at = now
+            return self.state
+        return None
+
+    def release(self):
+        """Requête d'essai abandonnée sans résultat (annulation): un autre essai pourra partir"""
+        self._probing = False
+
+class ProviderEndpointRegistry:
+    """Variantes d'URL de chaque fournisseur, avec mémorisation de celle qui répond
+
+    Chaque service fournisseur passe par `call`: la dernière variante ayant répondu est
+    essayée en premier, les suivantes seulement si elle tombe. Chaque variante a son
+    disjoncteur: un endpoint mort coûte un essai par délai de refroidissement, pas une
+    requête par clip et par poll. Seuls les échecs d'endpoint (réseau, timeout, 404/405,
+    5xx) comptent; un 4xx métier (clé invalide, quota, requête refusée) est propagé tel quel.
+    """
+
+    def __init__(self):
+        self.window = config.CIRCUIT_WINDOW_SECONDS
+        self.min_failures = config.CIRCUIT_MIN_FAILURES
+        self.failure_ratio = config.CIRCUIT_FAILURE_RATIO
+        self.cooldown = config.CIRCUIT_COOLDOWN_SECONDS
+
+        # Nom logique -> variantes (URL de base ou modèle d'URL) dans l'ordre de préférence initial
+        self._variants: Dict[str, List[str]] = {}
+        # Nom logique -> dernière variante ayant répondu
+        self._preferred: Dict[str, str] = {}
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+        self.register("wavespeed", [config.WAVESPEED_BASE_URL] + self._parse(config.WAVESPEED_BASE_URL_FALLBACKS))
+        self.register("fal", [config.FAL_QUEUE_BASE_URL] + self._parse(config.FAL_QUEUE_BASE_URL_FALLBACKS))
+
+    @staticmethod
+    def _parse(value: str) -> List[str]:
+        return [url.strip() for url in value.split(",") if url.strip()]
+
+    def register(self, name: str, variants: Sequence[str]):
+        """Déclare les variantes d'un endpoint (l'état des disjoncteurs connus est conservé)"""
+        unique = list(dict.fromkeys(variants))
+        if not unique:
+            raise ValueError(f"Aucune variante d'endpoint pour {name}")
+        self._variants[name] = unique
+        for variant in unique:
+            self._breakers.setdefault((name, variant), CircuitBreaker(
+                self.window, self.min_failures, self.failure_ratio, self.cooldown
+            ))
+        if self._preferred.get(name) not in unique:
+            self._preferred.pop(name, None)
+
+    def preferred(self, name: str) -> str:
+        """Variante à utiliser hors `call` (dernière ayant répondu, sinon la première déclarée)"""
+        return self._preferred.get(name) or self._variants[name][0]
+
+    def candidates(self, name: str) -> List[str]:
+        """Variantes dans l'ordre d'essai: la dernière ayant répondu d'abord"""
+        variants = self._variants[name]
+        preferred = self._preferred.get(name)
+        if preferred is None:
+            return list(variants)
+        return [preferred] + [v for v in variants if v != preferred]
+
+    @staticmethod
+    def is_endpoint_failure(error: BaseException) -> bool:
+        """L'échec met en cause l'endpoint lui-même (et non la requête envoyée)"""
+        if isinstance(error, ProviderHTTPError):
+            return error.status in (404, 405, 408) or error.status >= 500
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, OSError))
+
+    def _record(self, name: str, variant: str, success: bool):
+        state = self._breakers[(name, variant)].record(success)
+        if state is not None:
+            metrics.circuit_transitions.inc(endpoint=name, state=state)
+            if state == CircuitBreaker.OPEN:
+                print(f"Avertissement: endpoint {name} ({variant}) en échec, mis de côté {self.cooldown:.0f}s")
+        if success:
+            self._preferred[name] = variant
+
+    async def call(self, name: str, request: Callable[[str], Awaitable[T]]) -> T:
+        """Exécute request(variante) sur la première variante disponible qui répond"""
+        last_error: Optional[BaseException] = None
+        for variant in self.candidates(name):
+            breaker = self._breakers[(name, variant)]
+            if not breaker.allow():
+                continue
+            try:
+                result = await request(variant)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                if not self.is_endpoint_failure(e):
+                    # L'endpoint a répondu: l'erreur concerne la requête, inutile d'essayer ailleurs
+                    self._record(name, variant, True)
+                    raise
+                self._record(name, variant, False)
+                last_error = e
+                continue
+            self._record(name, variant, True)
+            return result
+
+        if last_error is not None:
+            raise last_error
+        # Tous les disjoncteurs sont ouverts: échec immédiat, sans requête (erreur transitoire)
+        raise ProviderHTTPError(503, f"Aucun endpoint {name} disponible (disjoncteur ouvert)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """État des disjoncteurs par endpoint"""
+        return {
+            name: {
+                "preferred": self.preferred(name),
+                "variants": {variant: self._breakers[(name, variant)].state for variant in variants}
+            }
+            for name, variants in self._variants.items()
+        }
+
+# Instance globale partagée par tous les services
+endpoint_registry = ProviderEndpointRegistry()
@@ -0,0 +1,197 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+from config import config
+from models.schemas import StoryIdea, Scene, StoryPlan, VideoClip, AudioTrack, AnimationTheme
+from .idea_generator import IdeaGenerator
+from .scene_creator import SceneCreator
+from .story_planner import StoryPlanner
+from .video_generator import VideoGenerator
+from .clip_retry import ClipRetryBudget
+from .audio_generator import AudioGenerator
+from .video_assembler import create_video_assembler
+from .http_client import ProviderHttpClient
+from .job_waiter import JobCompletionWaiter
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter
+
+PIPELINE_ENGINES = ("real", "demo", "debug")
+
+# Durées simulées (secondes) par type d'appel fournisseur
+SIMULATED_DELAYS = {
+    "demo": {"text": 2.0, "clip": 8.0, "audio": 4.0, "assembly": 4.0},
+    "debug": {"text": 0.5, "clip": 1.0, "audio": 0.5, "assembly": 0.5},
+}
+
+class SimulatedProvider:
+    """Fournisseur simulé: attend une durée fixe au lieu d'appeler l'API
+
+    Les services simulés gardent l'interface des services réels, donc le pipeline,
+    la file de génération, la progression et les métriques restent identiques
+    (sans job distant, une étape reprise après redémarrage est simplement rejouée).
+    """
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.delays = {
+            stage: delay * config.SIMULATED_DELAY_SCALE
+            for stage, delay in SIMULATED_DELAYS[engine].items()
+        }
+        self.verbose = engine == "debug"
+
+    async def simulate(self, stage: str, message: str):
+        if self.verbose:
+            print(f"🔧 DEBUG: {message} ({self.delays[stage]:.1f}s simulées)")
+        await asyncio.sleep(self.delays[stage])
+
+class SimulatedIdeaGenerator(IdeaGenerator):
+    """Idée d'histoire générée à partir des données du thème, sans OpenAI"""
+
+    def __init__(self, engine: str, rate_limiter: Optional[ProviderRateLimiter] = None):
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.provider = SimulatedProvider(engine)
+
+    async def generate_story_idea(self, theme: AnimationTheme, duration: int) -> StoryIdea:
+        await self.provider.simulate("text", f"idée {theme.value} / {duration}s")
+        return self.create_fallback_idea(theme, duration)
+
+class SimulatedSceneCreator(SceneCreator):
+    """Scènes génériques (scènes de fallback), sans OpenAI"""
+
+    def __init__(self, engine: str, rate_limiter: Optional[ProviderRateLimiter] = None):
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.provider = SimulatedProvider(engine)
+
+    async def create_scenes_from_idea(self, story_idea: StoryIdea, duration: int) -> List[Scene]:
+        scene_durations = self.calculate_scene_distribution(duration)
+        await self.provider.simulate("text", f"{len(scene_durations)} scènes")
+        return self.create_fallback_scenes(story_idea, scene_durations)
+
+    async def stream_scenes_from_idea(self, story_idea: StoryIdea, duration: int) -> AsyncIterator[Scene]:
+        scenes = self.create_fallback_scenes(story_idea, self.calculate_scene_distribution(duration))
+        for scene in scenes:
+            await self.provider.simulate("text", f"scène {scene.scene_number}/{len(scenes)}")
+            yield scene
+
+class SimulatedStoryPlanner(StoryPlanner):
+    """Plan d'histoire (idée + scènes) simulé en un appel"""
+
+    def __init__(self, idea_generator: SimulatedIdeaGenerator, scene_creator: SimulatedSceneCreator,
+                 rate_limiter: Optional[ProviderRateLimiter] = None):
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.idea_generator = idea_generator
+        self.scene_creator = scene_creator
+
+    async def generate_story_plan(self, theme: AnimationTheme, duration: int) -> StoryPlan:
+        story_idea = await self.idea_generator.generate_story_idea(theme, duration)
+        scenes = self.scene_creator.create_fallback_scenes(
+            story_idea, self.scene_creator.calculate_scene_distribution(duration)
+        )
+        return StoryPlan(story_idea=story_idea, scenes=scenes)
+
+    async def stream_story_plan(self, theme: AnimationTheme, duration: int) -> AsyncIterator[Union[StoryIdea, Scene]]:
+        story_idea = await self.idea_generator.generate_story_idea(theme, duration)
+        yield story_idea
+        async for scene in self.scene_creator.stream_scenes_from_idea(story_idea, duration):
+            yield scene
+
+class SimulatedVideoGenerator(VideoGenerator):
+    """Clips simulés: vidéo d'exemple après la durée simulée d'un job Wavespeed
+
+    Les places Wavespeed du régulateur sont prises comme pour un vrai job, pour que
+    la concurrence observée en démo soit celle de la production.
+    """
+
+    def __init__(self, engine: str, rate_limiter: Optional[ProviderRateLimiter] = None):
+        self.model = f"simulated:{engine}"
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.provider = SimulatedProvider(engine)
+
+    async def generate_video_clip(self, scene: Scene, provider_job_id: Optional[str] = None,
+                                  on_submitted: Optional[Callable[[str], None]] = None,
+                                  budget: Optional[ClipRetryBudget] = None) -> VideoClip:
+        async with self.rate_limiter.acquire("wavespeed", config.WAVESPEED_MODEL):
+            await self.provider.simulate("clip", f"clip {scene.scene_number} ({scene.duration}s)")
+        return VideoClip(
+            scene_number=scene.scene_number,
+            video_url=config.SIMULATED_VIDEO_URL,
+            duration=scene.duration,
+            status="completed"
+        )
+
+class SimulatedAudioGenerator(AudioGenerator):
+    """Bande sonore simulée (sans URL: l'assemblage simulé l'ignore)"""
+
+    def __init__(self, engine: str, rate_limiter: Optional[ProviderRateLimiter] = None):
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.provider = SimulatedProvider(engine)
+
+    async def generate_audio_for_video(self, story_idea: StoryIdea, video_clips: List[VideoClip], total_duration: int,
+                                       provider_job_id: Optional[str] = None,
+                                       on_submitted: Optional[Callable[[str], None]] = None) -> AudioTrack:
+        async with self.rate_limiter.acquire("fal_audio", config.FAL_AUDIO_MODEL):
+            await self.provider.simulate("audio", f"audio {int(total_duration)}s")
+        return AudioTrack(
+            audio_url="",
+            duration=total_duration,
+            description=self.create_child_friendly_audio_prompt(story_idea)
+        )
+
+class SimulatedVideoAssembler:
+    """Assemblage simulé: la vidéo d'exemple tient lieu de vidéo finale"""
+
+    def __init__(self, engine: str, rate_limiter: Optional[ProviderRateLimiter] = None):
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.provider = SimulatedProvider(engine)
+
+    async def assemble_final_video(self, video_clips: List[VideoClip], audio_track: AudioTrack = None,
+                                   provider_job_id: Optional[str] = None,
+                                   on_submitted: Optional[Callable[[str], None]] = None) -> str:
+        async with self.rate_limiter.acquire("fal_ffmpeg", config.FAL_FFMPEG_MODEL):
+            await self.provider.simulate("assembly", f"assemblage de {len(video_clips)} clips")
+        return config.SIMULATED_VIDEO_URL
+
+    async def create_simple_sequence(self, video_clips: List[VideoClip]) -> str:
+        return await self.assemble_final_video(video_clips)
+
+    def estimate_assembly_time(self, video_clips: List[VideoClip]) -> int:
+        return int(self.provider.delays["assembly"])
+
+def create_provider_services(
+    engine: str = None,
+    http_client: Optional[ProviderHttpClient] = None,
+    completion_waiter: Optional[JobCompletionWaiter] = None,
+    rate_limiter: Optional[ProviderRateLimiter] = None
+) -> Dict[str, Any]:
+    """Crée les services fournisseurs du moteur configuré (PIPELINE_ENGINE: real, demo ou debug)"""
+    engine = (engine or config.PIPELINE_ENGINE).lower()
+    rate_limiter = rate_limiter or shared_rate_limiter
+
+    if engine == "real":
+        provider_deps = {
+            "http_client": http_client,
+            "completion_waiter": completion_waiter,
+            "rate_limiter": rate_limiter
+        }
+        idea_generator = IdeaGenerator(rate_limiter=rate_limiter)
+        scene_creator = SceneCreator(rate_limiter=rate_limiter)
+        return {
+            "idea_generator": idea_generator,
+            "scene_creator": scene_creator,
+            "story_planner": StoryPlanner(idea_generator, scene_creator, rate_limiter),
+            "video_generator": VideoGenerator(**provider_deps),
+            "audio_generator": AudioGenerator(**provider_deps),
+            "video_assembler": create_video_assembler(**provider_deps)
+        }
+
+    if engine in SIMULATED_DELAYS:
+        idea_generator = SimulatedIdeaGenerator(engine, rate_limiter)
+        scene_creator = SimulatedSceneCreator(engine, rate_limiter)
+        return {
+            "idea_generator": idea_generator,
+            "scene_creator": scene_creator,
+            "story_planner": SimulatedStoryPlanner(idea_generator, scene_creator, rate_limiter),
+            "video_generator": SimulatedVideoGenerator(engine, rate_limiter),
+            "audio_generator": SimulatedAudioGenerator(engine, rate_limiter),
+            "video_assembler": SimulatedVideoAssembler(engine, rate_limiter)
+        }
+
+    raise ValueError(f"Moteur de pipeline inconnu: {engine} (attendu: {', '.join(PIPELINE_ENGINES)})")
@@ -0,0 +1,181 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from config import config
+
+class P2Quantile:
+    """Quantile en flux par l'algorithme P² (Jain & Chlamtac)
+
+    Cinq marqueurs seulement, mis à jour en O(1) par observation: aucune
+    durée n'est conservée.
+    """
+
+    def __init__(self, q: float):
+        self.q = q
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value: float):
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Cellule de la nouvelle observation (les extrêmes suivent le min/max)
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(1, 5) if value < heights[i]) - 1
+
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Ajustement des marqueurs centraux (interpolation parabolique, sinon linéaire)
+        positions = self.positions
+        for i in range(1, 4):
+            delta = self.desired[i] - positions[i]
+            if (delta >= 1 and positions[i + 1] - positions[i] > 1) or (delta <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if delta > 0 else -1
+                candidate = heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+                    (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i])
+                    + (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1]) / (positions[i] - positions[i - 1])
+                )
+                if not heights[i - 1] < candidate < heights[i + 1]:
+                    candidate = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = candidate
+                positions[i] += step
+
+    def value(self) -> Optional[float]:
+        if not self.count:
+            return None
+        if self.count <= 5:
+            # Peu d'observations: quantile exact (rang le plus proche)
+            return self.heights[min(len(self.heights) - 1, int(self.q * len(self.heights)))]
+        return self.heights[2]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"q": self.q, "count": self.count, "heights": self.heights,
+                "positions": self.positions, "desired": self.desired}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "P2Quantile":
+        sketch = cls(data["q"])
+        sketch.count = data["count"]
+        sketch.heights = list(data["heights"])
+        sketch.positions = list(data["positions"])
+        sketch.desired = list(data["desired"])
+        return sketch
+
+class EtaEstimator:
+    """Estimation des durées d'étapes apprise sur les générations passées
+
+    Chaque étape terminée alimente deux quantiles (médiane et p90) par compartiment
+    étape + fournisseur/modèle + nombre de scènes + durée de clip, ainsi qu'un
+    compartiment plus large (étape + fournisseur) utilisé tant que le compartiment
+    précis manque d'observations. Sans données, les estimations codées en dur des
+    services servent de valeur par défaut.
+    """
+
+    QUANTILES = (0.5, 0.9)
+
+    def __init__(self, path: Optional[Path] = None, min_samples: Optional[int] = None):
+        self.path = Path(path or Path(config.CACHE_DIR) / "eta_model.json")
+        self.min_samples = min_samples if min_samples is not None else config.ETA_MIN_SAMPLES
+        self.quantile = config.ETA_QUANTILE
+        self._sketches: Dict[str, Dict[float, P2Quantile]] = {}
+
+    @staticmethod
+    def provider_for(stage: str) -> str:
+        """Fournisseur/modèle qui détermine la durée d'une étape"""
+        if config.PIPELINE_ENGINE != "real":
+            # Durées simulées: ne pas fausser les estimations des vrais fournisseurs
+            return f"simulated:{config.PIPELINE_ENGINE}"
+        if stage in ("idea", "scenes"):
+            return f"openai:{config.TEXT_MODEL}:{config.STORY_PLAN_MODE}"
+        if stage == "clip":
+            return f"wavespeed:{config.WAVESPEED_MODEL}"
+        if stage == "audio":
+            return f"fal:{config.FAL_AUDIO_MODEL}"
+        if stage == "assembly":
+            return "local:ffmpeg" if config.ASSEMBLY_BACKEND == "local" else f"fal:{config.FAL_FFMPEG_MODEL}"
+        if stage == "animation":
+            return f"pipeline:{config.STORY_PLAN_MODE}"
+        return stage
+
+    def _keys(self, stage: str, scene_count: int, clip_duration: int) -> List[str]:
+        """Compartiments du plus précis au plus large"""
+        coarse = f"{stage}|{self.provider_for(stage)}"
+        if not scene_count:
+            return [coarse]
+        return [f"{coarse}|{scene_count}x{clip_duration}", coarse]
+
+    def record(self, stage: str, seconds: float, scene_count: int = 0, clip_duration: int = 0):
+        """Enregistre la durée observée d'une étape terminée"""
+        for key in self._keys(stage, scene_count, clip_duration):
+            sketches = self._sketches.get(key)
+            if sketches is None:
+                sketches = self._sketches[key] = {q: P2Quantile(q) for q in self.QUANTILES}
+            for sketch in sketches.values():
+                sketch.add(seconds)
+
+    def estimate(self, stage: str, default: Optional[float], scene_count: int = 0, clip_duration: int = 0,
+                 quantile: Optional[float] = None) -> Optional[float]:
+        """Durée estimée d'une étape (default tant que les observations sont insuffisantes)"""
+        quantile = quantile or self.quantile
+        for key in self._keys(stage, scene_count, clip_duration):
+            sketch = self._sketches.get(key, {}).get(quantile)
+            if sketch is not None and sketch.count >= self.min_samples:
+                return sketch.value()
+        return default
+
+    def load(self):
+        """Recharge le modèle sauvegardé (appelé au démarrage)"""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Avertissement: modèle ETA illisible, ignoré: {e}")
+            return
+        self._sketches = {
+            key: {float(q): P2Quantile.from_dict(sketch) for q, sketch in sketches.items()}
+            for key, sketches in data.items()
+        }
+
+    def save(self):
+        """Sauvegarde le modèle (écriture atomique, appelé à l'arrêt)"""
+        data = {
+            key: {str(q): sketch.to_dict() for q, sketch in sketches.items()}
+            for key, sketches in self._sketches.items()
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".json.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Avertissement: sauvegarde du modèle ETA échouée: {e}")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {
+                "count": sketches[self.QUANTILES[0]].count,
+                **{f"p{int(q * 100)}": round(sketch.value() or 0, 1) for q, sketch in sketches.items()}
+            }
+            for key, sketches in self._sketches.items()
+        }
+
+# Instance globale partagée
+eta_estimator = EtaEstimator()
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import aiohttp
+from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
+from config import config
+from .metrics import metrics
+
+class ProviderHTTPError(Exception):
+    """Réponse HTTP en erreur d'un fournisseur (statut conservé pour décider d'une relance)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ProviderHttpClient:
+    """Client HTTP mutualisé pour les fournisseurs (Wavespeed, FAL AI, ...)
+
+    Une session aiohttp par hôte, ouverte pour toute la durée de vie de l'application,
+    afin de réutiliser les connexions TCP/TLS entre les soumissions et les polls.
+    """
+
+    def __init__(self):
+        self.limit = config.HTTP_POOL_LIMIT
+        self.limit_per_host = config.HTTP_POOL_LIMIT_PER_HOST
+        self.keepalive_timeout = config.HTTP_KEEPALIVE_SECONDS
+        self.dns_cache_ttl = config.HTTP_DNS_CACHE_SECONDS
+        self.timeout = aiohttp.ClientTimeout(
+            total=config.HTTP_TIMEOUT_SECONDS,
+            connect=config.HTTP_CONNECT_TIMEOUT_SECONDS
+        )
+
+        # Sessions indexées par hôte (scheme://host:port)
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._lock = asyncio.Lock()
+        # Requêtes envoyées sans attendre leur réponse (annulations côté fournisseur)
+        self._background: Set[asyncio.Task] = set()
+        
+        # Nom du fournisseur par hôte (étiquette des métriques de latence)
+        self._providers = {
+            self._host_key(config.WAVESPEED_BASE_URL): "wavespeed",
+            self._host_key(config.FAL_QUEUE_BASE_URL): "fal"
+        }
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        """Clé de session pour une URL (scheme + hôte + port)"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _trace_config(self, provider: str) -> aiohttp.TraceConfig:
+        """Mesure la latence et le code de retour de chaque requête de la session"""
+        async def on_request_start(session, context, params):
+            context.start = time.perf_counter()
+        
+        async def on_request_end(session, context, params):
+            metrics.http_duration.observe(
+                time.perf_counter() - context.start,
+                provider=provider, method=params.method, status=params.response.status
+            )
+        
+        async def on_request_exception(session, context, params):
+            metrics.http_duration.observe(
+                time.perf_counter() - context.start,
+                provider=provider, method=params.method, status="error"
+            )
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+    def _create_session(self, key: str) -> aiohttp.ClientSession:
+        """Crée une session avec un connecteur configuré (keep-alive, cache DNS)"""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True
+        )
+        provider = self._providers.get(key, urlsplit(key).hostname or key)
+        return aiohttp.ClientSession(
+            connector=connector, timeout=self.timeout, trace_configs=[self._trace_config(provider)]
+        )
+
+    async def start(self, base_urls: Optional[list] = None):
+        """Ouvre à l'avance les sessions des hôtes connus (appelé dans le lifespan)"""
+        for url in base_urls or []:
+            await self.get_session(url)
+
+    async def get_session(self, url: str) -> aiohttp.ClientSession:
+        """Retourne la session partagée pour l'hôte de l'URL (créée si nécessaire)"""
+        key = self._host_key(url)
+        session = self._sessions.get(key)
+        if session is not None and not session.closed:
+            return session
+
+        async with self._lock:
+            session = self._sessions.get(key)
+            if session is None or session.closed:
+                session = self._create_session(key)
+                self._sessions[key] = session
+            return session
+
+    def send_in_background(self, method: str, url: str, headers: Optional[Dict[str, str]] = None):
+        """Envoie une requête sans bloquer l'appelant (réponse ignorée, échec journalisé)"""
+        async def send():
+            try:
+                session = await self.get_session(url)
+                async with session.request(method, url, headers=headers) as response:
+                    if response.status >= 400:
+                        print(f"Avertissement: {method} {url} -> {response.status}")
+            except Exception as e:
+                print(f"Avertissement: {method} {url} échoué: {e}")
+        
+        task = asyncio.create_task(send())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def close(self):
+        """Ferme toutes les sessions (appelé à l'arrêt de l'application)"""
+        # Laisser partir les annulations en cours avant de fermer les sessions
+        if self._background:
+            await asyncio.wait(list(self._background), timeout=5)
+        
+        async with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Statistiques simples sur les sessions ouvertes"""
+        return {
+            "open_sessions": sum(1 for session in self._sessions.values() if not session.closed),
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host
+        }
+
+# Instance globale partagée par tous les services
+http_client = ProviderHttpClient()
@@ -1,15 +1,17 @@
 import json
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from openai import AsyncOpenAI
 from config import config
 from models.schemas import StoryIdea, AnimationTheme
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter
 
 class IdeaGenerator:
     """Service de génération d'idées d'histoires pour enfants"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[ProviderRateLimiter] = None):
         self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.rate_limiter = rate_limiter or shared_rate_limiter
     
     def get_theme_prompts(self) -> Dict[str, Dict[str, str]]:
         """Prompts spécialisés par thème inspirés de zseedance.json"""
@@ -113,15 +115,16 @@ L'histoire doit être:
 Respecte exactement le format JSON demandé."""
 
         try:
-            response = await self.client.chat.completions.create(
-                model=config.TEXT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.9,  # Créativité élevée
-                max_tokens=1000
-            )
+            async with self.rate_limiter.acquire("openai", config.TEXT_MODEL):
+                response = await self.client.chat.completions.create(
+                    model=config.TEXT_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.9,  # Créativité élevée
+                    max_tokens=1000
+                )
             
             # Parser la réponse JSON
             content = response.choices[0].message.content.strip()
@@ -138,18 +141,22 @@ Respecte exactement le format JSON demandé."""
             
         except json.JSONDecodeError as e:
             # Fallback en cas d'erreur de parsing
-            theme_data = self.get_theme_prompts()[theme.value]
-            return StoryIdea(
-                caption=f"🎬 Nouvelle aventure {theme.value}! #enfants #animation #{theme.value}",
-                idea=f"Une histoire magique de {duration} secondes sur {theme_data['base_concept']}",
-                environment=f"{theme_data['setting']}, style cartoon coloré",
-                sound="Musique douce et effets sonores mélodieux pour enfants",
-                status="for production"
-            )
+            return self.create_fallback_idea(theme, duration)
         
         except Exception as e:
             raise Exception(f"Erreur lors de la génération d'idée: {str(e)}")
 
+    def create_fallback_idea(self, theme: AnimationTheme, duration: int) -> StoryIdea:
+        """Crée une idée générique à partir des données du thème"""
+        theme_data = self.get_theme_prompts()[theme.value]
+        return StoryIdea(
+            caption=f"🎬 Nouvelle aventure {theme.value}! #enfants #animation #{theme.value}",
+            idea=f"Une histoire magique de {duration} secondes sur {theme_data['base_concept']}",
+            environment=f"{theme_data['setting']}, style cartoon coloré",
+            sound="Musique douce et effets sonores mélodieux pour enfants",
+            status="for production"
+        )
+
     async def validate_idea(self, idea: StoryIdea) -> bool:
         """Valide qu'une idée est appropriée pour les enfants"""
         # Mots interdits pour les enfants
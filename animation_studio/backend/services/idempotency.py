@@ -0,0 +1,80 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+from config import config
+from .job_store import JobStore, job_store as shared_job_store
+
+class IdempotencyKeyMismatchError(Exception):
+    """Clé d'idempotence déjà utilisée pour une requête différente"""
+
+class IdempotencyKeyInProgressError(Exception):
+    """La requête d'origine de cette clé est encore en cours de traitement"""
+
+class IdempotencyKeys:
+    """Clés d'idempotence des routes de génération (en-tête Idempotency-Key)
+
+    Une nouvelle tentative du client (timeout, réseau) avec la même clé retrouve le job
+    créé par la première requête au lieu de relancer une génération payante. La clé est
+    conservée dans le stockage des jobs (partagée entre workers) pendant
+    IDEMPOTENCY_KEY_TTL; l'empreinte du corps de la requête est vérifiée à chaque
+    réutilisation pour détecter une clé recyclée pour une autre demande.
+    """
+
+    def __init__(self, job_store: Optional[JobStore] = None):
+        self.job_store = job_store or shared_job_store
+        self.ttl = config.IDEMPOTENCY_KEY_TTL
+        self.pending_timeout = config.IDEMPOTENCY_PENDING_TIMEOUT
+        self.max_length = config.IDEMPOTENCY_KEY_MAX_LENGTH
+
+        self.replayed = 0
+
+    @staticmethod
+    def fingerprint(**params: Any) -> str:
+        """Empreinte des paramètres de la requête (indépendante de l'ordre des champs)"""
+        encoded = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def validate(self, key: str):
+        """Refuse une clé vide ou trop longue"""
+        if not key.strip() or len(key) > self.max_length:
+            raise ValueError(f"Idempotency-Key invalide (1 à {self.max_length} caractères)")
+
+    def begin(self, scope: str, key: str, fingerprint: str) -> Optional[str]:
+        """Réserve la clé pour cette requête (None) ou retourne le job de la requête d'origine"""
+        self.validate(key)
+        stored_key = f"{scope}:{key}"
+        while True:
+            entry = self.job_store.reserve_idempotency_key(
+                stored_key, fingerprint, time.time() + self.pending_timeout
+            )
+            if entry is None:
+                return None
+            if entry["fingerprint"] != fingerprint:
+                raise IdempotencyKeyMismatchError(
+                    "Idempotency-Key déjà utilisée avec des paramètres différents"
+                )
+            if entry["job_id"] is None:
+                raise IdempotencyKeyInProgressError("Requête d'origine encore en cours de traitement")
+            if self.job_store.get_job(entry["job_id"]) is not None:
+                self.replayed += 1
+                return entry["job_id"]
+            # Job supprimé depuis (nettoyage): la clé est libérée et la requête traitée à nouveau
+            self.job_store.release_idempotency_key(stored_key)
+
+    def complete(self, scope: str, key: str, job_id: str):
+        """Associe la clé au job créé (ou rejoint) par la requête"""
+        self.job_store.complete_idempotency_key(f"{scope}:{key}", job_id, time.time() + self.ttl)
+
+    def abandon(self, scope: str, key: str):
+        """Libère la clé d'une requête en échec: la prochaine tentative sera traitée normalement"""
+        self.job_store.release_idempotency_key(f"{scope}:{key}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl,
+            "replayed": self.replayed
+        }
+
+# Instance globale partagée
+idempotency_keys = IdempotencyKeys()
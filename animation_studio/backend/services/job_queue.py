@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from config import config
+
+class QueueFullError(Exception):
+    """La file de génération a atteint sa capacité maximale"""
+
+class QueueClosedError(Exception):
+    """La file n'accepte plus de jobs (arrêt en cours)"""
+
+class GenerationQueue:
+    """File de jobs de génération consommée par un pool de workers asynchrones
+
+    `/generate` dépose un job et rend la main immédiatement; le nombre de workers
+    borne le nombre de pipelines (et donc de jobs fournisseurs) en cours. Les jobs
+    de priorité plus basse (valeur numérique plus petite) passent en premier.
+    """
+
+    def __init__(self, workers: int = None, max_size: int = None, drain_timeout: float = None):
+        self.workers = workers or config.GENERATION_WORKERS
+        self.max_size = max_size if max_size is not None else config.GENERATION_QUEUE_MAX_SIZE
+        self.drain_timeout = drain_timeout if drain_timeout is not None else config.GENERATION_DRAIN_TIMEOUT
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # Jobs en file pas encore démarrés (un job annulé en est retiré et sera ignoré)
+        self._pending: Set[str] = set()
+        self._sequence = itertools.count()
+        self._accepting = False
+
+    @property
+    def depth(self) -> int:
+        """Nombre de jobs en attente (hors jobs annulés avant leur démarrage)"""
+        return len(self._pending)
+
+    @property
+    def in_flight(self) -> int:
+        """Nombre de jobs en cours d'exécution"""
+        return len(self._in_flight)
+
+    async def start(self):
+        """Démarre le pool de workers (appelé dans le lifespan)"""
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_size)
+        self._accepting = True
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(index)) for index in range(self.workers)
+        ]
+
+    def submit(self, job_id: str, job: Callable[[], Awaitable[Any]], priority: int = 5):
+        """Dépose un job dans la file (lève QueueFullError si la file est pleine)"""
+        if not self._accepting or self._queue is None:
+            raise QueueClosedError("La file de génération n'accepte plus de jobs")
+        try:
+            # Le numéro de séquence garantit l'ordre FIFO à priorité égale
+            self._queue.put_nowait((priority, next(self._sequence), job_id, job))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"File de génération pleine ({self.max_size} jobs en attente)")
+        self._pending.add(job_id)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Annule un job: "running" s'il était en cours, "queued" s'il attendait, None s'il
+        n'est pas dans ce processus
+
+        Un job en cours reçoit CancelledError: ses tâches filles sont annulées et les
+        places fournisseurs qu'il occupe sont libérées aussitôt. Un job en file ne
+        démarrera pas (son statut est à mettre à jour par l'appelant).
+        """
+        task = self._in_flight.get(job_id)
+        if task is not None:
+            task.cancel()
+            return "running"
+        if job_id in self._pending:
+            self._pending.discard(job_id)
+            return "queued"
+        return None
+
+    async def wait(self, job_id: str, timeout: float) -> bool:
+        """Attend la fin d'un job en cours (True s'il est terminé dans le délai)"""
+        task = self._in_flight.get(job_id)
+        if task is None:
+            return True
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        return bool(done)
+
+    async def _worker(self, index: int):
+        while True:
+            priority, _, job_id, job = await self._queue.get()
+            if job_id not in self._pending:
+                # Annulé pendant son attente dans la file
+                self._queue.task_done()
+                continue
+            self._pending.discard(job_id)
+            task = asyncio.create_task(job())
+            self._in_flight[job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                # Job annulé seul: le worker continue; worker annulé (arrêt): on sort
+                if not task.cancelled() or not self._accepting:
+                    raise
+            except Exception as e:
+                print(f"❌ Worker {index}: échec du job {job_id}: {e}")
+            finally:
+                self._in_flight.pop(job_id, None)
+                self._queue.task_done()
+
+    async def drain(self, before_cancel: Optional[Callable[[], None]] = None) -> List[str]:
+        """Arrêt propre: plus de nouveaux jobs, attente des jobs en cours puis annulation
+
+        before_cancel est appelé juste avant l'annulation des jobs encore en cours.
+        Retourne les identifiants des jobs jamais démarrés ou interrompus.
+        """
+        self._accepting = False
+        if self._queue is None:
+            return []
+
+        # Les jobs jamais démarrés sont abandonnés
+        abandoned = []
+        while not self._queue.empty():
+            _, _, job_id, _ = self._queue.get_nowait()
+            self._queue.task_done()
+            if job_id in self._pending:
+                self._pending.discard(job_id)
+                abandoned.append(job_id)
+        if abandoned:
+            print(f"⚠️ {len(abandoned)} job(s) en attente abandonné(s) à l'arrêt")
+
+        in_flight = list(self._in_flight.values())
+        if in_flight:
+            print(f"⏳ Attente de {len(in_flight)} job(s) en cours (max {int(self.drain_timeout)}s)...")
+            await asyncio.wait(in_flight, timeout=self.drain_timeout)
+
+        # Annuler d'abord les jobs restants, puis les workers
+        abandoned.extend(self._in_flight.keys())
+        in_flight = list(self._in_flight.values())
+        if in_flight and before_cancel:
+            before_cancel()
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        return abandoned
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.depth,
+            "in_flight": self.in_flight,
+            "max_size": self.max_size,
+            "accepting": self._accepting
+        }
+
+# Instance globale partagée
+generation_queue = GenerationQueue()
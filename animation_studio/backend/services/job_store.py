@@ -0,0 +1,545 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from config import config
+
+# Statuts terminaux communs aux deux types de jobs (pipeline et génération rapide)
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+class JobStore(ABC):
+    """Interface de stockage des jobs d'animation
+
+    Un job est un dictionnaire: job_id, kind, status, created_at, updated_at,
+    progress, result, data, owner, lease_expires_at. Les mises à jour de progression
+    sont mises en tampon et écrites par lots (`flush`).
+
+    Chaque job appartient au worker qui l'a créé ou repris (`owner`); tant qu'il
+    tourne, ce worker prolonge le bail (`lease_expires_at`) de ses jobs non terminés.
+    Un bail expiré signale un worker disparu: le job peut alors être repris.
+    """
+
+    def __init__(self, flush_interval: float = None, lease_ttl: float = None):
+        self.flush_interval = flush_interval if flush_interval is not None else config.JOB_STORE_FLUSH_INTERVAL
+        self.lease_ttl = lease_ttl if lease_ttl is not None else config.JOB_LEASE_TTL
+        # Identifiant du worker (hôte, processus, instance)
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pending_progress: Dict[str, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._urgent_flush: Optional[asyncio.Task] = None
+        self._lease_task: Optional[asyncio.Task] = None
+
+    # --- Interface à implémenter par les backends ---
+
+    @abstractmethod
+    def create_job(self, job_id: str, kind: str, status: str, data: Optional[Dict[str, Any]] = None,
+                   result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def update_job(self, job_id: str, **fields) -> None:
+        ...
+
+    @abstractmethod
+    def _get_stored_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def list_jobs(self, status: Optional[str] = None, kind: Optional[str] = None,
+                  created_before: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def count_jobs(self, exclude_statuses: tuple = ()) -> int:
+        ...
+
+    @abstractmethod
+    def delete_jobs_older_than(self, max_age_seconds: float) -> int:
+        """Supprime les jobs terminés créés il y a plus de max_age_seconds (jamais un job en cours)"""
+
+    @abstractmethod
+    def claim_job(self, job_id: str, status: str, updated_at: float, new_status: str) -> bool:
+        """Passe un job à new_status s'il n'a pas changé depuis sa lecture et que son bail
+        est expiré (un seul worker gagne); le job appartient alors à ce worker"""
+
+    @abstractmethod
+    def renew_leases(self, owner: str, expires_at: float) -> int:
+        """Prolonge le bail des jobs non terminés appartenant à owner"""
+
+    @abstractmethod
+    def release_lease(self, job_id: str) -> None:
+        """Libère le bail d'un job (reprise immédiate possible par un autre worker)"""
+
+    @abstractmethod
+    def _write_progress_batch(self, batch: Dict[str, Dict[str, Any]]) -> None:
+        """Écrit un lot de progressions (une entrée plus ancienne que le job stocké est ignorée)"""
+
+    @abstractmethod
+    def reserve_idempotency_key(self, key: str, fingerprint: str, expires_at: float) -> Optional[Dict[str, Any]]:
+        """Réserve une clé d'idempotence libre ou expirée (None); sinon retourne l'entrée existante
+
+        Une entrée est un dictionnaire: key, fingerprint, job_id (None tant que la requête
+        d'origine n'a pas créé son job), expires_at. La réservation est atomique: entre
+        workers, une seule requête obtient la clé.
+        """
+
+    @abstractmethod
+    def complete_idempotency_key(self, key: str, job_id: str, expires_at: float) -> None:
+        """Associe une clé réservée au job créé pour la requête"""
+
+    @abstractmethod
+    def release_idempotency_key(self, key: str) -> None:
+        """Libère une clé réservée dont la requête a échoué (une nouvelle tentative la reprendra)"""
+
+    # --- Comportement commun ---
+
+    def record_progress(self, job_id: str, status: str, progress: Optional[Dict[str, Any]] = None,
+                        result: Optional[Dict[str, Any]] = None) -> None:
+        """Enregistre une mise à jour de progression (écrite au prochain lot)"""
+        entry = self._pending_progress.setdefault(job_id, {})
+        entry["status"] = status
+        entry["updated_at"] = time.time()
+        if progress is not None:
+            entry["progress"] = progress
+        if result is not None:
+            entry["result"] = result
+
+        # Les statuts terminaux sont écrits immédiatement
+        if status in TERMINAL_STATUSES:
+            self._flush_soon()
+
+    def checkpoint(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Écrit immédiatement un résultat intermédiaire (sorties d'étapes à ne pas perdre)"""
+        entry = self._pending_progress.setdefault(job_id, {})
+        entry["result"] = result
+        entry["updated_at"] = time.time()
+        self._flush_soon()
+
+    def _flush_soon(self):
+        """Écriture immédiate: hors de la boucle si l'écriture de fond tourne, sinon ici"""
+        if self._flush_task is None:
+            self.flush()
+        elif self._urgent_flush is None or self._urgent_flush.done():
+            self._urgent_flush = asyncio.create_task(self._write_pending())
+
+    def _merge_pending(self, job_id: str, job: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        pending = self._pending_progress.get(job_id)
+        if job is not None and pending:
+            job = {**job, **pending}
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Récupère un job, en tenant compte des mises à jour pas encore écrites"""
+        return self._merge_pending(job_id, self._get_stored_job(job_id))
+
+    async def get_job_async(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Comme get_job, sans bloquer la boucle d'événements pendant la lecture (routes de statut)"""
+        return self._merge_pending(job_id, await self._run_io(self._get_stored_job, job_id))
+
+    async def _run_io(self, func: Callable[..., Any], *args) -> Any:
+        """Exécute un accès au stockage dans un thread (les backends en mémoire l'exécutent directement)"""
+        return await asyncio.to_thread(func, *args)
+
+    def _take_batch(self) -> Dict[str, Dict[str, Any]]:
+        batch = self._pending_progress
+        self._pending_progress = {}
+        return batch
+
+    def flush(self) -> None:
+        """Écrit le lot de progressions en attente"""
+        if self._pending_progress:
+            self._write_progress_batch(self._take_batch())
+
+    async def _write_pending(self):
+        """Écrit les lots en attente dans un thread (y compris ceux ajoutés pendant l'écriture)"""
+        try:
+            while self._pending_progress:
+                await self._run_io(self._write_progress_batch, self._take_batch())
+        except Exception as e:
+            print(f"Avertissement: écriture des progressions échouée: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._write_pending()
+
+    def _lease_expiry(self) -> float:
+        return time.time() + self.lease_ttl
+
+    async def _lease_loop(self):
+        # Plusieurs renouvellements par bail: un renouvellement manqué ne suffit pas à le perdre
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                self.renew_leases(self.owner_id, self._lease_expiry())
+            except Exception as e:
+                print(f"Avertissement: renouvellement des baux échoué: {e}")
+
+    async def start(self):
+        """Démarre l'écriture périodique des lots et le renouvellement des baux (appelé dans le lifespan)"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if self._lease_task is None:
+            self._lease_task = asyncio.create_task(self._lease_loop())
+
+    async def close(self):
+        """Arrête les tâches périodiques et écrit le dernier lot"""
+        for task in (self._flush_task, self._lease_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._flush_task = None
+        self._lease_task = None
+        # Écriture immédiate en cours (checkpoint, statut terminal): menée à son terme
+        if self._urgent_flush is not None:
+            await self._urgent_flush
+            self._urgent_flush = None
+        self.flush()
+
+class InMemoryJobStore(JobStore):
+    """Stockage en mémoire (un seul processus, perdu au redémarrage)"""
+
+    def __init__(self, flush_interval: float = None, lease_ttl: float = None):
+        super().__init__(flush_interval, lease_ttl)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._idempotency_keys: Dict[str, Dict[str, Any]] = {}
+
+    def create_job(self, job_id, kind, status, data=None, result=None):
+        now = time.time()
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": status,
+            "created_at": now,
+            "updated_at": now,
+            "progress": None,
+            "result": result,
+            "data": data or {},
+            "owner": self.owner_id,
+            "lease_expires_at": now + self.lease_ttl
+        }
+        self._jobs[job_id] = job
+        return dict(job)
+
+    def update_job(self, job_id, **fields):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        job["updated_at"] = time.time()
+
+    def _get_stored_job(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def list_jobs(self, status=None, kind=None, created_before=None, limit=100):
+        jobs = [
+            job for job in self._jobs.values()
+            if (status is None or job["status"] == status)
+            and (kind is None or job["kind"] == kind)
+            and (created_before is None or job["created_at"] < created_before)
+        ]
+        jobs.sort(key=lambda job: job["created_at"], reverse=True)
+        return [dict(job) for job in jobs[:limit]]
+
+    def count_jobs(self, exclude_statuses=()):
+        return sum(1 for job in self._jobs.values() if job["status"] not in exclude_statuses)
+
+    def delete_jobs_older_than(self, max_age_seconds):
+        limit = time.time() - max_age_seconds
+        to_remove = [
+            job_id for job_id, job in self._jobs.items()
+            if job["created_at"] < limit and job["status"] in TERMINAL_STATUSES
+        ]
+        for job_id in to_remove:
+            del self._jobs[job_id]
+        return len(to_remove)
+
+    def claim_job(self, job_id, status, updated_at, new_status):
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != status or job["updated_at"] != updated_at:
+            return False
+        if job["lease_expires_at"] is not None and job["lease_expires_at"] > time.time():
+            return False
+        job.update(status=new_status, updated_at=time.time(), owner=self.owner_id,
+                   lease_expires_at=self._lease_expiry())
+        return True
+
+    def renew_leases(self, owner, expires_at):
+        renewed = 0
+        for job in self._jobs.values():
+            if job["owner"] == owner and job["status"] not in TERMINAL_STATUSES:
+                job["lease_expires_at"] = expires_at
+                renewed += 1
+        return renewed
+
+    def release_lease(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(owner=None, lease_expires_at=None)
+
+    async def _run_io(self, func, *args):
+        return func(*args)
+
+    def _write_progress_batch(self, batch):
+        for job_id, fields in batch.items():
+            job = self._jobs.get(job_id)
+            if job is not None and job["updated_at"] <= fields["updated_at"]:
+                job.update(fields)
+
+    def reserve_idempotency_key(self, key, fingerprint, expires_at):
+        now = time.time()
+        for expired in [k for k, entry in self._idempotency_keys.items() if entry["expires_at"] < now]:
+            del self._idempotency_keys[expired]
+        entry = self._idempotency_keys.get(key)
+        if entry is not None:
+            return dict(entry)
+        self._idempotency_keys[key] = {"key": key, "fingerprint": fingerprint, "job_id": None, "expires_at": expires_at}
+        return None
+
+    def complete_idempotency_key(self, key, job_id, expires_at):
+        entry = self._idempotency_keys.get(key)
+        if entry is not None:
+            entry.update(job_id=job_id, expires_at=expires_at)
+
+    def release_idempotency_key(self, key):
+        self._idempotency_keys.pop(key, None)
+
+class SQLiteJobStore(JobStore):
+    """Stockage SQLite embarqué (mode WAL, partagé entre les workers uvicorn)"""
+
+    JSON_COLUMNS = ("progress", "result", "data")
+
+    def __init__(self, path: Path, flush_interval: float = None, lease_ttl: float = None):
+        super().__init__(flush_interval, lease_ttl)
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Ouvre la base à la première utilisation"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    data TEXT,
+                    owner TEXT,
+                    lease_expires_at REAL
+                )
+            """)
+            # Bases créées avant les baux: ajout des colonnes (un autre worker a pu le faire)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:
+                    try:
+                        conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+                    except sqlite3.OperationalError:
+                        pass
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    job_id TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_expires_at ON idempotency_keys(expires_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for column in self.JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        job["data"] = job["data"] or {}
+        return job
+
+    @staticmethod
+    def _dumps(value: Any) -> Optional[str]:
+        return json.dumps(value, default=str) if value is not None else None
+
+    def create_job(self, job_id, kind, status, data=None, result=None):
+        now = time.time()
+        lease_expires_at = now + self.lease_ttl
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, kind, status, created_at, updated_at, progress, result, data, "
+                "owner, lease_expires_at) VALUES (?, ?, ?, ?, ?, NULL, ?, ?, ?, ?)",
+                (job_id, kind, status, now, now, self._dumps(result), self._dumps(data or {}),
+                 self.owner_id, lease_expires_at)
+            )
+            conn.commit()
+        return {
+            "job_id": job_id, "kind": kind, "status": status, "created_at": now,
+            "updated_at": now, "progress": None, "result": result, "data": data or {},
+            "owner": self.owner_id, "lease_expires_at": lease_expires_at
+        }
+
+    def _update_statement(self, fields: Dict[str, Any]):
+        columns = []
+        values = []
+        for key, value in fields.items():
+            columns.append(f"{key} = ?")
+            values.append(self._dumps(value) if key in self.JSON_COLUMNS else value)
+        return ", ".join(columns), values
+
+    def update_job(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments, values = self._update_statement(fields)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*values, job_id))
+            conn.commit()
+
+    def _get_stored_job(self, job_id):
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, status=None, kind=None, created_before=None, limit=100):
+        clauses = []
+        values: List[Any] = []
+        if status is not None:
+            clauses.append("status = ?")
+            values.append(status)
+        if kind is not None:
+            clauses.append("kind = ?")
+            values.append(kind)
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            values.append(created_before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*values, limit)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def count_jobs(self, exclude_statuses=()):
+        placeholders = ", ".join("?" for _ in exclude_statuses)
+        where = f"WHERE status NOT IN ({placeholders})" if exclude_statuses else ""
+        with self._lock:
+            row = self._connection().execute(f"SELECT COUNT(*) FROM jobs {where}", tuple(exclude_statuses)).fetchone()
+        return row[0]
+
+    def delete_jobs_older_than(self, max_age_seconds):
+        with self._lock:
+            conn = self._connection()
+            placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE created_at < ? AND status IN ({placeholders})",
+                (time.time() - max_age_seconds, *TERMINAL_STATUSES)
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def claim_job(self, job_id, status, updated_at, new_status):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, owner = ?, lease_expires_at = ? "
+                "WHERE job_id = ? AND status = ? AND updated_at = ? "
+                "AND (lease_expires_at IS NULL OR lease_expires_at <= ?)",
+                (new_status, now, self.owner_id, self._lease_expiry(), job_id, status, updated_at, now)
+            )
+            conn.commit()
+        return cursor.rowcount == 1
+
+    def renew_leases(self, owner, expires_at):
+        placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires_at = ? WHERE owner = ? AND status NOT IN ({placeholders})",
+                (expires_at, owner, *TERMINAL_STATUSES)
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def release_lease(self, job_id):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE jobs SET owner = NULL, lease_expires_at = NULL WHERE job_id = ?", (job_id,))
+            conn.commit()
+
+    def _write_progress_batch(self, batch):
+        with self._lock:
+            conn = self._connection()
+            for job_id, fields in batch.items():
+                assignments, values = self._update_statement(fields)
+                # Un lot en retard (écrit par un thread) n'écrase pas une version plus récente
+                conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ? AND updated_at <= ?",
+                             (*values, job_id, fields["updated_at"]))
+            conn.commit()
+
+    def reserve_idempotency_key(self, key, fingerprint, expires_at):
+        with self._lock:
+            conn = self._connection()
+            # Purge des clés expirées et insertion dans la même transaction (verrou d'écriture sqlite)
+            conn.execute("DELETE FROM idempotency_keys WHERE expires_at < ?", (time.time(),))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (key, fingerprint, job_id, expires_at) VALUES (?, ?, NULL, ?)",
+                (key, fingerprint, expires_at)
+            )
+            row = None
+            if cursor.rowcount != 1:
+                row = conn.execute("SELECT * FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+            conn.commit()
+        return dict(row) if row else None
+
+    def complete_idempotency_key(self, key, job_id, expires_at):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE idempotency_keys SET job_id = ?, expires_at = ? WHERE key = ?", (job_id, expires_at, key))
+            conn.commit()
+
+    def release_idempotency_key(self, key):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+            conn.commit()
+
+    async def close(self):
+        await super().close()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def create_job_store(backend: str = None) -> JobStore:
+    """Crée le stockage de jobs configuré (JOB_STORE_BACKEND: sqlite ou memory)"""
+    backend = (backend or config.JOB_STORE_BACKEND).lower()
+    if backend == "memory":
+        return InMemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore(config.JOB_STORE_PATH)
+    raise ValueError(f"Backend de stockage de jobs inconnu: {backend}")
+
+# Instance globale partagée
+job_store = create_job_store()
@@ -0,0 +1,350 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from config import config
+from .metrics import metrics
+
+class JobCompletionWaiter:
+    """Attente de fin des jobs fournisseurs (Wavespeed, FAL AI)
+
+    Un webhook réveille immédiatement le job concerné; à défaut, un polling adaptatif
+    prend le relais: intervalles courts au début, puis backoff guidé par la distribution
+    des durées observées pour chaque étape.
+
+    Tous les jobs en attente sont confiés à un planificateur unique: les polls sont placés
+    sur une roue temporelle hachée (avec jitter) et lancés dans la limite de
+    JOB_POLL_MAX_RATE par seconde. Le nombre de réveils de la boucle et le trafic de
+    polling suivent ce budget, pas le nombre de jobs en cours.
+    """
+
+    def __init__(self):
+        self.min_interval = config.JOB_POLL_MIN_INTERVAL
+        self.max_interval = config.JOB_POLL_MAX_INTERVAL
+        self.backoff_factor = config.JOB_POLL_BACKOFF_FACTOR
+        self.webhook_base_url = config.WEBHOOK_BASE_URL
+
+        self.tick = config.JOB_POLL_TICK
+        self.jitter = config.JOB_POLL_JITTER
+        self.max_rate = config.JOB_POLL_MAX_RATE
+        self._burst = max(1.0, self.max_rate)
+
+        # Jobs en attente: job_id -> état suivi par le planificateur
+        self._jobs: Dict[str, _PendingJob] = {}
+        # Roue temporelle: chaque case contient des entrées (tours restants, job_id, génération)
+        self._wheel: List[List[Tuple[int, str, int]]] = [[] for _ in range(max(1, config.JOB_POLL_WHEEL_SLOTS))]
+        self._cursor = 0
+        # Polls dus, en attente d'un jeton de débit: (job_id, génération)
+        self._ready: Deque[Tuple[str, int]] = deque()
+        self._tokens = 0.0
+        self._last_refill = 0.0
+        self._polls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Webhooks arrivés avant l'enregistrement du job: job_id -> timestamp
+        self._early_notifications: Dict[str, float] = {}
+        # Durées observées par étape (secondes)
+        self._durations: Dict[str, Deque[float]] = {}
+        # Arrêt en cours: une attente interrompue ne doit plus annuler le job fournisseur
+        self.shutting_down = False
+
+    def begin_shutdown(self):
+        """Arrêt du serveur: les jobs fournisseurs en cours sont conservés pour être repris"""
+        self.shutting_down = True
+
+    def should_cancel_provider_job(self) -> bool:
+        """Annuler le job fournisseur d'une attente interrompue (pas à l'arrêt: il sera repris)"""
+        return not self.shutting_down
+
+    def webhook_url(self, provider: str) -> Optional[str]:
+        """URL de callback à transmettre au fournisseur (None si non configurée)"""
+        if not self.webhook_base_url:
+            return None
+        return f"{self.webhook_base_url.rstrip('/')}/webhooks/{provider}"
+
+    def with_webhook(self, url: str, provider: str, param: str) -> str:
+        """Ajoute le paramètre de webhook du fournisseur à l'URL de soumission"""
+        callback = self.webhook_url(provider)
+        if not callback:
+            return url
+        separator = "&" if "?" in url else "?"
+        return f"{url}{separator}{param}={quote(callback, safe='')}"
+
+    def notify(self, job_id: str) -> bool:
+        """Signale la fin d'un job (appelé par la route webhook)"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            if job.poll_task is not None:
+                job.notified = True
+            else:
+                self._make_ready(job)
+                self._wakeup.set()
+            return True
+
+        # Le webhook peut précéder l'enregistrement du job
+        self._prune_early_notifications()
+        self._early_notifications[job_id] = time.time()
+        return False
+
+    def _prune_early_notifications(self, max_age: float = 600):
+        """Oublie les notifications anticipées trop anciennes"""
+        now = time.time()
+        for job_id in [k for k, ts in self._early_notifications.items() if now - ts > max_age]:
+            del self._early_notifications[job_id]
+
+    def record_duration(self, stage: str, duration: float):
+        """Enregistre la durée observée d'un job terminé"""
+        history = self._durations.setdefault(stage, deque(maxlen=config.JOB_DURATION_HISTORY))
+        history.append(duration)
+
+    def duration_quantile(self, stage: str, q: float) -> Optional[float]:
+        """Quantile des durées de job observées pour une étape (None si trop peu de jobs)"""
+        return self._quantile(stage, q)
+
+    def _quantile(self, stage: str, q: float) -> Optional[float]:
+        """Quantile des durées observées pour une étape"""
+        history = self._durations.get(stage)
+        if not history or len(history) < 3:
+            return None
+        ordered = sorted(history)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    def next_interval(self, stage: str, elapsed: float, previous: Optional[float]) -> float:
+        """Calcule le délai avant le prochain poll"""
+        early = self._quantile(stage, 0.25)
+        late = self._quantile(stage, 0.9)
+
+        if early is not None and elapsed < early:
+            # Fin improbable avant le premier quartile: attendre jusque-là
+            return max(self.min_interval, min(early - elapsed, self.max_interval))
+
+        if late is not None and elapsed <= late:
+            # Fenêtre de fin la plus probable: polling serré
+            return self.min_interval
+
+        if previous is None:
+            return self.min_interval
+
+        return min(previous * self.backoff_factor, self.max_interval)
+
+    async def wait_for(
+        self,
+        stage: str,
+        job_id: str,
+        check: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        timeout: float
+    ) -> Dict[str, Any]:
+        """Attend la fin d'un job
+
+        `check` interroge le fournisseur et retourne le résultat final, None si le job
+        est encore en cours, ou lève une exception en cas d'échec. Le job est confié
+        au planificateur central qui résout le futur retourné ici. Un job déjà attendu
+        n'est pas suivi deux fois: les appelants partagent le même futur.
+        """
+        loop = asyncio.get_running_loop()
+        self._ensure_scheduler(loop)
+
+        job = self._jobs.get(job_id)
+        if job is None or job.future.done():
+            job = _PendingJob(stage, job_id, check, loop.create_future(), timeout)
+            self._jobs[job_id] = job
+            if self._early_notifications.pop(job_id, None) is not None:
+                self._make_ready(job)
+            else:
+                self._schedule(job, self.next_interval(stage, 0, None))
+            self._wakeup.set()
+        job.waiters += 1
+
+        try:
+            # Protégé: l'annulation d'un appelant n'interrompt pas l'attente des autres
+            return await asyncio.shield(job.future)
+        finally:
+            job.waiters -= 1
+            if job.waiters == 0:
+                if self._jobs.get(job_id) is job:
+                    del self._jobs[job_id]
+                job.generation += 1
+                if job.poll_task is not None:
+                    job.poll_task.cancel()
+                if not job.future.done():
+                    job.future.cancel()
+
+    def _ensure_scheduler(self, loop: asyncio.AbstractEventLoop):
+        """Démarre le planificateur sur la boucle courante (une fois par boucle)"""
+        if self._scheduler is not None and self._loop is loop and not self._scheduler.done():
+            return
+        if self._loop is not loop:
+            # Nouvelle boucle (tests, redémarrage): les jobs de l'ancienne sont perdus
+            self._jobs.clear()
+            self._ready.clear()
+            for slot in self._wheel:
+                slot.clear()
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._tokens = float(self._burst)
+        self._last_refill = loop.time()
+        self._scheduler = loop.create_task(self._run())
+
+    def _schedule(self, job: "_PendingJob", delay: float):
+        """Place le prochain poll d'un job sur la roue (avec jitter)"""
+        job.generation += 1
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        ticks = max(1, round(delay / self.tick))
+        slot = (self._cursor + ticks) % len(self._wheel)
+        self._wheel[slot].append((ticks // len(self._wheel), job.job_id, job.generation))
+
+    def _make_ready(self, job: "_PendingJob"):
+        """Poll immédiat (webhook reçu): les entrées de la roue pour ce job deviennent caduques"""
+        job.generation += 1
+        self._ready.append((job.job_id, job.generation))
+
+    def _advance(self):
+        """Traite la case courante de la roue puis avance d'un cran"""
+        slot = self._wheel[self._cursor]
+        remaining = []
+        for rounds, job_id, generation in slot:
+            if rounds > 0:
+                remaining.append((rounds - 1, job_id, generation))
+            elif self._is_current(job_id, generation):
+                self._ready.append((job_id, generation))
+        self._wheel[self._cursor] = remaining
+        self._cursor = (self._cursor + 1) % len(self._wheel)
+
+    def _is_current(self, job_id: str, generation: int) -> bool:
+        """L'entrée correspond au dernier ordonnancement d'un job toujours en attente"""
+        job = self._jobs.get(job_id)
+        return job is not None and job.generation == generation and job.poll_task is None
+
+    def _dispatch(self) -> Optional[float]:
+        """Lance les polls prêts dans la limite du débit (délai avant le prochain jeton si bloqué)"""
+        if self.max_rate > 0:
+            now = self._loop.time()
+            self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self.max_rate)
+            self._last_refill = now
+
+        while self._ready:
+            job_id, generation = self._ready[0]
+            if not self._is_current(job_id, generation):
+                self._ready.popleft()
+                continue
+            if self.max_rate > 0:
+                if self._tokens < 1:
+                    return (1 - self._tokens) / self.max_rate
+                self._tokens -= 1
+            self._ready.popleft()
+            job = self._jobs[job_id]
+            job.poll_task = self._loop.create_task(self._poll(job))
+        return None
+
+    async def _run(self):
+        """Boucle du planificateur: un réveil par cran de roue, quel que soit le nombre de jobs"""
+        loop = self._loop
+        next_tick = loop.time() + self.tick
+        while True:
+            if not self._jobs:
+                # Rien en attente: la roue est vidée et la boucle dort jusqu'au prochain job
+                for slot in self._wheel:
+                    slot.clear()
+                self._ready.clear()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                next_tick = loop.time() + self.tick
+                continue
+
+            now = loop.time()
+            while next_tick <= now:
+                self._advance()
+                next_tick += self.tick
+
+            token_delay = self._dispatch()
+            delay = next_tick - loop.time()
+            if token_delay is not None:
+                delay = min(delay, token_delay)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, delay))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, job: "_PendingJob"):
+        """Interroge le fournisseur pour un job puis résout son futur ou le replanifie"""
+        try:
+            poll_start = time.perf_counter()
+            result = await job.check()
+            metrics.job_phase_duration.observe(time.perf_counter() - poll_start, stage=job.stage, phase="poll")
+            self._polls += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+        finally:
+            job.poll_task = None
+
+        if job.future.done():
+            return
+
+        elapsed = time.time() - job.start_time
+        if result is not None:
+            self.record_duration(job.stage, elapsed)
+            metrics.job_phase_duration.observe(elapsed, stage=job.stage, phase="wait")
+            job.future.set_result(result)
+        elif elapsed >= job.timeout:
+            job.future.set_exception(
+                Exception(f"Timeout: le job {job.job_id} n'a pas abouti en {int(job.timeout)}s")
+            )
+        elif job.notified:
+            # Webhook reçu pendant le poll: on vérifie à nouveau sans attendre
+            job.notified = False
+            self._make_ready(job)
+            self._wakeup.set()
+        else:
+            job.interval = self.next_interval(job.stage, elapsed, job.interval)
+            self._schedule(job, min(job.interval, job.timeout - elapsed))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de l'attente des jobs"""
+        return {
+            "pending_jobs": len(self._jobs),
+            "ready_polls": len(self._ready),
+            "polls_in_flight": sum(1 for job in self._jobs.values() if job.poll_task is not None),
+            "polls_total": self._polls,
+            "max_poll_rate": self.max_rate or None,
+            "webhooks_enabled": bool(self.webhook_base_url),
+            "median_durations": {
+                stage: self._quantile(stage, 0.5) for stage in self._durations
+            }
+        }
+
+class _PendingJob:
+    """Job fournisseur suivi par le planificateur"""
+
+    __slots__ = ("stage", "job_id", "check", "future", "timeout", "start_time",
+                 "interval", "generation", "poll_task", "notified", "waiters")
+
+    def __init__(self, stage: str, job_id: str, check: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+                 future: asyncio.Future, timeout: float):
+        self.stage = stage
+        self.job_id = job_id
+        self.check = check
+        self.future = future
+        self.timeout = timeout
+        self.start_time = time.time()
+        # Dernier intervalle de polling (backoff)
+        self.interval: Optional[float] = None
+        # Incrémenté à chaque replanification: les anciennes entrées de la roue sont ignorées
+        self.generation = 0
+        self.poll_task: Optional[asyncio.Task] = None
+        # Webhook arrivé pendant un poll en cours
+        self.notified = False
+        # Appelants de wait_for qui attendent ce job
+        self.waiters = 0
+
+# Instance globale partagée par tous les services
+completion_waiter = JobCompletionWaiter()
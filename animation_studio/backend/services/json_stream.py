@@ -0,0 +1,75 @@
+import json
+from typing import Any, List, Tuple, Union
+
+PathItem = Union[str, int]
+
+class IncrementalJsonParser:
+    """Analyseur JSON incrémental pour les réponses LLM en streaming
+
+    Reçoit le texte morceau par morceau et retourne chaque valeur chaîne dès que
+    son guillemet fermant arrive, avec son chemin (ex: ("Scene 2",) ou
+    ("scenes", 1, "description")). Les caractères hors JSON (balises ```json)
+    sont ignorés.
+    """
+
+    def __init__(self):
+        # Pile des conteneurs ouverts: [type, clé ou index courant, attente d'une clé]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escaped = False
+        self._buffer: List[str] = []
+
+    def _path(self) -> Tuple[PathItem, ...]:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _close_string(self) -> List[Tuple[Tuple[PathItem, ...], Any]]:
+        value = json.loads('"' + "".join(self._buffer) + '"', strict=False)
+        self._buffer = []
+        if not self._stack:
+            return []
+
+        frame = self._stack[-1]
+        if frame[0] == "object" and frame[2]:
+            # Clé d'objet: la valeur suivra après ':'
+            frame[1] = value
+            return []
+        return [(self._path(), value)]
+
+    def feed(self, text: str) -> List[Tuple[Tuple[PathItem, ...], Any]]:
+        """Analyse un morceau de texte; retourne les chaînes complétées (chemin, valeur)"""
+        completed = []
+        for char in text:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    self._buffer.append(char)
+                elif char == "\\":
+                    self._escaped = True
+                    self._buffer.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    completed.extend(self._close_string())
+                else:
+                    self._buffer.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._stack.append(["object", None, True])
+            elif char == "[":
+                self._stack.append(["array", 0, False])
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+            elif char == ":":
+                if self._stack and self._stack[-1][0] == "object":
+                    self._stack[-1][2] = False
+            elif char == ",":
+                if self._stack:
+                    frame = self._stack[-1]
+                    if frame[0] == "object":
+                        frame[2] = True
+                    else:
+                        frame[1] += 1
+        return completed
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from config import config
+from models.schemas import VideoClip, AudioTrack
+from .http_client import ProviderHttpClient, http_client as shared_http_client
+from .eta_estimator import eta_estimator
+
+class FFmpegError(Exception):
+    """Échec d'une commande ffmpeg/ffprobe"""
+
+class LocalVideoAssembler:
+    """Assemblage vidéo final en local avec FFmpeg (alternative à FAL AI compose)
+
+    Les clips sont téléchargés en parallèle puis concaténés sans ré-encodage quand
+    leurs codecs et formats sont identiques; sinon les clips sont ré-encodés au
+    format du premier. La piste audio est ensuite multiplexée. Les
+    processus ffmpeg passent par un pool borné au nombre de cœurs.
+    """
+
+    # Propriétés du flux vidéo qui doivent correspondre pour une concaténation en copie
+    STREAM_KEYS = ("codec_name", "width", "height", "pix_fmt", "r_frame_rate")
+
+    def __init__(self, http_client: Optional[ProviderHttpClient] = None):
+        self.http_client = http_client or shared_http_client
+        self.ffmpeg = config.FFMPEG_BINARY
+        self.ffprobe = config.FFPROBE_BINARY
+        self.output_dir = Path(config.CACHE_DIR) / "renders"
+        self.max_processes = config.FFMPEG_MAX_PROCESSES or os.cpu_count() or 1
+        self._process_slots = asyncio.Semaphore(self.max_processes)
+
+    def is_available(self) -> bool:
+        return shutil.which(self.ffmpeg) is not None and shutil.which(self.ffprobe) is not None
+
+    async def _run(self, *args: str) -> bytes:
+        """Exécute une commande dans le pool de processus; retourne stdout"""
+        async with self._process_slots:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                # Animation annulée: ne pas laisser FFmpeg tourner pour rien
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+        if process.returncode != 0:
+            raise FFmpegError(f"{Path(args[0]).name} a échoué ({process.returncode}): {stderr.decode(errors='ignore')[-500:]}")
+        return stdout
+
+    async def _download(self, url: str, destination: Path) -> Path:
+        """Télécharge un média (ou utilise directement le fichier du cache local)"""
+        local_path = self._local_path(url)
+        if local_path is not None:
+            return local_path
+
+        session = await self.http_client.get_session(url)
+        async with session.get(url) as response:
+            if response.status != 200:
+                raise Exception(f"Téléchargement impossible ({response.status}): {url}")
+            with open(destination, "wb") as file:
+                async for chunk in response.content.iter_chunked(1024 * 1024):
+                    file.write(chunk)
+        return destination
+
+    def _local_path(self, url: str) -> Optional[Path]:
+        """Fichier local correspondant à une URL servie par l'application (/cache/..., absolue ou relative)"""
+        prefixes = ["/cache/"]
+        if config.PUBLIC_BASE_URL:
+            prefixes.insert(0, f"{config.PUBLIC_BASE_URL.rstrip('/')}/cache/")
+        for prefix in prefixes:
+            if url.startswith(prefix):
+                path = Path(config.CACHE_DIR) / url[len(prefix):]
+                return path if path.exists() else None
+        return None
+
+    async def _probe(self, path: Path) -> Dict[str, Any]:
+        """Propriétés du premier flux vidéo d'un fichier"""
+        output = await self._run(
+            self.ffprobe, "-v", "error", "-select_streams", "v:0",
+            "-show_entries", f"stream={','.join(self.STREAM_KEYS)}",
+            "-of", "json", str(path)
+        )
+        streams = json.loads(output or b"{}").get("streams") or []
+        if not streams:
+            raise FFmpegError(f"Aucun flux vidéo dans {path.name}")
+        return {key: streams[0].get(key) for key in self.STREAM_KEYS}
+
+    async def _normalize(self, source: Path, destination: Path, reference: Dict[str, Any]) -> Path:
+        """Ré-encode un clip au format du clip de référence"""
+        await self._run(
+            self.ffmpeg, "-y", "-v", "error", "-i", str(source),
+            "-vf", f"scale={reference['width']}:{reference['height']}:force_original_aspect_ratio=decrease,"
+                   f"pad={reference['width']}:{reference['height']}:(ow-iw)/2:(oh-ih)/2",
+            "-r", reference["r_frame_rate"], "-pix_fmt", reference["pix_fmt"] or "yuv420p",
+            "-c:v", "libx264", "-preset", "veryfast", "-an", str(destination)
+        )
+        return destination
+
+    def _output_url(self, path: Path) -> str:
+        relative = f"/cache/renders/{path.name}"
+        if config.PUBLIC_BASE_URL:
+            return f"{config.PUBLIC_BASE_URL.rstrip('/')}{relative}"
+        return relative
+
+    async def _assemble(self, video_urls: List[str], audio_url: Optional[str] = None) -> str:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        workdir = Path(tempfile.mkdtemp(prefix="assembly_", dir=self.output_dir))
+
+        try:
+            # 1. Téléchargements en parallèle (clips + audio)
+            downloads = [self._download(url, workdir / f"clip_{i}.mp4") for i, url in enumerate(video_urls)]
+            if audio_url:
+                downloads.append(self._download(audio_url, workdir / "audio_source"))
+            paths = await asyncio.gather(*downloads)
+            clip_paths = list(paths[:len(video_urls)])
+            audio_path = paths[len(video_urls)] if audio_url else None
+
+            # 2. Ré-encodage (en parallèle) seulement si les formats des clips diffèrent
+            probes = await asyncio.gather(*(self._probe(path) for path in clip_paths))
+            reference = probes[0]
+            if any(probe != reference for probe in probes):
+                clip_paths = await asyncio.gather(*(
+                    self._normalize(path, workdir / f"normalized_{i}.mp4", reference)
+                    for i, path in enumerate(clip_paths)
+                ))
+
+            # 3. Concaténation sans ré-encodage (demuxer concat)
+            concat_list = workdir / "concat.txt"
+            concat_list.write_text(
+                "".join(f"file '{path.resolve().as_posix()}'\n" for path in clip_paths), encoding="utf-8"
+            )
+            output_path = self.output_dir / f"{uuid.uuid4().hex}.mp4"
+            command = [self.ffmpeg, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", str(concat_list)]
+
+            # 4. Multiplexage de la piste audio (les clips Wavespeed sont muets)
+            if audio_path is not None:
+                command += ["-i", str(audio_path), "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac", "-shortest"]
+            else:
+                command += ["-c", "copy"]
+            command += ["-movflags", "+faststart", str(output_path)]
+            await self._run(*command)
+
+            return self._output_url(output_path)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    async def assemble_final_video(
+        self,
+        video_clips: List[VideoClip],
+        audio_track: AudioTrack = None,
+        provider_job_id: Optional[str] = None,
+        on_submitted: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Assemble la vidéo finale à partir des clips et de l'audio
+        
+        (Aucun job distant: provider_job_id et on_submitted sont ignorés, un assemblage
+        interrompu est simplement relancé.)
+        """
+        
+        valid_clips = sorted(
+            (clip for clip in video_clips if clip.video_url and clip.status == "completed"),
+            key=lambda clip: clip.scene_number
+        )
+        
+        if not valid_clips:
+            raise Exception("Aucun clip vidéo valide pour l'assemblage")
+        
+        try:
+            audio_url = audio_track.audio_url if audio_track and audio_track.audio_url else None
+            return await self._assemble([clip.video_url for clip in valid_clips], audio_url)
+        except Exception as e:
+            raise Exception(f"Erreur lors de l'assemblage final: {str(e)}")
+
+    async def create_simple_sequence(self, video_clips: List[VideoClip]) -> str:
+        """Crée une séquence simple sans audio (méthode fallback)"""
+        
+        video_urls = [clip.video_url for clip in video_clips if clip.video_url and clip.status == "completed"]
+        
+        if len(video_urls) < 2:
+            return video_urls[0] if video_urls else ""
+        
+        try:
+            return await self._assemble(video_urls)
+        except Exception as e:
+            # Retourner le premier clip en cas d'échec
+            print(f"Avertissement: séquence locale échouée: {e}")
+            return video_urls[0]
+
+    async def validate_final_video(self, video_url: str) -> bool:
+        """Valide que la vidéo finale existe"""
+        if not video_url:
+            return False
+        return (self.output_dir / Path(video_url).name).exists()
+
+    def estimate_assembly_time(self, video_clips: List[VideoClip]) -> int:
+        """Estime le temps d'assemblage en secondes (téléchargements + remux)"""
+        return int(eta_estimator.estimate(
+            "assembly", 5 + 2 * len(video_clips),
+            len(video_clips), video_clips[0].duration if video_clips else 0
+        ))
+
+    def cleanup_old_renders(self, max_age_hours: int = 24) -> int:
+        """Supprime les vidéos assemblées plus anciennes que max_age_hours"""
+        if not self.output_dir.exists():
+            return 0
+        limit = time.time() - max_age_hours * 3600
+        removed = 0
+        for path in self.output_dir.glob("*.mp4"):
+            if path.stat().st_mtime < limit:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
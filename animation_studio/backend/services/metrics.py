@@ -0,0 +1,185 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Bornes (secondes) adaptées aux étapes: de l'appel HTTP au clip de plusieurs minutes
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 180, 300, 600, 1200)
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labelnames, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """Compteur par combinaison d'étiquettes"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram(Counter):
+    """Histogramme à bornes fixes (compteurs par tranche, cumulés au rendu seulement)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Étiquettes -> [compteurs par tranche (+Inf en dernier), somme, nombre]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        labelnames = self.labelnames + ("le",)
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(labelnames, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Métriques de l'application, agrégées en mémoire et exposées au format Prometheus
+
+    Une observation coûte une recherche dichotomique et trois incréments; les jauges
+    (file, animations actives, cache) sont lues seulement au moment du scrape.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Counter] = {}
+        # Jauges calculées au scrape: nom -> (aide, type, fonction)
+        self._callbacks: Dict[str, Tuple[str, str, Callable[[], float]]] = {}
+
+        # Pipeline
+        self.stage_duration = self.histogram(
+            "animation_stage_duration_seconds",
+            "Durée des étapes du pipeline (idée, scènes, clips, audio, assemblage)",
+            ("stage", "theme", "outcome")
+        )
+        self.animation_duration = self.histogram(
+            "animation_duration_seconds",
+            "Durée totale de génération d'une animation",
+            ("theme", "duration", "status")
+        )
+
+        # Fournisseurs
+        self.http_duration = self.histogram(
+            "provider_http_request_duration_seconds",
+            "Latence des requêtes HTTP vers les fournisseurs",
+            ("provider", "method", "status")
+        )
+        self.job_phase_duration = self.histogram(
+            "provider_job_phase_seconds",
+            "Durée des phases d'un job fournisseur (submit, wait, poll)",
+            ("stage", "phase")
+        )
+        self.slot_wait = self.histogram(
+            "provider_slot_wait_seconds",
+            "Attente d'une place auprès du régulateur fournisseur",
+            ("provider",)
+        )
+        self.slot_held = self.histogram(
+            "provider_slot_held_seconds",
+            "Durée d'occupation d'une place fournisseur (appel OpenAI ou job complet)",
+            ("provider",)
+        )
+        self.clip_extra_submissions = self.counter(
+            "clip_extra_submissions_total",
+            "Soumissions Wavespeed supplémentaires (retry, hedge) et doublons gagnants (hedge_won)",
+            ("kind",)
+        )
+        self.circuit_transitions = self.counter(
+            "endpoint_circuit_transitions_total",
+            "Changements d'état des disjoncteurs d'endpoints fournisseurs",
+            ("endpoint", "state")
+        )
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, documentation, labelnames)
+        return self._metrics[name]
+
+    @contextmanager
+    def time(self, histogram: Histogram, **labels: str):
+        """Chronomètre un bloc et l'observe dans l'histogramme (même en cas d'exception)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start, **labels)
+
+    def gauge_callback(self, name: str, documentation: str, callback: Callable[[], float], kind: str = "gauge"):
+        """Valeur lue à chaque scrape (kind="counter" pour un compteur tenu ailleurs)"""
+        self._callbacks[name] = (documentation, kind, callback)
+
+    def render(self) -> str:
+        """Exposition au format texte Prometheus (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for name, (documentation, kind, callback) in list(self._callbacks.items()):
+            try:
+                value = callback()
+            except Exception as e:
+                print(f"Avertissement: métrique {name} indisponible: {e}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# Instance globale partagée
+metrics = MetricsRegistry()
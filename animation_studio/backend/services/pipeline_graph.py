@@ -0,0 +1,149 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Modes de déclenchement d'un nœud selon ses dépendances
+WAIT_ALL = "all"          # toutes les dépendances ont réussi
+WAIT_ANY = "any"          # au moins une dépendance a réussi
+WAIT_SETTLED = "settled"  # toutes les dépendances sont terminées (succès ou échec)
+
+class PipelineNode:
+    """Nœud du graphe: une tâche asynchrone et ses dépendances"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Awaitable[Any]],
+        deps: Tuple[str, ...] = (),
+        wait_for: str = WAIT_ALL,
+        optional: bool = False
+    ):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.wait_for = wait_for
+        self.optional = optional
+
+class PipelineGraph:
+    """Ordonnanceur de tâches en graphe de dépendances
+
+    Chaque nœud démarre dès que ses entrées sont prêtes; les nœuds peuvent être
+    ajoutés en cours d'exécution (ex: un clip par scène une fois les scènes connues).
+    Un nœud obligatoire en échec interrompt le graphe; un nœud optionnel en échec
+    est simplement enregistré dans `errors`.
+    """
+
+    def __init__(self, on_event: Optional[Callable[[str, str, Any], Awaitable[None]]] = None):
+        self.nodes: Dict[str, PipelineNode] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self.skipped: List[str] = []
+        self.on_event = on_event
+
+        self._running: Dict[str, asyncio.Task] = {}
+        self._changed = asyncio.Event()
+        # Libérations de ressources partagées entre nœuds, exécutées à la fin du graphe
+        self._cleanups: List[Callable[[], Awaitable[None]]] = []
+
+    def add_node(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Awaitable[Any]],
+        deps: Tuple[str, ...] = (),
+        wait_for: str = WAIT_ALL,
+        optional: bool = False
+    ):
+        """Déclare un nœud (possible pendant l'exécution du graphe)"""
+        if name in self.nodes:
+            raise ValueError(f"Nœud déjà défini: {name}")
+        self.nodes[name] = PipelineNode(name, func, deps, wait_for, optional)
+        self._changed.set()
+
+    def add_cleanup(self, func: Callable[[], Awaitable[None]]):
+        """Déclare une libération exécutée à la fin du graphe (succès, échec ou annulation)"""
+        self._cleanups.append(func)
+
+    def _is_done(self, name: str) -> bool:
+        return name in self.results or name in self.errors or name in self.skipped
+
+    def _readiness(self, node: PipelineNode) -> Optional[bool]:
+        """True si le nœud peut démarrer, False s'il ne pourra jamais, None sinon"""
+        missing = [dep for dep in node.deps if dep not in self.nodes]
+        if missing:
+            return None
+
+        succeeded = [dep for dep in node.deps if dep in self.results]
+        settled = all(self._is_done(dep) for dep in node.deps)
+
+        if node.wait_for == WAIT_ANY:
+            if succeeded or not node.deps:
+                return True
+            return False if settled else None
+
+        if node.wait_for == WAIT_SETTLED:
+            return True if settled else None
+
+        if len(succeeded) == len(node.deps):
+            return True
+        return False if settled else None
+
+    async def _emit(self, name: str, event: str, payload: Any = None):
+        if self.on_event:
+            await self.on_event(name, event, payload)
+
+    async def _run_node(self, node: PipelineNode):
+        try:
+            # Dans le try: un on_event en échec fait échouer le nœud au lieu de bloquer run()
+            await self._emit(node.name, "started")
+            result = await node.func(self.results)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors[node.name] = e
+            await self._emit(node.name, "failed", e)
+        else:
+            self.results[node.name] = result
+            await self._emit(node.name, "completed", result)
+        finally:
+            self._changed.set()
+
+    def _schedule_ready(self):
+        """Démarre les nœuds prêts et marque ceux qui ne pourront jamais démarrer"""
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, node in self.nodes.items():
+                if name in self._running or self._is_done(name):
+                    continue
+                ready = self._readiness(node)
+                if ready is True:
+                    self._running[name] = asyncio.create_task(self._run_node(node))
+                elif ready is False:
+                    self.skipped.append(name)
+                    progressed = True
+
+    async def run(self) -> Dict[str, Any]:
+        """Exécute le graphe jusqu'à ce que tous les nœuds soient terminés"""
+        try:
+            while True:
+                self._changed.clear()
+                self._schedule_ready()
+
+                failed = [name for name in self.errors if not self.nodes[name].optional]
+                if failed:
+                    raise self.errors[failed[0]]
+
+                pending = [task for name, task in self._running.items() if not self._is_done(name)]
+                if not pending:
+                    blocked = [name for name in self.nodes if not self._is_done(name)]
+                    if blocked:
+                        raise Exception(f"Dépendances introuvables pour: {', '.join(blocked)}")
+                    return self.results
+
+                await self._changed.wait()
+        finally:
+            for task in self._running.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+            for cleanup in self._cleanups:
+                await cleanup()
@@ -0,0 +1,180 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+from config import config
+
+# Événements qui terminent un flux de progression
+TERMINAL_EVENTS = ("completed", "failed", "cancelled")
+
+class ProgressEvent:
+    """Événement de progression numéroté (id croissant par animation)"""
+
+    def __init__(self, event_id: int, event: str, data: Dict[str, Any]):
+        self.event_id = event_id
+        self.event = event
+        self.data = data
+
+    def to_sse(self) -> str:
+        """Format Server-Sent Events"""
+        return f"id: {self.event_id}\nevent: {self.event}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Format JSON (WebSocket)"""
+        return {"id": self.event_id, "event": self.event, "data": self.data}
+
+class _AnimationStream:
+    """Historique et abonnés d'une animation"""
+
+    def __init__(self, history_size: int):
+        self.history: Deque[ProgressEvent] = deque(maxlen=history_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.last_progress: Dict[str, Any] = {}
+        self.next_id = 1
+        self.closed = False
+
+class ProgressBroadcaster:
+    """Diffusion en push de la progression des animations (SSE / WebSocket)
+
+    Les mises à jour sont envoyées sous forme de deltas (seuls les champs modifiés),
+    avec un historique borné par animation pour la reprise depuis un id d'événement.
+    """
+
+    def __init__(self):
+        self.history_size = config.PROGRESS_STREAM_HISTORY
+        self.retention_seconds = config.PROGRESS_STREAM_RETENTION
+        self.heartbeat_interval = config.PROGRESS_STREAM_HEARTBEAT
+        self.poll_interval = config.PROGRESS_STREAM_POLL_INTERVAL
+        self._streams: Dict[str, _AnimationStream] = {}
+        # Relais depuis le stockage des jobs pour les animations d'un autre worker
+        self._followers: Dict[str, asyncio.Task] = {}
+
+    def has_stream(self, animation_id: str) -> bool:
+        return animation_id in self._streams
+
+    def subscriber_count(self, animation_id: str) -> int:
+        stream = self._streams.get(animation_id)
+        return len(stream.subscribers) if stream else 0
+
+    def _get_stream(self, animation_id: str) -> _AnimationStream:
+        stream = self._streams.get(animation_id)
+        if stream is None:
+            stream = _AnimationStream(self.history_size)
+            self._streams[animation_id] = stream
+        return stream
+
+    def publish(self, animation_id: str, event: str, data: Dict[str, Any]) -> ProgressEvent:
+        """Publie un événement à tous les abonnés de l'animation"""
+        stream = self._get_stream(animation_id)
+        progress_event = ProgressEvent(stream.next_id, event, data)
+        stream.next_id += 1
+        stream.history.append(progress_event)
+
+        for queue in list(stream.subscribers):
+            queue.put_nowait(progress_event)
+
+        if event in TERMINAL_EVENTS and not stream.closed:
+            stream.closed = True
+            # Garder l'historique un moment pour les reconnexions tardives
+            asyncio.get_running_loop().call_later(self.retention_seconds, self._streams.pop, animation_id, None)
+
+        return progress_event
+
+    def publish_progress(self, animation_id: str, progress: Dict[str, Any]) -> Optional[ProgressEvent]:
+        """Publie uniquement les champs de progression qui ont changé"""
+        stream = self._get_stream(animation_id)
+        delta = {key: value for key, value in progress.items() if stream.last_progress.get(key) != value}
+        stream.last_progress.update(progress)
+        if not delta:
+            return None
+        delta["animation_id"] = animation_id
+        return self.publish(animation_id, "progress", delta)
+
+    def _replay(self, stream: _AnimationStream, last_event_id: Optional[int]) -> List[ProgressEvent]:
+        """Événements de l'historique postérieurs à last_event_id"""
+        if last_event_id is None:
+            # Nouvel abonné: un instantané complet de la progression plutôt que tous les deltas
+            events = [event for event in stream.history if event.event != "progress"]
+            if stream.last_progress:
+                progress_ids = [event.event_id for event in stream.history if event.event == "progress"]
+                snapshot_id = max(progress_ids, default=stream.next_id - 1)
+                events.append(ProgressEvent(snapshot_id, "progress", dict(stream.last_progress)))
+            events.sort(key=lambda event: event.event_id)
+            return events
+        return [event for event in stream.history if event.event_id > last_event_id]
+
+    async def subscribe(self, animation_id: str, last_event_id: Optional[int] = None) -> AsyncIterator[Optional[ProgressEvent]]:
+        """Itère sur les événements d'une animation (None = heartbeat)
+
+        Le flux se termine après un événement terminal.
+        """
+        stream = self._get_stream(animation_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        stream.subscribers.add(queue)
+
+        try:
+            replayed = self._replay(stream, last_event_id)
+            for event in replayed:
+                yield event
+                if event.event in TERMINAL_EVENTS:
+                    return
+
+            last_sent = replayed[-1].event_id if replayed else (last_event_id or 0)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+
+                if event.event_id <= last_sent:
+                    continue
+                last_sent = event.event_id
+                yield event
+                if event.event in TERMINAL_EVENTS:
+                    return
+        finally:
+            stream.subscribers.discard(queue)
+
+    def follow_job_store(self, job_store, animation_id: str):
+        """Relaie la progression depuis le stockage des jobs
+
+        Utilisé quand l'animation tourne dans un autre worker: un seul poll du
+        stockage par animation, partagé par tous les abonnés de ce worker.
+        """
+        if animation_id in self._streams or animation_id in self._followers:
+            return
+        self._get_stream(animation_id)
+        self._followers[animation_id] = asyncio.create_task(self._follow(job_store, animation_id))
+
+    async def _follow(self, job_store, animation_id: str):
+        try:
+            while True:
+                job = await job_store.get_job_async(animation_id)
+                if job is None:
+                    self.publish(animation_id, "failed", {"error": "Animation non trouvée"})
+                    return
+                if job["status"] in TERMINAL_EVENTS:
+                    self.publish(animation_id, job["status"], job["result"] or {})
+                    return
+
+                self.publish_progress(animation_id, job["progress"] or {"status": job["status"]})
+                await asyncio.sleep(self.poll_interval)
+
+                # Plus personne n'écoute: arrêter le relais
+                stream = self._streams.get(animation_id)
+                if stream is None or not stream.subscribers:
+                    self._streams.pop(animation_id, None)
+                    return
+        finally:
+            self._followers.pop(animation_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "streams": len(self._streams),
+            "followers": len(self._followers),
+            "subscribers": sum(len(stream.subscribers) for stream in self._streams.values())
+        }
+
+# Instance globale partagée
+progress_broadcaster = ProgressBroadcaster()
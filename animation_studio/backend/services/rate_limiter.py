@@ -0,0 +1,205 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+from config import config
+from .metrics import metrics
+
+# Animation courante (propagée aux tâches du pipeline) pour le partage équitable
+current_owner: contextvars.ContextVar[str] = contextvars.ContextVar("rate_limit_owner", default="default")
+
+def retry_after(response) -> Optional[float]:
+    """Délai Retry-After (secondes) d'une réponse 429, s'il est fourni"""
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+class _ProviderLimit:
+    """Seau à jetons + plafond de jobs simultanés pour un couple fournisseur/modèle"""
+
+    def __init__(self, key: str, concurrency: int, rate: float, burst: int):
+        self.key = key
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+        self.active = 0
+        self.active_by_owner: Dict[str, int] = {}
+        # File d'attente par animation, servie à tour de rôle
+        self.waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self.granted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        else:
+            self.tokens = float(self.burst)
+        self.updated = now
+
+    def _can_grant(self, now: float) -> bool:
+        return self.active < self.concurrency and self.tokens >= 1 and now >= self.blocked_until
+
+    def _grant(self, owner: str):
+        self.tokens -= 1
+        self.active += 1
+        self.active_by_owner[owner] = self.active_by_owner.get(owner, 0) + 1
+        self.granted += 1
+
+    def release(self, owner: str):
+        self.active -= 1
+        remaining = self.active_by_owner.get(owner, 1) - 1
+        if remaining > 0:
+            self.active_by_owner[owner] = remaining
+        else:
+            self.active_by_owner.pop(owner, None)
+        self._dispatch()
+
+    def throttle(self, delay: float):
+        """Suspend les soumissions (réponse 429 du fournisseur)"""
+        self.throttled += 1
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self._dispatch()
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def _dispatch(self):
+        """Attribue les places libres aux animations en attente, la moins servie d'abord"""
+        now = time.monotonic()
+        self._refill(now)
+
+        while self.waiters and self.active < self.concurrency:
+            if not self._can_grant(now):
+                if self._wakeup is None:
+                    delay = max(self.blocked_until - now, (1 - self.tokens) / self.rate if self.rate > 0 else 0)
+                    self._wakeup = asyncio.get_running_loop().call_later(max(delay, 0.01), self._on_wakeup)
+                return
+
+            # min() garde l'ordre d'insertion en cas d'égalité: tourniquet entre animations
+            owner = min(self.waiters, key=lambda name: self.active_by_owner.get(name, 0))
+            queue = self.waiters[owner]
+            future = queue.popleft()
+            if queue:
+                self.waiters.move_to_end(owner)
+            else:
+                del self.waiters[owner]
+
+            if future.done():
+                continue
+            self._grant(owner)
+            future.set_result(None)
+
+    async def acquire(self, owner: str):
+        now = time.monotonic()
+        self._refill(now)
+        if not self.waiters and self._can_grant(now):
+            self._grant(owner)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(owner, deque()).append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Place attribuée pendant l'annulation: la rendre
+                self.release(owner)
+            raise
+        self.total_wait += time.monotonic() - now
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "rate_per_second": self.rate,
+            "active": self.active,
+            "waiting": sum(len(queue) for queue in self.waiters.values()),
+            "owners": len(self.active_by_owner),
+            "tokens": round(self.tokens, 2),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "average_wait": round(self.total_wait / self.granted, 3) if self.granted else 0.0
+        }
+
+class ProviderRateLimiter:
+    """Régulateur global des appels fournisseurs (Wavespeed, FAL AI, OpenAI)
+
+    Chaque couple fournisseur/modèle a un seau à jetons (débit de soumission) et un
+    plafond de jobs simultanés, partagés par toutes les animations du processus. Les
+    places libérées sont attribuées en priorité à l'animation qui en occupe le moins.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        # Limites par fournisseur (concurrency, rate par seconde, burst)
+        self.limits = limits or {
+            "wavespeed": {
+                "concurrency": config.WAVESPEED_MAX_CONCURRENT_JOBS,
+                "rate": config.WAVESPEED_REQUESTS_PER_SECOND,
+                "burst": config.WAVESPEED_BURST
+            },
+            "fal_audio": {
+                "concurrency": config.FAL_AUDIO_MAX_CONCURRENT_JOBS,
+                "rate": config.FAL_REQUESTS_PER_SECOND,
+                "burst": config.FAL_BURST
+            },
+            "fal_ffmpeg": {
+                "concurrency": config.FAL_FFMPEG_MAX_CONCURRENT_JOBS,
+                "rate": config.FAL_REQUESTS_PER_SECOND,
+                "burst": config.FAL_BURST
+            },
+            "openai": {
+                "concurrency": config.OPENAI_MAX_CONCURRENT_REQUESTS,
+                "rate": config.OPENAI_REQUESTS_PER_SECOND,
+                "burst": config.OPENAI_BURST
+            }
+        }
+        self._buckets: Dict[str, _ProviderLimit] = {}
+
+    def _get_limit(self, provider: str, model: str) -> _ProviderLimit:
+        key = f"{provider}:{model}"
+        limit = self._buckets.get(key)
+        if limit is None:
+            settings = self.limits[provider]
+            limit = _ProviderLimit(key, int(settings["concurrency"]), float(settings["rate"]), int(settings["burst"]))
+            self._buckets[key] = limit
+        return limit
+
+    def max_concurrency(self, provider: str) -> int:
+        return int(self.limits[provider]["concurrency"])
+
+    @asynccontextmanager
+    async def acquire(self, provider: str, model: str, owner: Optional[str] = None):
+        """Réserve une place pour un job fournisseur (soumission + attente du résultat)"""
+        limit = self._get_limit(provider, model)
+        owner = owner or current_owner.get()
+        requested = time.perf_counter()
+        await limit.acquire(owner)
+        granted = time.perf_counter()
+        metrics.slot_wait.observe(granted - requested, provider=provider)
+        try:
+            yield
+        finally:
+            limit.release(owner)
+            metrics.slot_held.observe(time.perf_counter() - granted, provider=provider)
+
+    def throttle(self, provider: str, model: str, retry_after: Optional[float] = None):
+        """Le fournisseur a répondu 429: plus de soumissions pendant retry_after secondes"""
+        self._get_limit(provider, model).throttle(retry_after or config.RATE_LIMIT_THROTTLE_SECONDS)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: limit.get_stats() for key, limit in self._buckets.items()}
+
+# Instance globale partagée
+rate_limiter = ProviderRateLimiter()
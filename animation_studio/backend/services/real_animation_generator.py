@@ -2,26 +2,47 @@
 Service de génération d'animations réelles utilisant les APIs Wavespeed et Fal AI
 Basé sur le workflow zseedance.json
 """
-import aiohttp
 import asyncio
 import json
 import logging
 from typing import List, Dict, Any, Optional
 import os
 from datetime import datetime
+from config import config
+from .http_client import ProviderHttpClient, ProviderHTTPError, http_client as shared_http_client
+from .job_waiter import JobCompletionWaiter, completion_waiter as shared_completion_waiter
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter
+from .endpoint_registry import ProviderEndpointRegistry, endpoint_registry as shared_endpoint_registry
 
 logger = logging.getLogger(__name__)
 
 class RealAnimationGenerator:
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[ProviderHttpClient] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        completion_waiter: Optional[JobCompletionWaiter] = None,
+        endpoints: Optional[ProviderEndpointRegistry] = None
+    ):
         # APIs keys - à configurer dans les variables d'environnement
         self.wavespeed_api_key = os.getenv("WAVESPEED_API_KEY")
         self.fal_api_key = os.getenv("FAL_API_KEY") 
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         
-        # URLs des APIs
-        self.wavespeed_base_url = "https://api.wavespeed.ai/api/v3"
-        self.fal_base_url = "https://queue.fal.run"
+        # URLs des APIs (variante qui répond, disjoncteur sur les autres) et modèles
+        self.endpoints = endpoints or shared_endpoint_registry
+        self.video_model = config.WAVESPEED_MODEL
+        self.audio_model = config.FAL_AUDIO_MODEL
+        self.compose_model = config.FAL_FFMPEG_MODEL
+        
+        # Sessions HTTP partagées (keep-alive entre soumission et récupération)
+        self.http_client = http_client or shared_http_client
+        
+        # Fin des jobs fournisseurs: webhook ou polling adaptatif
+        self.completion_waiter = completion_waiter or shared_completion_waiter
+        
+        # Limites fournisseurs globales, partagées avec le pipeline principal
+        self.rate_limiter = rate_limiter or shared_rate_limiter
         
         # Vérifier si les APIs sont configurées
         self.apis_configured = bool(self.wavespeed_api_key and self.fal_api_key)
@@ -103,35 +124,19 @@ class RealAnimationGenerator:
             "prompt": full_prompt
         }
         
-        async with aiohttp.ClientSession() as session:
-            # Créer la requête de génération
-            async with session.post(
-                f"{self.wavespeed_base_url}/bytedance/seedance-v1-pro-t2v-480p",
-                headers=headers,
-                json=payload
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Wavespeed API error: {error_text}")
-                
-                result = await response.json()
-                prediction_id = result["data"]["id"]
-                
-            # Attendre et récupérer le résultat
-            await asyncio.sleep(60)  # Attente initiale
-            
-            async with session.get(
-                f"{self.wavespeed_base_url}/predictions/{prediction_id}/result",
-                headers=headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to get video result")
-                
-                result = await response.json()
-                if result.get("status") == "completed":
-                    return result["data"]["outputs"][0]
-                else:
-                    raise Exception(f"Video generation failed: {result}")
+        # Créer la requête de génération
+        result = await self._submit("wavespeed", f"/{self.video_model}", headers, payload, "Wavespeed API")
+        prediction_id = result["data"]["id"]
+        
+        # Attendre le résultat (webhook ou polling adaptatif, sans attente fixe)
+        return await self.completion_waiter.wait_for(
+            "video",
+            prediction_id,
+            lambda: self._check_result(
+                "wavespeed", f"/predictions/{prediction_id}/result", {"Authorization": headers["Authorization"]}
+            ),
+            timeout=config.VIDEO_JOB_TIMEOUT
+        )
     
     async def create_audio(self, sound_prompt: str, video_url: str) -> str:
         """Crée l'audio avec Fal AI MMAudio"""
@@ -139,93 +144,117 @@ class RealAnimationGenerator:
         if not self.fal_api_key:
             raise ValueError("FAL_API_KEY not configured")
         
-        headers = {
-            "Authorization": f"Key {self.fal_api_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "prompt": f"sound effects: {sound_prompt}. Dramatic, cinematic",
             "duration": 10,
             "video_url": video_url
         }
-        
-        async with aiohttp.ClientSession() as session:
-            # Créer la requête audio
-            async with session.post(
-                f"{self.fal_base_url}/fal-ai/mmaudio-v2",
-                headers=headers,
-                json=payload
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Fal AI audio error: {error_text}")
-                
-                result = await response.json()
-                request_id = result["request_id"]
-                
-            # Attendre et récupérer le résultat
-            await asyncio.sleep(60)
-            
-            async with session.get(
-                f"{self.fal_base_url}/fal-ai/mmaudio-v2/requests/{request_id}",
-                headers=headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception("Failed to get audio result")
-                
-                result = await response.json()
-                return result["video_url"]  # Vidéo avec audio
+        return await self._run_fal_job("audio", self.audio_model, payload, config.AUDIO_JOB_TIMEOUT)
     
     async def compose_final_video(self, video_urls: List[str]) -> str:
         """Assemble les clips en vidéo finale avec Fal AI FFmpeg"""
         
-        headers = {
-            "Authorization": f"Key {self.fal_api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        # Structure comme dans zseedance
+        # Structure comme dans zseedance (clips de 10 secondes mis bout à bout)
         tracks = {
             "tracks": [
                 {
                     "id": "1",
                     "type": "video",
                     "keyframes": [
-                        {"url": video_urls[0], "timestamp": 0, "duration": 10},
-                        {"url": video_urls[1], "timestamp": 10, "duration": 10},
-                        {"url": video_urls[2], "timestamp": 20, "duration": 10}
+                        {"url": url, "timestamp": index * 10, "duration": 10}
+                        for index, url in enumerate(video_urls)
                     ]
                 }
             ]
         }
+        return await self._run_fal_job("assembly", self.compose_model, tracks, config.ASSEMBLY_JOB_TIMEOUT)
+    
+    async def _run_fal_job(self, stage: str, model: str, payload: Dict[str, Any], timeout: float) -> str:
+        """Soumet un job à la file FAL AI et attend son résultat (annulé avec la génération)"""
+        
+        headers = {
+            "Authorization": f"Key {self.fal_api_key}",
+            "Content-Type": "application/json"
+        }
         
-        async with aiohttp.ClientSession() as session:
-            # Créer la composition
-            async with session.post(
-                f"{self.fal_base_url}/fal-ai/ffmpeg-api/compose",
-                headers=headers,
-                json=tracks
-            ) as response:
-                if response.status != 200:
+        result = await self._submit("fal", f"/{model}", headers, payload, f"Fal AI {stage}")
+        request_id = result["request_id"]
+        
+        auth = {"Authorization": headers["Authorization"]}
+        try:
+            return await self.completion_waiter.wait_for(
+                stage,
+                request_id,
+                lambda: self._check_result("fal", f"/{model}/requests/{request_id}", auth),
+                timeout=timeout
+            )
+        except asyncio.CancelledError:
+            # Génération annulée: abandonner aussi le job côté FAL AI (sauf arrêt du serveur)
+            if self.completion_waiter.should_cancel_provider_job():
+                self.http_client.send_in_background(
+                    "PUT", f"{self.endpoints.preferred('fal')}/{model}/requests/{request_id}/cancel", headers=auth
+                )
+            raise
+    
+    async def _submit(self, provider: str, path: str, headers: Dict[str, str], payload: Dict[str, Any],
+                      label: str) -> Dict[str, Any]:
+        """Soumet un job sur la première variante d'URL du fournisseur qui répond"""
+        
+        async def post(base_url: str) -> Dict[str, Any]:
+            url = f"{base_url}{path}"
+            session = await self.http_client.get_session(url)
+            async with session.post(url, headers=headers, json=payload) as response:
+                if response.status not in (200, 201):
                     error_text = await response.text()
-                    raise Exception(f"Fal AI compose error: {error_text}")
-                
-                result = await response.json()
-                request_id = result["request_id"]
-                
-            # Attendre et récupérer le résultat
-            await asyncio.sleep(60)
-            
-            async with session.get(
-                f"{self.fal_base_url}/fal-ai/ffmpeg-api/requests/{request_id}",
-                headers=headers
-            ) as response:
+                    raise ProviderHTTPError(response.status, f"{label} error: {error_text}")
+                return await response.json()
+        
+        return await self.endpoints.call(provider, post)
+    
+    async def _check_result(self, provider: str, path: str, headers: Dict[str, str]) -> Optional[str]:
+        """Interroge un job une fois: URL du média si terminé, None si encore en cours"""
+        
+        async def fetch(base_url: str) -> Optional[Dict[str, Any]]:
+            url = f"{base_url}{path}"
+            session = await self.http_client.get_session(url)
+            async with session.get(url, headers=headers) as response:
+                if response.status == 404:
+                    # Job pas encore visible
+                    return None
                 if response.status != 200:
-                    raise Exception("Failed to get final video")
-                
-                result = await response.json()
-                return result["video_url"]
+                    raise ProviderHTTPError(response.status, f"Failed to get result ({response.status})")
+                return await response.json()
+        
+        result = await self.endpoints.call(provider, fetch)
+        if result is None:
+            return None
+        
+        # Wavespeed enveloppe le résultat dans "data", FAL AI non
+        data = result.get("data", result)
+        status = data.get("status")
+        if status == "failed":
+            raise Exception(f"Generation failed: {data.get('error', data)}")
+        if status != "completed":
+            return None
+        if data.get("outputs"):
+            return data["outputs"][0]
+        for key in ("video", "audio"):
+            if isinstance(data.get(key), dict) and data[key].get("url"):
+                return data[key]["url"]
+        if data.get("video_url"):
+            return data["video_url"]
+        raise Exception(f"No media URL in result: {data}")
+    
+    async def _create_scene_clip(self, index: int, scene: str, idea_data: Dict[str, Any]) -> str:
+        """Clip d'une scène puis son audio, enchaîné dès que le clip est prêt"""
+        
+        logger.info(f"Creating REAL clip {index + 1}/{len(idea_data['scenes'])}: {scene}")
+        async with self.rate_limiter.acquire("wavespeed", self.video_model):
+            video_url = await self.create_video_clip(scene, idea_data["idea"], idea_data["environment"])
+        
+        logger.info(f"Adding REAL audio to clip {index + 1}")
+        async with self.rate_limiter.acquire("fal_audio", self.audio_model):
+            return await self.create_audio(idea_data["sound"], video_url)
     
     async def generate_complete_animation(self, theme: str, duration: int = 30) -> Dict[str, Any]:
         """Pipeline complet de génération d'animation réelle ou démo"""
@@ -242,31 +271,24 @@ class RealAnimationGenerator:
                 logger.warning("APIs non configurées - génération mode démo")
                 return await self._generate_demo_animation(idea_data, theme, duration)
             
-            # 2. Créer les clips vidéo RÉELS
-            logger.info("Creating REAL video clips...")
-            video_urls = []
-            for i, scene in enumerate(idea_data["scenes"]):
-                logger.info(f"Creating REAL clip {i+1}/3: {scene}")
-                video_url = await self.create_video_clip(
-                    scene, 
-                    idea_data["idea"], 
-                    idea_data["environment"]
-                )
-                video_urls.append(video_url)
-            
-            # 3. Ajouter l'audio aux clips
-            logger.info("Adding REAL audio to clips...")
-            audio_video_urls = []
-            for video_url in video_urls:
-                audio_video_url = await self.create_audio(
-                    idea_data["sound"], 
-                    video_url
-                )
-                audio_video_urls.append(audio_video_url)
+            # 2-3. Tous les clips soumis d'emblée (concurrence bornée par le régulateur global),
+            # l'audio de chaque clip démarrant dès que ce clip est prêt; résultats dans l'ordre des scènes
+            logger.info("Creating REAL video clips with audio...")
+            try:
+                async with asyncio.TaskGroup() as group:
+                    scene_tasks = [
+                        group.create_task(self._create_scene_clip(index, scene, idea_data))
+                        for index, scene in enumerate(idea_data["scenes"])
+                    ]
+            except ExceptionGroup as errors:
+                # Premier échec: les autres clips sont annulés, la génération échoue de toute façon
+                raise errors.exceptions[0]
+            audio_video_urls = [task.result() for task in scene_tasks]
             
             # 4. Assembler la vidéo finale
             logger.info("Composing REAL final video...")
-            final_video_url = await self.compose_final_video(audio_video_urls)
+            async with self.rate_limiter.acquire("fal_ffmpeg", self.compose_model):
+                final_video_url = await self.compose_final_video(audio_video_urls)
             
             logger.info("REAL Animation generation completed successfully!")
             
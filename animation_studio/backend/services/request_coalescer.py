@@ -0,0 +1,100 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config import config
+from .job_store import JobStore, TERMINAL_STATUSES, job_store as shared_job_store
+
+class RequestCoalescer:
+    """Regroupement (singleflight) des générations identiques en cours
+
+    Deux requêtes de même empreinte (paramètres normalisés + réglages des modèles)
+    reçues pendant qu'une génération est en cours partagent le même job: la seconde
+    récupère l'identifiant du job en vol, donc son statut, son flux de progression et
+    son résultat, au lieu de payer une seconde génération.
+    """
+
+    def __init__(self, job_store: Optional[JobStore] = None):
+        self.job_store = job_store or shared_job_store
+        # Empreinte -> identifiant du job en vol
+        self._in_flight: Dict[str, str] = {}
+        # Identifiant du job en vol -> nombre de clients qui le suivent (demandeur + rattachés)
+        self._followers: Dict[str, int] = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def fingerprint(kind: str, **params: Any) -> str:
+        """Empreinte d'une requête: paramètres normalisés et réglages de génération"""
+        normalized = {
+            key: " ".join(value.lower().split()) if isinstance(value, str) else value
+            for key, value in params.items()
+        }
+        payload = {
+            "kind": kind,
+            "params": normalized,
+            "models": [
+                config.TEXT_MODEL, config.WAVESPEED_MODEL, config.FAL_AUDIO_MODEL,
+                config.VIDEO_ASPECT_RATIO, config.VIDEO_RESOLUTION,
+                config.STORY_PLAN_MODE, config.ASSEMBLY_BACKEND, config.PIPELINE_ENGINE
+            ]
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get_leader(self, fingerprint: str) -> Optional[str]:
+        """Job en vol pour cette empreinte (None si aucun ou s'il est terminé)"""
+        job_id = self._in_flight.get(fingerprint)
+        if job_id is None:
+            return None
+
+        job = self.job_store.get_job(job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            self.release(fingerprint, job_id)
+            return None
+
+        self.coalesced += 1
+        self._followers[job_id] = self._followers.get(job_id, 1) + 1
+        return job_id
+
+    def register(self, fingerprint: str, job_id: str):
+        """Enregistre le job qui porte la génération pour cette empreinte"""
+        self._in_flight[fingerprint] = job_id
+        self._followers[job_id] = 1
+        self.leaders += 1
+
+    def release(self, fingerprint: str, job_id: str):
+        if self._in_flight.get(fingerprint) == job_id:
+            del self._in_flight[fingerprint]
+        self._followers.pop(job_id, None)
+
+    def detach(self, job_id: str) -> bool:
+        """Détache un client du job; True si plus personne ne le suit (le job peut être annulé)
+
+        Un job non regroupé n'a qu'un seul client: l'annulation est toujours possible.
+        """
+        followers = self._followers.get(job_id)
+        if followers is None or followers <= 1:
+            self._followers.pop(job_id, None)
+            return True
+        self._followers[job_id] = followers - 1
+        return False
+
+    def track(self, fingerprint: str, job_id: str, job: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """Enveloppe un job de la file pour libérer l'empreinte à sa fin (succès, échec ou annulation)"""
+        async def run():
+            try:
+                return await job()
+            finally:
+                self.release(fingerprint, job_id)
+        return run
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
+
+# Instance globale partagée
+request_coalescer = RequestCoalescer()
@@ -1,15 +1,18 @@
 import json
 import math
-from typing import List
+from typing import AsyncIterator, List, Optional
 from openai import AsyncOpenAI
 from config import config
 from models.schemas import StoryIdea, Scene
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter
+from .json_stream import IncrementalJsonParser
 
 class SceneCreator:
     """Service de création de scènes détaillées pour l'animation"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[ProviderRateLimiter] = None):
         self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.rate_limiter = rate_limiter or shared_rate_limiter
     
     def calculate_scene_distribution(self, total_duration: int) -> List[int]:
         """Calcule la distribution optimale des scènes selon la durée totale"""
@@ -74,15 +77,11 @@ json
   "Scene N": "Description de la dernière scène..."
 }}"""
 
-    async def create_scenes_from_idea(self, story_idea: StoryIdea, duration: int) -> List[Scene]:
-        """Crée des scènes détaillées à partir d'une idée d'histoire"""
-        
-        scene_durations = self.calculate_scene_distribution(duration)
+    def create_scene_user_prompt(self, story_idea: StoryIdea, duration: int, scene_durations: List[int]) -> str:
+        """Prompt utilisateur de découpage d'une idée en scènes"""
         num_scenes = len(scene_durations)
         
-        system_prompt = self.create_scene_system_prompt()
-        
-        user_prompt = f"""Crée {num_scenes} scènes cinématographiques détaillées basées sur cette idée d'histoire:
+        return f"""Crée {num_scenes} scènes cinématographiques détaillées basées sur cette idée d'histoire:
 
 IDÉE: {story_idea.idea}
 ENVIRONNEMENT: {story_idea.environment}
@@ -104,16 +103,27 @@ Chaque scène doit:
 
 Respecte exactement le format JSON demandé avec Scene 1, Scene 2, etc."""
 
+    async def create_scenes_from_idea(self, story_idea: StoryIdea, duration: int) -> List[Scene]:
+        """Crée des scènes détaillées à partir d'une idée d'histoire"""
+        
+        scene_durations = self.calculate_scene_distribution(duration)
+        num_scenes = len(scene_durations)
+        
+        system_prompt = self.create_scene_system_prompt()
+        
+        user_prompt = self.create_scene_user_prompt(story_idea, duration, scene_durations)
+
         try:
-            response = await self.client.chat.completions.create(
-                model=config.TEXT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.8,  # Créativité contrôlée
-                max_tokens=2000
-            )
+            async with self.rate_limiter.acquire("openai", config.TEXT_MODEL):
+                response = await self.client.chat.completions.create(
+                    model=config.TEXT_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.8,  # Créativité contrôlée
+                    max_tokens=2000
+                )
             
             # Parser la réponse JSON
             content = response.choices[0].message.content.strip()
@@ -155,6 +165,57 @@ Respecte exactement le format JSON demandé avec Scene 1, Scene 2, etc."""
         except Exception as e:
             raise Exception(f"Erreur lors de la création des scènes: {str(e)}")
 
+    async def stream_scenes_from_idea(self, story_idea: StoryIdea, duration: int) -> AsyncIterator[Scene]:
+        """Variante en streaming: chaque scène est produite dès que sa description est complète
+        
+        Les clips peuvent ainsi être lancés pendant que le modèle écrit les scènes suivantes.
+        Les scènes manquantes en fin de flux sont complétées par des scènes de fallback.
+        """
+        
+        scene_durations = self.calculate_scene_distribution(duration)
+        num_scenes = len(scene_durations)
+        scene_keys = {f"Scene {i + 1}": i for i in range(num_scenes)}
+        produced = set()
+        
+        try:
+            async with self.rate_limiter.acquire("openai", config.TEXT_MODEL):
+                stream = await self.client.chat.completions.create(
+                    model=config.TEXT_MODEL,
+                    messages=[
+                        {"role": "system", "content": self.create_scene_system_prompt()},
+                        {"role": "user", "content": self.create_scene_user_prompt(story_idea, duration, scene_durations)}
+                    ],
+                    temperature=0.8,  # Créativité contrôlée
+                    max_tokens=2000,
+                    stream=True
+                )
+                
+                parser = IncrementalJsonParser()
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    for path, value in parser.feed(chunk.choices[0].delta.content or ""):
+                        index = scene_keys.get(path[0]) if len(path) == 1 else None
+                        if index is None or index in produced:
+                            continue
+                        produced.add(index)
+                        yield Scene(
+                            scene_number=index + 1,
+                            description=value,
+                            duration=scene_durations[index],
+                            prompt=self.optimize_prompt_for_seedance(value, story_idea.environment, index + 1)
+                        )
+        
+        except Exception as e:
+            if not produced:
+                raise Exception(f"Erreur lors de la création des scènes: {str(e)}")
+            print(f"Avertissement: flux de scènes interrompu: {e}")
+        
+        # Compléter les scènes absentes du flux
+        for scene in self.create_fallback_scenes(story_idea, scene_durations):
+            if scene.scene_number - 1 not in produced:
+                yield scene
+
     def optimize_prompt_for_seedance(self, scene_description: str, environment: str, scene_number: int) -> str:
         """Optimise le prompt pour la génération vidéo SeedANce/Wavespeed"""
         
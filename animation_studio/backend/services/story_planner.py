@@ -0,0 +1,207 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from openai import AsyncOpenAI
+from config import config
+from models.schemas import StoryIdea, Scene, StoryPlan, AnimationTheme
+from .idea_generator import IdeaGenerator
+from .scene_creator import SceneCreator
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter
+from .json_stream import IncrementalJsonParser
+
+class StoryPlanner:
+    """Génération de l'idée et de toutes les scènes en un seul appel OpenAI
+
+    La réponse est contrainte par un schéma JSON (structured outputs): plus de
+    nettoyage des balises markdown ni d'appel perdu sur une erreur de parsing, et
+    un aller-retour LLM de moins sur le chemin critique de chaque animation.
+    """
+
+    def __init__(
+        self,
+        idea_generator: Optional[IdeaGenerator] = None,
+        scene_creator: Optional[SceneCreator] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None
+    ):
+        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.idea_generator = idea_generator or IdeaGenerator(rate_limiter=self.rate_limiter)
+        self.scene_creator = scene_creator or SceneCreator(rate_limiter=self.rate_limiter)
+
+    @staticmethod
+    def _without_output_format(prompt: str) -> str:
+        """Retire la section FORMAT DE SORTIE (remplacée par le schéma JSON)"""
+        return prompt.split("FORMAT DE SORTIE:")[0].strip()
+
+    def create_plan_schema(self, num_scenes: int) -> Dict[str, Any]:
+        """Schéma JSON strict du plan: idée + exactement num_scenes scènes"""
+        return {
+            "type": "object",
+            "properties": {
+                "caption": {"type": "string"},
+                "idea": {"type": "string"},
+                "environment": {"type": "string"},
+                "sound": {"type": "string"},
+                "scenes": {
+                    "type": "array",
+                    "minItems": num_scenes,
+                    "maxItems": num_scenes,
+                    "items": {
+                        "type": "object",
+                        "properties": {"description": {"type": "string"}},
+                        "required": ["description"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["caption", "idea", "environment", "sound", "scenes"],
+            "additionalProperties": False
+        }
+
+    def create_plan_system_prompt(self, theme: AnimationTheme) -> str:
+        """Prompts système de l'idée et des scènes, sans leurs formats de sortie respectifs"""
+        idea_prompt = self._without_output_format(self.idea_generator.create_system_prompt(theme))
+        scene_prompt = self._without_output_format(self.scene_creator.create_scene_system_prompt())
+        return f"""{idea_prompt}
+
+{scene_prompt}
+
+Tu produis l'idée ET toutes ses scènes en une seule réponse, au format JSON imposé."""
+
+    def create_plan_request(self, theme: AnimationTheme, duration: int, scene_durations: List[int]) -> Dict[str, Any]:
+        """Paramètres de l'appel OpenAI (messages + schéma de sortie)"""
+        num_scenes = len(scene_durations)
+
+        user_prompt = f"""Génère une idée de dessin animé sur le thème "{theme.value}" d'une durée de {duration} secondes,
+puis découpe-la en {num_scenes} scènes cinématographiques détaillées ({scene_durations} secondes chacune).
+
+L'histoire doit être:
+- Adaptée aux enfants de 3-8 ans
+- Éducative et positive
+- Complète avec début (scènes 1-2), développement et conclusion satisfaisante
+
+Chaque scène doit:
+- Être optimisée pour la génération vidéo SeedANce/Wavespeed
+- Inclure des mouvements, actions et mouvements de caméra spécifiques
+- Avoir une progression narrative claire"""
+
+        return {
+            "model": config.TEXT_MODEL,
+            "messages": [
+                {"role": "system", "content": self.create_plan_system_prompt(theme)},
+                {"role": "user", "content": user_prompt}
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "story_plan",
+                    "strict": True,
+                    "schema": self.create_plan_schema(num_scenes)
+                }
+            },
+            "temperature": 0.9,
+            "max_tokens": 2500
+        }
+
+    def build_plan(self, plan_data: Dict[str, Any], scene_durations: List[int]) -> StoryPlan:
+        """Valide la réponse du modèle en StoryIdea + List[Scene]"""
+        story_idea = StoryIdea(
+            caption=plan_data["caption"],
+            idea=plan_data["idea"],
+            environment=plan_data["environment"],
+            sound=plan_data["sound"]
+        )
+
+        scenes = []
+        for i, (scene_data, duration) in enumerate(zip(plan_data["scenes"], scene_durations)):
+            scenes.append(Scene(
+                scene_number=i + 1,
+                description=scene_data["description"],
+                duration=duration,
+                prompt=self.scene_creator.optimize_prompt_for_seedance(
+                    scene_data["description"],
+                    story_idea.environment,
+                    i + 1
+                )
+            ))
+
+        if len(scenes) != len(scene_durations):
+            raise Exception(f"Plan incomplet: {len(scenes)} scènes au lieu de {len(scene_durations)}")
+
+        return StoryPlan(story_idea=story_idea, scenes=scenes)
+
+    async def generate_story_plan(self, theme: AnimationTheme, duration: int) -> StoryPlan:
+        """Génère l'idée et les scènes d'une animation en un seul appel"""
+
+        scene_durations = self.scene_creator.calculate_scene_distribution(duration)
+
+        try:
+            async with self.rate_limiter.acquire("openai", config.TEXT_MODEL):
+                response = await self.client.chat.completions.create(
+                    **self.create_plan_request(theme, duration, scene_durations)
+                )
+
+            message = response.choices[0].message
+            if getattr(message, "refusal", None):
+                raise Exception(f"Plan refusé par le modèle: {message.refusal}")
+
+            return self.build_plan(json.loads(message.content), scene_durations)
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la génération du plan d'histoire: {str(e)}")
+
+    async def stream_story_plan(self, theme: AnimationTheme, duration: int) -> AsyncIterator[Union[StoryIdea, Scene]]:
+        """Variante en streaming: produit la StoryIdea, puis chaque Scene dès qu'elle est complète
+
+        Le schéma impose l'ordre des champs: l'idée (et son environnement, nécessaire aux
+        prompts des scènes) arrive toujours avant les scènes.
+        """
+
+        scene_durations = self.scene_creator.calculate_scene_distribution(duration)
+        idea_fields = ("caption", "idea", "environment", "sound")
+        idea_data: Dict[str, str] = {}
+        story_idea: Optional[StoryIdea] = None
+        produced = set()
+
+        try:
+            async with self.rate_limiter.acquire("openai", config.TEXT_MODEL):
+                stream = await self.client.chat.completions.create(
+                    **self.create_plan_request(theme, duration, scene_durations),
+                    stream=True
+                )
+
+                parser = IncrementalJsonParser()
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    for path, value in parser.feed(chunk.choices[0].delta.content or ""):
+                        if len(path) == 1 and path[0] in idea_fields:
+                            idea_data[path[0]] = value
+                            if story_idea is None and len(idea_data) == len(idea_fields):
+                                story_idea = StoryIdea(**idea_data)
+                                yield story_idea
+                        elif story_idea and path[:1] == ("scenes",) and path[2:] == ("description",):
+                            index = path[1]
+                            if index >= len(scene_durations) or index in produced:
+                                continue
+                            produced.add(index)
+                            yield Scene(
+                                scene_number=index + 1,
+                                description=value,
+                                duration=scene_durations[index],
+                                prompt=self.scene_creator.optimize_prompt_for_seedance(
+                                    value, story_idea.environment, index + 1
+                                )
+                            )
+
+        except Exception as e:
+            if story_idea is None:
+                raise Exception(f"Erreur lors de la génération du plan d'histoire: {str(e)}")
+            print(f"Avertissement: flux du plan d'histoire interrompu: {e}")
+
+        if story_idea is None:
+            raise Exception("Plan d'histoire incomplet: idée absente du flux")
+
+        # Compléter les scènes absentes du flux
+        for scene in self.scene_creator.create_fallback_scenes(story_idea, scene_durations):
+            if scene.scene_number - 1 not in produced:
+                yield scene
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from config import config
+from models.schemas import AnimationTheme, AnimationDuration, StoryPlan
+from .idea_generator import IdeaGenerator
+from .story_planner import StoryPlanner
+
+PoolKey = Tuple[AnimationTheme, int]
+
+class StoryPlanPool:
+    """Réserve de plans d'histoire (idée + scènes) générés à l'avance
+
+    Une réserve bornée est tenue pour chaque couple thème × durée: une animation prend
+    un plan déjà validé et soumet ses clips sans attendre OpenAI. La réserve est
+    complétée en arrière-plan dès qu'elle passe sous le seuil bas. Un plan servi est
+    retiré de la réserve et son empreinte mémorisée: il n'est jamais servi deux fois.
+    Réserve vide: l'animation génère son plan comme avant.
+    """
+
+    def __init__(
+        self,
+        story_planner: StoryPlanner,
+        idea_generator: IdeaGenerator,
+        size: Optional[int] = None,
+        low_water: Optional[int] = None,
+        themes: Optional[Iterable[AnimationTheme]] = None,
+        durations: Optional[Iterable[int]] = None
+    ):
+        self.story_planner = story_planner
+        self.idea_generator = idea_generator
+        self.size = max(0, size if size is not None else config.STORY_POOL_SIZE)
+        self.low_water = min(self.size, low_water if low_water is not None else config.STORY_POOL_LOW_WATER)
+        self.themes = list(themes) if themes is not None else self._parse_themes(config.STORY_POOL_THEMES)
+        self.durations = list(durations) if durations is not None else self._parse_durations(config.STORY_POOL_DURATIONS)
+        self.retry_delay = config.STORY_POOL_RETRY_DELAY
+
+        self._plans: Dict[PoolKey, Deque[StoryPlan]] = {}
+        # Empreintes des plans déjà mis en réserve ou servis (bornées)
+        self._seen: Set[str] = set()
+        self._seen_order: Deque[str] = deque()
+        self._refills: Dict[PoolKey, asyncio.Task] = {}
+        # Échec de génération: pas de nouvelle tentative avant cette date
+        self._retry_after: Dict[PoolKey, float] = {}
+        # Générations d'avance simultanées (les animations gardent la priorité sur OpenAI)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._started = False
+
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    @staticmethod
+    def _parse_themes(value: str) -> List[AnimationTheme]:
+        """Thèmes à préchauffer (liste séparée par des virgules, vide = tous)"""
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        return [AnimationTheme(name) for name in names] if names else list(AnimationTheme)
+
+    @staticmethod
+    def _parse_durations(value: str) -> List[int]:
+        """Durées à préchauffer en secondes (liste séparée par des virgules, vide = toutes)"""
+        durations = [int(d) for d in value.split(",") if d.strip()]
+        return durations or [d.value for d in AnimationDuration]
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _key(self, theme: AnimationTheme, duration: int) -> PoolKey:
+        return (AnimationTheme(theme), int(duration))
+
+    @staticmethod
+    def fingerprint(plan: StoryPlan) -> str:
+        """Empreinte du contenu d'un plan (deux plans identiques ont la même)"""
+        text = "\n".join([plan.story_idea.caption, plan.story_idea.idea] + [s.description for s in plan.scenes])
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember(self, fingerprint: str):
+        self._seen.add(fingerprint)
+        self._seen_order.append(fingerprint)
+        while len(self._seen_order) > config.STORY_POOL_HISTORY:
+            self._seen.discard(self._seen_order.popleft())
+
+    def take(self, theme: AnimationTheme, duration: int) -> Optional[StoryPlan]:
+        """Retire un plan de la réserve (None si vide) et relance le remplissage si besoin"""
+        if not self.enabled:
+            return None
+        key = self._key(theme, duration)
+        plans = self._plans.get(key)
+        plan = plans.popleft() if plans else None
+        if plan is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        if self._started and (not plans or len(plans) < self.low_water):
+            self._refill(key)
+        return plan
+
+    def _refill(self, key: PoolKey):
+        """Lance le remplissage d'une réserve (une tâche par couple thème × durée)"""
+        if key[0] not in self.themes or key[1] not in self.durations:
+            return
+        task = self._refills.get(key)
+        if task is not None and not task.done():
+            return
+        if time.time() < self._retry_after.get(key, 0):
+            return
+        self._refills[key] = asyncio.create_task(self._fill(key))
+
+    async def _fill(self, key: PoolKey):
+        """Génère des plans jusqu'à la taille cible de la réserve"""
+        theme, duration = key
+        plans = self._plans.setdefault(key, deque())
+        expected_scenes = len(self.story_planner.scene_creator.calculate_scene_distribution(duration))
+        attempts = added = 0
+        while len(plans) < self.size and attempts < self.size * 2:
+            attempts += 1
+            try:
+                async with self._semaphore:
+                    plan = await self.story_planner.generate_story_plan(theme, duration)
+            except Exception as e:
+                print(f"Avertissement: préchauffage des plans {theme.value}/{duration}s échoué: {e}")
+                self._retry_after[key] = time.time() + self.retry_delay
+                return
+
+            # Seuls les plans complets, adaptés aux enfants et jamais vus entrent dans la réserve
+            fingerprint = self.fingerprint(plan)
+            if (len(plan.scenes) != expected_scenes or fingerprint in self._seen
+                    or not await self.idea_generator.validate_idea(plan.story_idea)):
+                self.discarded += 1
+                continue
+            self._remember(fingerprint)
+            plans.append(plan)
+            added += 1
+
+        if len(plans) < self.size and not added:
+            # Le modèle ne produit que des plans déjà vus ou refusés: on réessaiera plus tard
+            self._retry_after[key] = time.time() + self.retry_delay
+
+    async def start(self):
+        """Démarre le remplissage de toutes les réserves (appelé dans le lifespan)"""
+        if not self.enabled or self._started:
+            return
+        self._semaphore = asyncio.Semaphore(max(1, config.STORY_POOL_WARM_CONCURRENCY))
+        self._started = True
+        for theme in self.themes:
+            for duration in self.durations:
+                self._refill(self._key(theme, duration))
+
+    async def close(self):
+        """Arrête les remplissages en cours"""
+        self._started = False
+        tasks = [task for task in self._refills.values() if not task.done()]
+        self._refills.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de la réserve de plans"""
+        return {
+            "enabled": self.enabled,
+            "size": self.size,
+            "low_water": self.low_water,
+            "available": sum(len(plans) for plans in self._plans.values()),
+            "refilling": sum(1 for task in self._refills.values() if not task.done()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "discarded": self.discarded
+        }
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from config import config
+from services.animation_pipeline import AnimationPipeline
+from services.job_store import InMemoryJobStore
+
+@pytest.fixture(autouse=True)
+def openai_key(monkeypatch):
+    # Les clients OpenAI exigent une clé à la construction (aucun appel n'est fait)
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "sk-test")
+
+def make_pipeline():
+    store = InMemoryJobStore(flush_interval=60)
+    return AnimationPipeline(job_store=store), store
+
+def create_animation(store, animation_id, status):
+    store.create_job(animation_id, "pipeline", status, data={"theme": "space", "duration": 30})
+
+def test_live_animation_of_another_worker_is_not_claimed():
+    pipeline, store = make_pipeline()
+    create_animation(store, "a1", "generating_clips")
+    store.update_job("a1", owner="autre-worker", updated_at=0)
+    assert pipeline.claim_interrupted_animations() == []
+    assert store.get_job("a1")["status"] == "generating_clips"
+    asyncio.run(store.close())
+
+def test_expired_lease_is_claimed_once():
+    pipeline, store = make_pipeline()
+    create_animation(store, "a1", "generating_clips")
+    store.update_job("a1", owner="worker-planté", lease_expires_at=0)
+    claimed = pipeline.claim_interrupted_animations()
+    assert [animation_id for animation_id, _ in claimed] == ["a1"]
+    assert claimed[0][1].theme == "space"
+    assert store.get_job("a1")["owner"] == store.owner_id
+    assert pipeline.claim_interrupted_animations() == []
+    asyncio.run(store.close())
+
+def test_interrupted_animation_is_claimed_immediately():
+    pipeline, store = make_pipeline()
+    create_animation(store, "a1", "generating_clips")
+    assert pipeline.mark_interrupted("a1")
+    assert [animation_id for animation_id, _ in pipeline.claim_interrupted_animations()] == ["a1"]
+    asyncio.run(store.close())
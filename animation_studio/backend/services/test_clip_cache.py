@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from config import config
+from services.clip_cache import ClipCache
+
+class FakeResponse:
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self._body = body
+        self.content = self
+
+    async def iter_chunked(self, size: int):
+        for start in range(0, len(self._body), size):
+            yield self._body[start:start + size]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeHttpClient:
+    """Client HTTP factice: url -> (statut, contenu)"""
+
+    def __init__(self, files):
+        self.files = files
+
+    async def get_session(self, url):
+        return self
+
+    def get(self, url):
+        status, body = self.files.get(url, (404, b""))
+        return FakeResponse(status, body)
+
+@pytest.fixture
+def http():
+    return FakeHttpClient({"https://cdn/clip-1.mp4": (200, b"a" * 10), "https://cdn/clip-2.mp4": (200, b"b" * 10)})
+
+@pytest.fixture
+def cache(tmp_path, http):
+    return ClipCache(directory=tmp_path, max_size_gb=1, max_age_hours=1, http_client=http)
+
+def key(n: int) -> str:
+    return ClipCache.make_key("model", f"prompt {n}", 5, "16:9", "720p")
+
+def store(cache, n: int, url: str = None) -> bool:
+    return asyncio.run(cache.store(key(n), url or f"https://cdn/clip-{n}.mp4", {"scene": n}))
+
+def test_make_key_depends_on_generation_parameters():
+    assert key(1) == key(1)
+    assert key(1) != key(2)
+    assert ClipCache.make_key("model", "prompt 1", 5, "16:9", "1080p") != key(1)
+
+def test_store_then_get(cache):
+    assert cache.get(key(1)) is None
+    assert store(cache, 1)
+    metadata = cache.get(key(1))
+    assert metadata["scene"] == 1
+    assert metadata["source_url"] == "https://cdn/clip-1.mp4"
+    assert metadata["size"] == 10
+    assert cache.local_path(key(1)).read_bytes() == b"a" * 10
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_failed_download_leaves_nothing(cache):
+    assert not store(cache, 3)
+    assert cache.get(key(3)) is None
+    assert not [p for p in cache.directory.rglob("*") if p.is_file()]
+
+def test_clip_url_served_locally_with_public_base_url(cache, monkeypatch):
+    store(cache, 1)
+    monkeypatch.setattr(config, "PUBLIC_BASE_URL", "https://studio.example/")
+    k = key(1)
+    assert cache.clip_url(k, cache.get(k)) == f"https://studio.example/cache/clips/{k[:2]}/{k}.mp4"
+
+def test_clip_url_relative_without_public_base_url(cache, monkeypatch):
+    store(cache, 1)
+    monkeypatch.setattr(config, "PUBLIC_BASE_URL", "")
+    k = key(1)
+    # Jamais l'URL du fournisseur, qui peut expirer
+    assert cache.clip_url(k, cache.get(k)) == f"/cache/clips/{k[:2]}/{k}.mp4"
+
+def test_lru_eviction_beyond_max_size(cache):
+    cache.max_size_bytes = 15
+    store(cache, 1)
+    store(cache, 2)
+    assert cache.get(key(1)) is None
+    assert cache.get(key(2)) is not None
+    assert cache.size_bytes == 10
+
+def test_recently_used_clip_is_kept(cache, http):
+    http.files["https://cdn/clip-3.mp4"] = (200, b"c" * 10)
+    cache.max_size_bytes = 25
+    store(cache, 1)
+    store(cache, 2)
+    cache.get(key(1))
+    store(cache, 3)
+    assert cache.get(key(1)) is not None
+    assert cache.get(key(2)) is None
+
+def test_index_rebuilt_from_disk(cache, tmp_path, http):
+    store(cache, 1)
+    reopened = ClipCache(directory=tmp_path, max_size_gb=1, max_age_hours=1, http_client=http)
+    assert reopened.get(key(1))["scene"] == 1
+
+def test_cleanup_removes_unused_clips(cache):
+    store(cache, 1)
+    store(cache, 2)
+    old = time.time() - 2 * 3600
+    os.utime(cache.local_path(key(1)), (old, old))
+    assert asyncio.run(cache.cleanup()) == 1
+    assert cache.get(key(1)) is None
+    assert cache.get(key(2)) is not None
+
+def test_cleanup_tolerates_index_changes_on_the_loop(cache):
+    store(cache, 1)
+    store(cache, 2)
+    find_expired = cache._find_expired
+
+    def slow_find_expired(keys, limit):
+        time.sleep(0.05)
+        return find_expired(keys, limit)
+
+    cache._find_expired = slow_find_expired
+
+    async def scenario():
+        cleanup = asyncio.create_task(cache.cleanup())
+        await asyncio.sleep(0.01)
+        # Accès et ajout pendant que le thread de nettoyage lit le disque
+        assert cache.get(key(1)) is not None
+        assert await cache.store(key(3), "https://cdn/clip-1.mp4", {"scene": 3})
+        return await cleanup
+
+    assert asyncio.run(scenario()) == 0
+    assert set(cache._index) == {key(1), key(2), key(3)}
+
+def test_entry_evicted_behind_the_index_is_a_miss(cache):
+    store(cache, 1)
+    # Supprimé par un autre worker (éviction concurrente) sans passer par cet index
+    cache.local_path(key(1)).unlink()
+    assert cache.get(key(1)) is None
+    assert key(1) not in cache._index
+
+def test_unreadable_metadata_is_a_miss(cache):
+    store(cache, 1)
+    cache._meta_path(key(1)).write_text("{tronqué", encoding="utf-8")
+    assert cache.get(key(1)) is None
+    assert not cache._video_path(key(1)).exists()
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from services.clip_retry import ClipRetryBudget, ClipRetryPolicy
+from services.http_client import ProviderHTTPError
+
+class FakeWaiter:
+    """Quantile de durée des jobs fixé par le test (None: pas assez d'observations)"""
+
+    def __init__(self, quantile=None):
+        self.quantile = quantile
+
+    def duration_quantile(self, stage, q):
+        return self.quantile
+
+def make_policy(max_attempts=3, hedge_after=None) -> ClipRetryPolicy:
+    policy = ClipRetryPolicy(completion_waiter=FakeWaiter(hedge_after))
+    policy.max_attempts = max_attempts
+    policy.base_delay = policy.max_delay = 0.001
+    policy.hedge_enabled = hedge_after is not None
+    policy.hedge_min_delay = 0
+    return policy
+
+class Attempts:
+    """Tentatives scriptées: chaque entrée est une exception à lever ou un délai avant succès"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.cancelled = []
+
+    async def __call__(self, prediction_id, submitted):
+        index = len(self.calls)
+        self.calls.append(prediction_id)
+        submitted(prediction_id or f"p-{index + 1}")
+        outcome = self.outcomes[index]
+        if isinstance(outcome, Exception):
+            raise outcome
+        try:
+            await asyncio.sleep(outcome)
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+        return {"attempt": index}
+
+def run(policy, attempts, provider_job_id=None, budget=None, on_submitted=None):
+    return asyncio.run(policy.run(attempts, provider_job_id, budget or ClipRetryBudget(5), on_submitted))
+
+def test_is_transient():
+    assert ClipRetryPolicy.is_transient(ProviderHTTPError(429, "trop de requêtes"))
+    assert ClipRetryPolicy.is_transient(ProviderHTTPError(503, "indisponible"))
+    assert ClipRetryPolicy.is_transient(ConnectionError("réseau"))
+    assert not ClipRetryPolicy.is_transient(ProviderHTTPError(400, "prompt refusé"))
+
+def test_retries_transient_errors_with_new_submission():
+    attempts = Attempts(ProviderHTTPError(503, "indisponible"), 0)
+    budget = ClipRetryBudget(5)
+    assert run(make_policy(), attempts, provider_job_id="p-0", budget=budget) == {"attempt": 1}
+    # Seule la première tentative reprend la prédiction existante
+    assert attempts.calls == ["p-0", None]
+    assert budget.spent == 1
+
+def test_request_error_not_retried():
+    attempts = Attempts(ProviderHTTPError(400, "prompt refusé"), 0)
+    with pytest.raises(ProviderHTTPError):
+        run(make_policy(), attempts)
+    assert len(attempts.calls) == 1
+
+def test_stops_after_max_attempts():
+    attempts = Attempts(*[ConnectionError("réseau")] * 5)
+    with pytest.raises(ConnectionError):
+        run(make_policy(max_attempts=3), attempts)
+    assert len(attempts.calls) == 3
+
+def test_budget_caps_extra_submissions():
+    attempts = Attempts(*[ConnectionError("réseau")] * 5)
+    with pytest.raises(ConnectionError):
+        run(make_policy(max_attempts=5), attempts, budget=ClipRetryBudget(1))
+    assert len(attempts.calls) == 2
+
+def test_no_hedge_without_observed_durations():
+    attempts = Attempts(0.05)
+    policy = make_policy()
+    policy.hedge_enabled = True
+    assert run(policy, attempts) == {"attempt": 0}
+    assert len(attempts.calls) == 1
+
+def test_hedge_wins_and_slow_primary_is_cancelled():
+    attempts = Attempts(10, 0)
+    budget = ClipRetryBudget(5)
+    assert run(make_policy(hedge_after=0.02), attempts, budget=budget) == {"attempt": 1}
+    assert attempts.cancelled == [0]
+    assert budget.spent == 1
+
+def test_primary_wins_and_hedge_is_cancelled():
+    attempts = Attempts(0.05, 10)
+    assert run(make_policy(hedge_after=0.01), attempts) == {"attempt": 0}
+    assert attempts.cancelled == [1]
+
+def test_no_hedge_when_budget_exhausted():
+    attempts = Attempts(0.05, 0)
+    assert run(make_policy(hedge_after=0.01), attempts, budget=ClipRetryBudget(0)) == {"attempt": 0}
+    assert len(attempts.calls) == 1
+
+def test_recorded_prediction_is_the_winning_one():
+    recorded = []
+    attempts = Attempts(0.05, 10)
+    assert run(make_policy(hedge_after=0.01), attempts, on_submitted=recorded.append) == {"attempt": 0}
+    # Le doublon perdant n'écrase pas la prédiction principale
+    assert recorded == ["p-1"]
+
+    recorded.clear()
+    attempts = Attempts(10, 0)
+    assert run(make_policy(hedge_after=0.02), attempts, on_submitted=recorded.append) == {"attempt": 1}
+    assert recorded == ["p-1", "p-2"]
+
+def test_resumed_prediction_not_recorded_again_but_retry_is():
+    recorded = []
+    attempts = Attempts(ProviderHTTPError(503, "indisponible"), 0)
+    run(make_policy(), attempts, provider_job_id="p-0", on_submitted=recorded.append)
+    assert recorded == ["p-2"]
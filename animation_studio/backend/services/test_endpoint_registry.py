@@ -0,0 +1,152 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services import endpoint_registry as registry_module
+from services.endpoint_registry import CircuitBreaker, ProviderEndpointRegistry
+from services.http_client import ProviderHTTPError
+
+class FakeClock:
+    """Horloge monotone pilotée par le test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(registry_module, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+def make_breaker(window=60.0, min_failures=3, failure_ratio=0.5, cooldown=30.0) -> CircuitBreaker:
+    return CircuitBreaker(window, min_failures, failure_ratio, cooldown)
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(breaker.min_failures):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_stays_closed_below_min_failures(clock):
+    breaker = make_breaker()
+    assert breaker.record(False) is None
+    assert breaker.record(False) is None
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_opens_on_failure_ratio(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(True)
+    for _ in range(3):
+        assert breaker.record(False) is None  # 3 échecs sur 7: sous le ratio
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.record(False) == CircuitBreaker.OPEN  # 4 échecs sur 8
+    assert not breaker.allow()
+
+def test_window_prunes_old_outcomes(clock):
+    breaker = make_breaker()
+    breaker.record(False)
+    breaker.record(False)
+    clock.advance(61)
+    assert breaker.record(False) is None  # les deux premiers échecs sont sortis de la fenêtre
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert len(breaker._outcomes) == 1
+
+def test_cooldown_then_single_half_open_probe(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # une seule requête d'essai à la fois
+
+def test_half_open_probe_success_closes(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.allow()
+    assert breaker.record(True) == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    # Fenêtre remise à zéro: les échecs d'avant l'ouverture ne comptent plus
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_probe_failure_reopens_for_new_cooldown(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.allow()
+    assert breaker.record(False) == CircuitBreaker.OPEN
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+
+def test_release_lets_another_probe_through(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.release()  # essai annulé sans résultat
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+# --- Registre: bascule entre variantes ---
+
+@pytest.fixture
+def registry(clock):
+    endpoints = ProviderEndpointRegistry()
+    endpoints.min_failures = 1
+    endpoints.register("test", ["primaire", "secours"])
+    return endpoints
+
+def test_call_falls_back_and_remembers_working_variant(registry):
+    calls = []
+
+    async def request(variant):
+        calls.append(variant)
+        if variant == "primaire":
+            raise ProviderHTTPError(503, "indisponible")
+        return variant
+
+    assert asyncio.run(registry.call("test", request)) == "secours"
+    assert registry.preferred("test") == "secours"
+    assert asyncio.run(registry.call("test", request)) == "secours"
+    assert calls == ["primaire", "secours", "secours"]
+
+def test_call_propagates_request_errors_without_fallback(registry):
+    calls = []
+
+    async def request(variant):
+        calls.append(variant)
+        raise ProviderHTTPError(401, "clé invalide")
+
+    with pytest.raises(ProviderHTTPError) as error:
+        asyncio.run(registry.call("test", request))
+    assert error.value.status == 401
+    assert calls == ["primaire"]
+
+def test_call_fails_fast_when_all_breakers_open(registry):
+    calls = []
+
+    async def request(variant):
+        calls.append(variant)
+        raise ProviderHTTPError(502, "passerelle")
+
+    with pytest.raises(ProviderHTTPError):
+        asyncio.run(registry.call("test", request))
+    calls.clear()
+    with pytest.raises(ProviderHTTPError) as error:
+        asyncio.run(registry.call("test", request))
+    assert error.value.status == 503
+    assert calls == []
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from services.eta_estimator import EtaEstimator, P2Quantile
+
+def test_p2_exact_with_few_observations():
+    sketch = P2Quantile(0.5)
+    assert sketch.value() is None
+    for value in (30, 10, 20):
+        sketch.add(value)
+    assert sketch.value() == 20
+
+@pytest.mark.parametrize("q", [0.5, 0.9])
+def test_p2_tracks_quantile_of_a_stream(q):
+    rng = random.Random(42)
+    values = [rng.uniform(0, 100) for _ in range(5000)]
+    sketch = P2Quantile(q)
+    for value in values:
+        sketch.add(value)
+    exact = sorted(values)[int(q * len(values))]
+    assert sketch.value() == pytest.approx(exact, abs=3)
+
+def test_p2_serialization_roundtrip():
+    sketch = P2Quantile(0.9)
+    for value in range(20):
+        sketch.add(value)
+    restored = P2Quantile.from_dict(sketch.to_dict())
+    restored.add(20)
+    sketch.add(20)
+    assert restored.value() == sketch.value()
+
+@pytest.fixture
+def estimator(tmp_path):
+    return EtaEstimator(path=tmp_path / "eta_model.json", min_samples=3)
+
+def test_default_until_enough_samples(estimator):
+    estimator.record("clip", 40)
+    estimator.record("clip", 60)
+    assert estimator.estimate("clip", default=90) == 90
+    estimator.record("clip", 50)
+    assert estimator.estimate("clip", default=90, quantile=0.5) == 50
+
+def test_precise_bucket_falls_back_to_coarse(estimator):
+    for seconds in (100, 110, 120):
+        estimator.record("clip", seconds, scene_count=4, clip_duration=5)
+    # Compartiment précis inconnu: le compartiment étape + fournisseur prend le relais
+    assert estimator.estimate("clip", None, scene_count=8, clip_duration=5, quantile=0.5) == 110
+    for seconds in (200, 210, 220):
+        estimator.record("clip", seconds, scene_count=8, clip_duration=5)
+    assert estimator.estimate("clip", None, scene_count=8, clip_duration=5, quantile=0.5) == 210
+
+def test_save_and_load(estimator, tmp_path):
+    for seconds in (10, 20, 30):
+        estimator.record("audio", seconds)
+    estimator.save()
+    reloaded = EtaEstimator(path=tmp_path / "eta_model.json", min_samples=3)
+    reloaded.load()
+    assert reloaded.estimate("audio", None, quantile=0.5) == 20
+
+def test_unreadable_model_is_ignored(tmp_path):
+    path = tmp_path / "eta_model.json"
+    path.write_text("{pas du json", encoding="utf-8")
+    estimator = EtaEstimator(path=path, min_samples=1)
+    estimator.load()
+    assert estimator.estimate("audio", 42) == 42
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from services.idempotency import IdempotencyKeyInProgressError, IdempotencyKeyMismatchError, IdempotencyKeys
+from services.job_store import InMemoryJobStore, SQLiteJobStore
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    backend = InMemoryJobStore() if request.param == "memory" else SQLiteJobStore(tmp_path / "jobs.db")
+    yield backend
+    asyncio.run(backend.close())
+
+@pytest.fixture
+def keys(store):
+    return IdempotencyKeys(job_store=store)
+
+FINGERPRINT = IdempotencyKeys.fingerprint(theme="space", duration=30)
+
+def test_fingerprint_ignores_field_order():
+    assert IdempotencyKeys.fingerprint(duration=30, theme="space") == FINGERPRINT
+    assert IdempotencyKeys.fingerprint(theme="space", duration=60) != FINGERPRINT
+
+def test_retry_with_same_key_returns_original_job(keys, store):
+    assert keys.begin("generate", "k1", FINGERPRINT) is None
+    store.create_job("a1", "pipeline", "pending")
+    keys.complete("generate", "k1", "a1")
+    assert keys.begin("generate", "k1", FINGERPRINT) == "a1"
+    assert keys.get_stats()["replayed"] == 1
+
+def test_same_key_in_another_scope_is_independent(keys):
+    assert keys.begin("generate", "k1", FINGERPRINT) is None
+    assert keys.begin("generate-quick", "k1", FINGERPRINT) is None
+
+def test_key_reused_for_different_request(keys, store):
+    keys.begin("generate", "k1", FINGERPRINT)
+    store.create_job("a1", "pipeline", "pending")
+    keys.complete("generate", "k1", "a1")
+    with pytest.raises(IdempotencyKeyMismatchError):
+        keys.begin("generate", "k1", IdempotencyKeys.fingerprint(theme="ocean", duration=30))
+
+def test_concurrent_retry_while_original_in_progress(keys):
+    keys.begin("generate", "k1", FINGERPRINT)
+    with pytest.raises(IdempotencyKeyInProgressError):
+        keys.begin("generate", "k1", FINGERPRINT)
+
+def test_abandoned_key_is_processed_again(keys):
+    keys.begin("generate", "k1", FINGERPRINT)
+    keys.abandon("generate", "k1")
+    assert keys.begin("generate", "k1", FINGERPRINT) is None
+
+def test_deleted_job_releases_key(keys):
+    keys.begin("generate", "k1", FINGERPRINT)
+    keys.complete("generate", "k1", "purgé")
+    assert keys.begin("generate", "k1", FINGERPRINT) is None
+
+def test_expired_reservation_is_taken_over(keys):
+    keys.pending_timeout = -1
+    keys.begin("generate", "k1", FINGERPRINT)
+    assert keys.begin("generate", "k1", FINGERPRINT) is None
+
+@pytest.mark.parametrize("key", ["", "   ", "x" * 1000])
+def test_invalid_key(keys, key):
+    with pytest.raises(ValueError):
+        keys.begin("generate", key, FINGERPRINT)
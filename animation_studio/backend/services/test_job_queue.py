@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from services.job_queue import GenerationQueue, QueueClosedError, QueueFullError
+
+def recorder(log, name, delay=0.0):
+    async def job():
+        log.append(name)
+        await asyncio.sleep(delay)
+    return job
+
+def test_lower_priority_value_runs_first():
+    log = []
+
+    async def scenario():
+        queue = GenerationQueue(workers=1, max_size=10, drain_timeout=1)
+        await queue.start()
+        queue.submit("normal", recorder(log, "normal"), priority=5)
+        queue.submit("urgent", recorder(log, "urgent"), priority=1)
+        queue.submit("normal-2", recorder(log, "normal-2"), priority=5)
+        await queue._queue.join()
+        await queue.drain()
+
+    asyncio.run(scenario())
+    assert log == ["urgent", "normal", "normal-2"]
+
+def test_workers_bound_jobs_in_flight():
+    peak = 0
+
+    async def scenario():
+        nonlocal peak
+        queue = GenerationQueue(workers=2, max_size=10, drain_timeout=1)
+        await queue.start()
+
+        async def job():
+            nonlocal peak
+            peak = max(peak, queue.in_flight)
+            await asyncio.sleep(0.01)
+
+        for i in range(6):
+            queue.submit(f"job-{i}", job)
+        await queue._queue.join()
+        await queue.drain()
+
+    asyncio.run(scenario())
+    assert peak == 2
+
+def test_full_queue_rejects():
+    async def scenario():
+        queue = GenerationQueue(workers=1, max_size=1, drain_timeout=0.05)
+        await queue.start()
+        queue.submit("running", recorder([], "running", delay=1))
+        await asyncio.sleep(0)
+        queue.submit("queued", recorder([], "queued"))
+        with pytest.raises(QueueFullError):
+            queue.submit("rejected", recorder([], "rejected"))
+        await queue.drain()
+
+    asyncio.run(scenario())
+
+def test_failing_job_does_not_stop_worker():
+    log = []
+
+    async def broken():
+        raise RuntimeError("panne")
+
+    async def scenario():
+        queue = GenerationQueue(workers=1, max_size=10, drain_timeout=1)
+        await queue.start()
+        queue.submit("broken", broken)
+        queue.submit("ok", recorder(log, "ok"))
+        await queue._queue.join()
+        await queue.drain()
+
+    asyncio.run(scenario())
+    assert log == ["ok"]
+
+def test_drain_waits_then_abandons():
+    log = []
+
+    async def scenario():
+        queue = GenerationQueue(workers=1, max_size=10, drain_timeout=0.05)
+        await queue.start()
+        queue.submit("long", recorder(log, "long", delay=10))
+        queue.submit("never", recorder(log, "never"))
+        await asyncio.sleep(0)
+        abandoned = await queue.drain()
+        with pytest.raises(QueueClosedError):
+            queue.submit("late", recorder(log, "late"))
+        return abandoned, queue.in_flight
+
+    abandoned, in_flight = asyncio.run(scenario())
+    assert sorted(abandoned) == ["long", "never"]
+    assert in_flight == 0
+    assert log == ["long"]
+
+def test_cancel_running_and_queued_jobs():
+    log = []
+
+    async def scenario():
+        queue = GenerationQueue(workers=1, max_size=10, drain_timeout=1)
+        await queue.start()
+        queue.submit("running", recorder(log, "running", delay=10))
+        queue.submit("queued", recorder(log, "queued"))
+        queue.submit("next", recorder(log, "next"))
+        await asyncio.sleep(0.01)
+        outcomes = [queue.cancel("running"), queue.cancel("queued"), queue.cancel("inconnu")]
+        await queue._queue.join()
+        await queue.drain()
+        return outcomes
+
+    assert asyncio.run(scenario()) == ["running", "queued", None]
+    # Le worker survit à l'annulation et le job annulé en file ne démarre jamais
+    assert log == ["running", "next"]
@@ -0,0 +1,222 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.job_store import InMemoryJobStore, JobStore, SQLiteJobStore
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        backend = InMemoryJobStore(flush_interval=60)
+    else:
+        backend = SQLiteJobStore(tmp_path / "jobs.db", flush_interval=60)
+    yield backend
+    asyncio.run(backend.close())
+
+def test_create_and_get(store):
+    store.create_job("a1", "pipeline", "pending", data={"theme": "space"})
+    job = store.get_job("a1")
+    assert job["status"] == "pending"
+    assert job["data"] == {"theme": "space"}
+    assert job["progress"] is None and job["result"] is None
+    assert store.get_job("inconnu") is None
+
+def test_update_job(store):
+    store.create_job("a1", "pipeline", "pending")
+    before = store.get_job("a1")["updated_at"]
+    store.update_job("a1", status="running", result={"step": 1})
+    job = store.get_job("a1")
+    assert job["status"] == "running"
+    assert job["result"] == {"step": 1}
+    assert job["updated_at"] >= before
+
+def test_progress_is_buffered_until_flush(store):
+    store.create_job("a1", "pipeline", "pending")
+    store.record_progress("a1", "running", progress={"percentage": 40})
+    # Visible immédiatement par get_job, mais pas encore écrit
+    assert store.get_job("a1")["progress"] == {"percentage": 40}
+    assert store._get_stored_job("a1")["progress"] is None
+
+    store.flush()
+    stored = store._get_stored_job("a1")
+    assert stored["status"] == "running"
+    assert stored["progress"] == {"percentage": 40}
+
+def test_terminal_status_written_immediately(store):
+    store.create_job("a1", "pipeline", "running")
+    store.record_progress("a1", "completed", result={"final_video_url": "/v.mp4"})
+    stored = store._get_stored_job("a1")
+    assert stored["status"] == "completed"
+    assert stored["result"] == {"final_video_url": "/v.mp4"}
+
+def test_list_and_count(store):
+    store.create_job("a1", "pipeline", "completed")
+    store.create_job("a2", "quick", "running")
+    store.create_job("a3", "pipeline", "running")
+    assert {job["job_id"] for job in store.list_jobs(status="running")} == {"a2", "a3"}
+    assert [job["job_id"] for job in store.list_jobs(kind="pipeline")] == ["a3", "a1"]
+    assert store.count_jobs() == 3
+    assert store.count_jobs(exclude_statuses=("completed", "failed")) == 2
+
+def test_delete_jobs_older_than(store):
+    store.create_job("old", "pipeline", "completed")
+    time.sleep(0.05)
+    store.create_job("recent", "pipeline", "completed")
+    assert store.delete_jobs_older_than(0.025) == 1
+    assert store.get_job("old") is None
+    assert store.get_job("recent") is not None
+
+def test_delete_jobs_older_than_keeps_unfinished_jobs(store):
+    for status in ("pending", "generating_clips", "interrupted", "failed"):
+        store.create_job(status, "pipeline", status)
+    time.sleep(0.05)
+    assert store.delete_jobs_older_than(0.025) == 1
+    assert store.get_job("failed") is None
+    assert [store.get_job(status)["status"] for status in ("pending", "generating_clips", "interrupted")] == \
+        ["pending", "generating_clips", "interrupted"]
+
+def test_flush_loop_writes_batches(store):
+    store.flush_interval = 0.01
+    store.create_job("a1", "pipeline", "pending")
+
+    async def scenario():
+        await store.start()
+        store.record_progress("a1", "running", progress={"percentage": 10})
+        await asyncio.sleep(0.05)
+        job = store._get_stored_job("a1")
+        await store.close()
+        return job
+
+    assert asyncio.run(scenario())["progress"] == {"percentage": 10}
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    first = SQLiteJobStore(tmp_path / "jobs.db")
+    first.create_job("a1", "pipeline", "running", data={"theme": "space"})
+    first.record_progress("a1", "running", progress={"percentage": 70})
+    asyncio.run(first.close())
+
+    second = SQLiteJobStore(tmp_path / "jobs.db")
+    job = second.get_job("a1")
+    assert job["progress"] == {"percentage": 70}
+    assert job["data"] == {"theme": "space"}
+    asyncio.run(second.close())
+
+def test_claim_job_only_one_winner(store):
+    store.create_job("a1", "pipeline", "interrupted")
+    store.release_lease("a1")
+    job = store.get_job("a1")
+    assert store.claim_job("a1", "interrupted", job["updated_at"], "pending")
+    # Second worker avec la même lecture: le job a changé entre-temps
+    assert not store.claim_job("a1", "interrupted", job["updated_at"], "pending")
+    assert store.get_job("a1")["status"] == "pending"
+
+def test_checkpoint_written_immediately(store):
+    store.create_job("a1", "pipeline", "running")
+    store.checkpoint("a1", {"clips": ["c1"]})
+    assert store._get_stored_job("a1")["result"] == {"clips": ["c1"]}
+
+def test_claim_job_refuses_live_lease(store):
+    store.create_job("a1", "pipeline", "running")
+    job = store.get_job("a1")
+    assert job["owner"] == store.owner_id
+    assert not store.claim_job("a1", "running", job["updated_at"], "pending")
+    assert store.get_job("a1")["status"] == "running"
+
+def test_claim_job_takes_over_expired_lease(store):
+    store.lease_ttl = -1
+    store.create_job("a1", "pipeline", "running")
+    store.update_job("a1", owner="worker-planté")
+    job = store.get_job("a1")
+    store.lease_ttl = 60
+    assert store.claim_job("a1", "running", job["updated_at"], "pending")
+    claimed = store.get_job("a1")
+    assert claimed["owner"] == store.owner_id
+    assert claimed["lease_expires_at"] > time.time()
+
+def test_renew_leases_only_own_unfinished_jobs(store):
+    store.create_job("mine", "pipeline", "running")
+    store.create_job("done", "pipeline", "completed")
+    store.create_job("other", "pipeline", "running")
+    store.update_job("other", owner="autre-worker")
+    expires_at = time.time() + 1000
+    assert store.renew_leases(store.owner_id, expires_at) == 1
+    assert store.get_job("mine")["lease_expires_at"] == expires_at
+    assert store.get_job("done")["lease_expires_at"] < expires_at
+    assert store.get_job("other")["lease_expires_at"] < expires_at
+
+def test_sqlite_adds_lease_columns_to_existing_db(tmp_path):
+    import sqlite3
+    conn = sqlite3.connect(str(tmp_path / "jobs.db"))
+    conn.execute(
+        "CREATE TABLE jobs (job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+        "created_at REAL NOT NULL, updated_at REAL NOT NULL, progress TEXT, result TEXT, data TEXT)"
+    )
+    conn.execute("INSERT INTO jobs VALUES ('ancien', 'pipeline', 'running', 0, 0, NULL, NULL, '{}')")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteJobStore(tmp_path / "jobs.db")
+    job = store.get_job("ancien")
+    assert job["owner"] is None and job["lease_expires_at"] is None
+    assert store.claim_job("ancien", "running", 0, "pending")
+    asyncio.run(store.close())
+
+def test_base_store_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+def test_get_job_async_includes_pending_progress(store):
+    store.create_job("a1", "pipeline", "pending")
+    store.record_progress("a1", "running", progress={"percentage": 40})
+    job = asyncio.run(store.get_job_async("a1"))
+    assert job["status"] == "running" and job["progress"] == {"percentage": 40}
+    assert asyncio.run(store.get_job_async("inconnu")) is None
+
+def test_checkpoint_written_off_the_event_loop_when_started(store):
+    store.create_job("a1", "pipeline", "running")
+    write_batch = store._write_progress_batch
+    writer_threads = []
+
+    def record_thread(batch):
+        writer_threads.append(threading.get_ident())
+        write_batch(batch)
+
+    store._write_progress_batch = record_thread
+
+    async def scenario():
+        await store.start()
+        store.checkpoint("a1", {"clips": ["c1"]})
+        # Écriture aussitôt par l'écrivain de fond, sans attendre flush_interval (60s)
+        await asyncio.sleep(0.05)
+        job = store._get_stored_job("a1")
+        await store.close()
+        return job
+
+    assert asyncio.run(scenario())["result"] == {"clips": ["c1"]}
+    if isinstance(store, SQLiteJobStore):
+        assert writer_threads and threading.get_ident() not in writer_threads
+
+def test_close_right_after_checkpoint_writes_it(store):
+    store.create_job("a1", "pipeline", "running")
+
+    async def scenario():
+        await store.start()
+        store.checkpoint("a1", {"clips": ["c1"]})
+        store.record_progress("a1", "completed")
+        await asyncio.wait_for(store.close(), timeout=5)
+
+    asyncio.run(scenario())
+    job = store._get_stored_job("a1")
+    assert job["status"] == "completed" and job["result"] == {"clips": ["c1"]}
+
+def test_late_batch_does_not_overwrite_newer_state(store):
+    store.create_job("a1", "pipeline", "running")
+    store.record_progress("a1", "running", progress={"percentage": 40})
+    batch = store._take_batch()
+    time.sleep(0.01)
+    store.update_job("a1", status="completed")
+    # Lot pris avant la mise à jour finale, écrit après (thread d'écriture en retard)
+    store._write_progress_batch(batch)
+    assert store._get_stored_job("a1")["status"] == "completed"
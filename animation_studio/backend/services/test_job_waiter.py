@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from services.job_waiter import JobCompletionWaiter
+
+@pytest.fixture
+def waiter():
+    fast = JobCompletionWaiter()
+    fast.min_interval = 0.01
+    fast.max_interval = 0.05
+    fast.tick = 0.005
+    fast.webhook_base_url = ""
+    return fast
+
+class FakeJob:
+    """Job fournisseur factice: en cours pendant `polls_before_done` vérifications"""
+
+    def __init__(self, polls_before_done: int = 0, error: Exception = None):
+        self.polls_before_done = polls_before_done
+        self.error = error
+        self.checks = 0
+
+    async def check(self):
+        self.checks += 1
+        if self.error is not None:
+            raise self.error
+        if self.checks > self.polls_before_done:
+            return {"url": "https://example.com/clip.mp4"}
+        return None
+
+def test_polls_until_result(waiter):
+    job = FakeJob(polls_before_done=2)
+    result = asyncio.run(waiter.wait_for("video", "job-1", job.check, timeout=5))
+    assert result == {"url": "https://example.com/clip.mp4"}
+    assert job.checks == 3
+    assert waiter.get_stats()["pending_jobs"] == 0
+
+def test_check_error_propagates(waiter):
+    job = FakeJob(error=RuntimeError("job échoué"))
+    with pytest.raises(RuntimeError, match="job échoué"):
+        asyncio.run(waiter.wait_for("video", "job-1", job.check, timeout=5))
+    assert waiter.get_stats()["pending_jobs"] == 0
+
+def test_timeout_when_job_never_finishes(waiter):
+    job = FakeJob(polls_before_done=10 ** 6)
+    with pytest.raises(Exception, match="Timeout"):
+        asyncio.run(waiter.wait_for("video", "job-1", job.check, timeout=0.1))
+
+def test_webhook_wakes_waiting_job(waiter):
+    waiter.min_interval = waiter.max_interval = 30
+    job = FakeJob()
+
+    async def scenario():
+        task = asyncio.create_task(waiter.wait_for("video", "job-1", job.check, timeout=60))
+        await asyncio.sleep(0.02)
+        assert waiter.notify("job-1")
+        return await asyncio.wait_for(task, timeout=2)
+
+    assert asyncio.run(scenario()) is not None
+    assert job.checks == 1
+
+def test_webhook_before_registration_is_kept(waiter):
+    waiter.min_interval = waiter.max_interval = 30
+    job = FakeJob()
+    assert not waiter.notify("job-1")
+
+    async def scenario():
+        return await asyncio.wait_for(waiter.wait_for("video", "job-1", job.check, timeout=60), timeout=2)
+
+    assert asyncio.run(scenario()) is not None
+
+def test_next_interval_backoff_and_observed_durations(waiter):
+    waiter.min_interval, waiter.max_interval, waiter.backoff_factor = 2, 15, 2
+    assert waiter.next_interval("video", 0, None) == 2
+    assert waiter.next_interval("video", 10, 4) == 8
+    assert waiter.next_interval("video", 10, 10) == 15
+
+    for duration in (40, 50, 60, 70):
+        waiter.record_duration("video", duration)
+    # Avant le premier quartile: attente jusque-là (bornée); dans la fenêtre probable: polling serré
+    assert waiter.next_interval("video", 0, None) == 15
+    assert waiter.next_interval("video", 55, 15) == 2
+
+def test_with_webhook(waiter):
+    assert waiter.with_webhook("https://api/x", "wavespeed", "webhook") == "https://api/x"
+    waiter.webhook_base_url = "https://studio.example/"
+    assert waiter.with_webhook("https://api/x?a=1", "fal", "fal_webhook") == (
+        "https://api/x?a=1&fal_webhook=https%3A%2F%2Fstudio.example%2Fwebhooks%2Ffal"
+    )
+
+def test_poll_rate_capped_across_jobs(waiter):
+    waiter.max_rate = 100
+    waiter._burst = 1.0
+    jobs = [FakeJob(polls_before_done=1) for _ in range(10)]
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(waiter.wait_for("video", f"job-{i}", job.check, timeout=5)
+                               for i, job in enumerate(jobs)))
+        return loop.time() - start
+
+    # 20 polls au total, un jeton toutes les 10 ms au-delà du premier
+    assert asyncio.run(scenario()) >= 0.15
+    assert waiter.get_stats()["polls_total"] == 20
+
+def test_duplicate_wait_shares_the_same_job(waiter):
+    job = FakeJob(polls_before_done=2)
+    duplicate = FakeJob(polls_before_done=10 ** 6)
+
+    async def scenario():
+        return await asyncio.gather(
+            waiter.wait_for("video", "job-1", job.check, timeout=5),
+            waiter.wait_for("video", "job-1", duplicate.check, timeout=5)
+        )
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {"url": "https://example.com/clip.mp4"}
+    # Le job n'est suivi qu'une fois
+    assert duplicate.checks == 0
+    assert waiter.get_stats()["pending_jobs"] == 0
+
+def test_cancelled_duplicate_does_not_stop_the_other_wait(waiter):
+    job = FakeJob(polls_before_done=3)
+
+    async def scenario():
+        first = asyncio.create_task(waiter.wait_for("video", "job-1", job.check, timeout=5))
+        second = asyncio.create_task(waiter.wait_for("video", "job-1", job.check, timeout=5))
+        await asyncio.sleep(0)
+        second.cancel()
+        return await first
+
+    assert asyncio.run(scenario()) == {"url": "https://example.com/clip.mp4"}
@@ -0,0 +1,176 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+
+from config import config
+from models.schemas import AnimationTheme, StoryIdea
+from services.json_stream import IncrementalJsonParser
+from services.rate_limiter import ProviderRateLimiter
+
+def feed_in_chunks(text: str, size: int):
+    """Alimente un analyseur morceau par morceau et retourne toutes les valeurs produites"""
+    parser = IncrementalJsonParser()
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+CHUNK_SIZES = [1, 2, 3, 7, 1000]
+
+PARSER_CASES = [
+    (
+        "objet plat",
+        '{"Idea": "un chat", "Scene 1": "il saute"}',
+        [(("Idea",), "un chat"), (("Scene 1",), "il saute")],
+    ),
+    (
+        "échappements",
+        r'{"a": "guillemet \" et barre \\ fin", "b": "ligne\nsuivante", "c": "été"}',
+        [(("a",), 'guillemet " et barre \\ fin'), (("b",), "ligne\nsuivante"), (("c",), "été")],
+    ),
+    (
+        "accolades et virgules dans une chaîne",
+        '{"a": "{pas un objet}, [ni un tableau]: non", "b": "ok"}',
+        [(("a",), "{pas un objet}, [ni un tableau]: non"), (("b",), "ok")],
+    ),
+    (
+        "tableaux imbriqués",
+        '{"scenes": [{"description": "d0"}, {"description": "d1"}], "tags": ["x", ["y", "z"]]}',
+        [
+            (("scenes", 0, "description"), "d0"),
+            (("scenes", 1, "description"), "d1"),
+            (("tags", 0), "x"),
+            (("tags", 1, 0), "y"),
+            (("tags", 1, 1), "z"),
+        ],
+    ),
+    (
+        "valeurs non chaînes ignorées",
+        '{"n": 3, "ok": true, "rien": null, "s": "oui", "liste": [1, "deux"]}',
+        [(("s",), "oui"), (("liste", 1), "deux")],
+    ),
+    (
+        "balises markdown",
+        '```json\n{"Scene 1": "a"}\n```',
+        [(("Scene 1",), "a")],
+    ),
+    (
+        "flux tronqué dans une chaîne",
+        '{"Scene 1": "complète", "Scene 2": "coupée au mil',
+        [(("Scene 1",), "complète")],
+    ),
+]
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+@pytest.mark.parametrize("name,text,expected", PARSER_CASES, ids=[case[0] for case in PARSER_CASES])
+def test_parser_chunk_boundaries(name, text, expected, size):
+    assert feed_in_chunks(text, size) == expected
+
+def test_parser_emits_before_object_closes():
+    parser = IncrementalJsonParser()
+    assert parser.feed('{"scenes": [{"description": "d0"') == [(("scenes", 0, "description"), "d0")]
+    assert parser.feed('}, {"description": "d') == []
+    assert parser.feed('1"}') == [(("scenes", 1, "description"), "d1")]
+
+def test_parser_escape_split_across_chunks():
+    parser = IncrementalJsonParser()
+    assert parser.feed('{"a": "x\\') == []
+    assert parser.feed('"y"}') == [(("a",), 'x"y')]
+
+# --- Flux OpenAI -> scènes ---
+
+IDEA = StoryIdea(caption="c", idea="un chat curieux", environment="forêt", sound="oiseaux")
+
+class FakeStreamingClient:
+    """Client OpenAI factice: renvoie `text` par morceaux, puis lève `error` s'il est fourni"""
+
+    def __init__(self, text: str, chunk_size: int = 5, error: Optional[Exception] = None):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.error = error
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        async def chunks():
+            for start in range(0, len(self.text), self.chunk_size):
+                delta = SimpleNamespace(content=self.text[start:start + self.chunk_size])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            if self.error is not None:
+                raise self.error
+        return chunks()
+
+async def collect(stream) -> List:
+    return [item async for item in stream]
+
+@pytest.fixture
+def openai_key(monkeypatch):
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "test-key")
+
+@pytest.fixture
+def scene_creator(openai_key):
+    from services.scene_creator import SceneCreator
+    return SceneCreator(rate_limiter=ProviderRateLimiter())
+
+@pytest.fixture
+def story_planner(openai_key):
+    from services.story_planner import StoryPlanner
+    return StoryPlanner(rate_limiter=ProviderRateLimiter())
+
+def run_scene_stream(scene_creator, text: str, duration: int = 60, error: Optional[Exception] = None):
+    scene_creator.client = FakeStreamingClient(text, error=error)
+    return asyncio.run(collect(scene_creator.stream_scenes_from_idea(IDEA, duration)))
+
+def test_scene_stream_in_order(scene_creator):
+    text = json.dumps({f"Scene {i}": f"d{i}" for i in range(1, 5)})
+    scenes = run_scene_stream(scene_creator, text)
+    assert [(s.scene_number, s.description) for s in scenes] == [(1, "d1"), (2, "d2"), (3, "d3"), (4, "d4")]
+    assert all(s.duration == 15 and "forêt" in s.prompt for s in scenes)
+
+def test_scene_stream_out_of_order_duplicates_and_unknown_keys(scene_creator):
+    text = ('{"Scene 3": "d3", "Scene 1": "d1", "Scene 3": "doublon", '
+            '"Scene 9": "hors plan", "Note": "ignorée", "Scene 2": "d2", "Scene 4": "d4"}')
+    scenes = run_scene_stream(scene_creator, text)
+    assert [(s.scene_number, s.description) for s in scenes] == [(3, "d3"), (1, "d1"), (2, "d2"), (4, "d4")]
+
+def test_scene_stream_truncated_completed_by_fallback(scene_creator):
+    scenes = run_scene_stream(scene_creator, '{"Scene 2": "d2", "Scene 1": "coup', error=ConnectionError("coupé"))
+    assert [s.scene_number for s in scenes] == [2, 1, 3, 4]
+    assert scenes[0].description == "d2"
+    assert all(IDEA.idea in s.description for s in scenes[1:])
+
+def test_scene_stream_failure_before_any_scene_raises(scene_creator):
+    with pytest.raises(Exception, match="création des scènes"):
+        run_scene_stream(scene_creator, '{"Scene 1": "co', error=ConnectionError("coupé"))
+
+def run_plan_stream(story_planner, text: str, duration: int = 60, error: Optional[Exception] = None):
+    story_planner.client = FakeStreamingClient(text, error=error)
+    return asyncio.run(collect(story_planner.stream_story_plan(AnimationTheme.SPACE, duration)))
+
+def plan_text(scenes: List[str]) -> str:
+    idea = IDEA.model_dump(exclude={"status"})
+    return json.dumps({**idea, "scenes": [{"description": d} for d in scenes]})
+
+def test_plan_stream_idea_then_scenes(story_planner):
+    items = run_plan_stream(story_planner, plan_text(["d0", "d1", "d2", "d3"]))
+    assert items[0] == IDEA
+    assert [(s.scene_number, s.description) for s in items[1:]] == [(1, "d0"), (2, "d1"), (3, "d2"), (4, "d3")]
+
+def test_plan_stream_extra_scenes_ignored(story_planner):
+    items = run_plan_stream(story_planner, plan_text(["d0", "d1", "d2", "d3", "de trop"]))
+    assert [s.description for s in items[1:]] == ["d0", "d1", "d2", "d3"]
+
+def test_plan_stream_truncated_completed_by_fallback(story_planner):
+    text = plan_text(["d0", "d1", "d2", "d3"])
+    truncated = text[:text.index('"d1"') + 2]
+    items = run_plan_stream(story_planner, truncated, error=ConnectionError("coupé"))
+    assert items[0] == IDEA
+    assert [s.scene_number for s in items[1:]] == [1, 2, 3, 4]
+    assert items[1].description == "d0"
+    assert all(IDEA.idea in s.description for s in items[2:])
+
+def test_plan_stream_without_idea_raises(story_planner):
+    with pytest.raises(Exception, match="idée absente"):
+        run_plan_stream(story_planner, '{"caption": "c", "idea": "i"}')
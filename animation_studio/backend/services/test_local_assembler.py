@@ -0,0 +1,114 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from config import config
+from models.schemas import AudioTrack, VideoClip
+from services.local_assembler import FFmpegError, LocalVideoAssembler
+
+from test_clip_cache import FakeHttpClient
+
+H264 = {"codec_name": "h264", "width": 1280, "height": 720, "pix_fmt": "yuv420p", "r_frame_rate": "24/1"}
+
+class FakeFFmpeg:
+    """Remplace l'exécution des commandes: enregistre ffmpeg, répond aux sondages ffprobe"""
+
+    def __init__(self, probes):
+        self.probes = probes
+        self.commands = []
+
+    async def run(self, *args):
+        self.commands.append(args)
+        Path(args[-1]).write_bytes(b"video")
+        return b""
+
+    async def probe(self, path):
+        return self.probes[int(path.stem.split("_")[-1])]
+
+@pytest.fixture
+def assembler(tmp_path):
+    urls = {f"https://cdn/clip-{i}.mp4": (200, b"clip") for i in range(3)}
+    urls["https://cdn/audio.mp3"] = (200, b"audio")
+    local = LocalVideoAssembler(http_client=FakeHttpClient(urls))
+    local.output_dir = tmp_path / "renders"
+    return local
+
+def use_ffmpeg(assembler, monkeypatch, probes):
+    fake = FakeFFmpeg(probes)
+    monkeypatch.setattr(assembler, "_run", fake.run)
+    monkeypatch.setattr(assembler, "_probe", fake.probe)
+    return fake
+
+def clips(count):
+    return [VideoClip(scene_number=i + 1, video_url=f"https://cdn/clip-{i}.mp4", duration=5, status="completed")
+            for i in range(count)]
+
+def test_identical_formats_concatenated_without_reencoding(assembler, monkeypatch):
+    fake = use_ffmpeg(assembler, monkeypatch, [H264, H264, H264])
+    url = asyncio.run(assembler.assemble_final_video(clips(3)))
+    assert url.startswith("/cache/renders/") and url.endswith(".mp4")
+    assert len(fake.commands) == 1
+    assert fake.commands[0][fake.commands[0].index("-c") + 1] == "copy"
+    assert asyncio.run(assembler.validate_final_video(url))
+    # Dossier de travail supprimé, seule la vidéo finale reste
+    assert [p.name for p in assembler.output_dir.iterdir()] == [Path(url).name]
+
+def test_different_formats_reencoded_to_first_clip(assembler, monkeypatch):
+    fake = use_ffmpeg(assembler, monkeypatch, [H264, {**H264, "width": 640, "height": 360}])
+    asyncio.run(assembler.assemble_final_video(clips(2)))
+    normalize = [command for command in fake.commands if "libx264" in command]
+    assert len(normalize) == 2
+    assert all("scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2" in c
+               for c in normalize)
+
+def test_audio_track_muxed(assembler, monkeypatch):
+    fake = use_ffmpeg(assembler, monkeypatch, [H264, H264])
+    audio = AudioTrack(audio_url="https://cdn/audio.mp3", duration=10, description="musique")
+    asyncio.run(assembler.assemble_final_video(clips(2), audio))
+    command = fake.commands[-1]
+    assert "1:a:0" in command and "-shortest" in command
+
+def test_download_failure_reported_and_workdir_removed(assembler, monkeypatch):
+    use_ffmpeg(assembler, monkeypatch, [H264])
+    broken = [VideoClip(scene_number=1, video_url="https://cdn/absent.mp4", duration=5, status="completed")]
+    with pytest.raises(Exception, match="Erreur lors de l'assemblage final"):
+        asyncio.run(assembler.assemble_final_video(broken))
+    assert not list(assembler.output_dir.iterdir())
+
+def test_cached_clip_read_from_disk(assembler, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "CACHE_DIR", tmp_path)
+    cached = tmp_path / "clips" / "ab" / "abcd.mp4"
+    cached.parent.mkdir(parents=True)
+    cached.write_bytes(b"clip")
+    for public_base_url, url in (("", "/cache/clips/ab/abcd.mp4"),
+                                 ("https://studio.example", "https://studio.example/cache/clips/ab/abcd.mp4")):
+        monkeypatch.setattr(config, "PUBLIC_BASE_URL", public_base_url)
+        assert assembler._local_path(url) == cached
+    assert assembler._local_path("/cache/clips/ab/absent.mp4") is None
+
+def test_no_valid_clip():
+    failed = [VideoClip(scene_number=1, video_url="", duration=5, status="failed")]
+    with pytest.raises(Exception, match="Aucun clip"):
+        asyncio.run(LocalVideoAssembler().assemble_final_video(failed))
+
+def test_failing_command_raises_ffmpeg_error():
+    assembler = LocalVideoAssembler()
+    command = (sys.executable, "-c", "import sys; sys.stderr.write('flux invalide'); sys.exit(3)")
+    with pytest.raises(FFmpegError, match="flux invalide"):
+        asyncio.run(assembler._run(*command))
+
+def test_cancelled_command_kills_process():
+    assembler = LocalVideoAssembler()
+
+    async def scenario():
+        task = asyncio.create_task(assembler._run(sys.executable, "-c", "import time; time.sleep(30)"))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=5)
+        # Place du pool rendue
+        return assembler._process_slots._value
+
+    assert asyncio.run(scenario()) == assembler.max_processes
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from services.pipeline_graph import PipelineGraph, WAIT_ANY, WAIT_SETTLED
+
+def value(result):
+    """Nœud qui retourne `result` après avoir cédé la main"""
+    async def node(results):
+        await asyncio.sleep(0)
+        return result
+    return node
+
+def failing(message):
+    async def node(results):
+        await asyncio.sleep(0)
+        raise RuntimeError(message)
+    return node
+
+def run(graph):
+    return asyncio.run(graph.run())
+
+def test_dependencies_receive_results():
+    graph = PipelineGraph()
+    graph.add_node("idea", value("chat"))
+
+    async def scenes(results):
+        return [f"{results['idea']} {i}" for i in range(2)]
+
+    graph.add_node("scenes", scenes, deps=("idea",))
+    assert run(graph) == {"idea": "chat", "scenes": ["chat 0", "chat 1"]}
+
+def test_independent_nodes_run_concurrently():
+    graph = PipelineGraph()
+    started = []
+
+    async def scenario():
+        # Chaque nœud attend que l'autre ait démarré: bloquerait s'ils étaient exécutés l'un après l'autre
+        gate = asyncio.Event()
+
+        async def node(results):
+            started.append(len(started))
+            if len(started) == 2:
+                gate.set()
+            await asyncio.wait_for(gate.wait(), timeout=1)
+            return True
+
+        graph.add_node("a", node)
+        graph.add_node("b", node)
+        return await graph.run()
+
+    assert asyncio.run(scenario()) == {"a": True, "b": True}
+
+def test_nodes_added_while_running():
+    graph = PipelineGraph()
+
+    async def scenes(results):
+        for i in range(3):
+            graph.add_node(f"clip_{i}", value(i), deps=("scenes",))
+        return 3
+
+    graph.add_node("scenes", scenes)
+    results = run(graph)
+    assert [results[f"clip_{i}"] for i in range(3)] == [0, 1, 2]
+
+def test_required_failure_raises_and_cancels_running_nodes():
+    graph = PipelineGraph()
+    cancelled = []
+
+    async def slow(results):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    graph.add_node("slow", slow)
+    graph.add_node("broken", failing("panne"))
+    with pytest.raises(RuntimeError, match="panne"):
+        run(graph)
+    assert cancelled == ["slow"]
+
+def test_optional_failure_skips_dependents_only():
+    graph = PipelineGraph()
+    graph.add_node("audio", failing("pas de son"), optional=True)
+    graph.add_node("mix", value("mix"), deps=("audio",), optional=True)
+    graph.add_node("video", value("vidéo"))
+    results = run(graph)
+    assert results == {"video": "vidéo"}
+    assert list(graph.errors) == ["audio"]
+    assert graph.skipped == ["mix"]
+
+def test_wait_any_and_wait_settled():
+    graph = PipelineGraph()
+    graph.add_node("primary", failing("indisponible"), optional=True)
+    graph.add_node("fallback", value("secours"))
+    graph.add_node("first", value("ok"), deps=("primary", "fallback"), wait_for=WAIT_ANY)
+    graph.add_node("report", value("rapport"), deps=("primary", "fallback"), wait_for=WAIT_SETTLED)
+    results = run(graph)
+    assert results["first"] == "ok" and results["report"] == "rapport"
+
+def test_missing_dependency_raises():
+    graph = PipelineGraph()
+    graph.add_node("assembly", value(None), deps=("clips",))
+    with pytest.raises(Exception, match="Dépendances introuvables pour: assembly"):
+        run(graph)
+
+def test_duplicate_node_rejected():
+    graph = PipelineGraph()
+    graph.add_node("idea", value(None))
+    with pytest.raises(ValueError):
+        graph.add_node("idea", value(None))
+
+def test_events_emitted_in_order():
+    events = []
+
+    async def on_event(name, event, payload):
+        events.append((name, event))
+
+    graph = PipelineGraph(on_event=on_event)
+    graph.add_node("idea", value("chat"))
+    graph.add_node("broken", failing("panne"), deps=("idea",), optional=True)
+    run(graph)
+    assert events == [("idea", "started"), ("idea", "completed"), ("broken", "started"), ("broken", "failed")]
+
+def test_failing_event_handler_fails_the_node():
+    async def on_event(name, event, payload):
+        if event == "started":
+            raise RuntimeError("abonné en panne")
+
+    graph = PipelineGraph(on_event=on_event)
+    graph.add_node("idea", value("chat"))
+
+    async def scenario():
+        return await asyncio.wait_for(graph.run(), timeout=1)
+
+    with pytest.raises(RuntimeError, match="abonné en panne"):
+        asyncio.run(scenario())
+    assert "idea" in graph.errors
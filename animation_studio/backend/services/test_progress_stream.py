@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from services.job_store import InMemoryJobStore
+from services.progress_stream import ProgressBroadcaster
+
+@pytest.fixture
+def broadcaster():
+    fast = ProgressBroadcaster()
+    fast.heartbeat_interval = 0.02
+    fast.poll_interval = 0.01
+    fast.retention_seconds = 0.05
+    return fast
+
+async def collect(stream, limit=20):
+    events = []
+    async for event in stream:
+        events.append(event)
+        if len(events) >= limit:
+            break
+    return events
+
+def test_publish_progress_sends_only_changed_fields(broadcaster):
+    async def scenario():
+        first = broadcaster.publish_progress("a1", {"status": "running", "progress_percentage": 10})
+        second = broadcaster.publish_progress("a1", {"status": "running", "progress_percentage": 20})
+        unchanged = broadcaster.publish_progress("a1", {"status": "running", "progress_percentage": 20})
+        return first, second, unchanged
+
+    first, second, unchanged = asyncio.run(scenario())
+    assert first.data == {"status": "running", "progress_percentage": 10, "animation_id": "a1"}
+    assert second.data == {"progress_percentage": 20, "animation_id": "a1"}
+    assert second.event_id == first.event_id + 1
+    assert unchanged is None
+
+def test_subscriber_receives_live_events_until_terminal(broadcaster):
+    async def scenario():
+        task = asyncio.create_task(collect(broadcaster.subscribe("a1")))
+        await asyncio.sleep(0)
+        broadcaster.publish_progress("a1", {"progress_percentage": 50})
+        broadcaster.publish("a1", "completed", {"final_video_url": "/v.mp4"})
+        broadcaster.publish_progress("a1", {"progress_percentage": 99})
+        events = await asyncio.wait_for(task, timeout=1)
+        return [e.event for e in events if e is not None], broadcaster.get_stats()["subscribers"]
+
+    events, subscribers = asyncio.run(scenario())
+    assert events == ["progress", "completed"]
+    assert subscribers == 0
+
+def test_new_subscriber_gets_snapshot_instead_of_deltas(broadcaster):
+    async def scenario():
+        broadcaster.publish("a1", "started", {})
+        broadcaster.publish_progress("a1", {"status": "running", "progress_percentage": 10})
+        broadcaster.publish_progress("a1", {"progress_percentage": 30, "current_step": "clips"})
+        broadcaster.publish("a1", "completed", {})
+        return await collect(broadcaster.subscribe("a1"))
+
+    events = asyncio.run(scenario())
+    assert [e.event for e in events] == ["started", "progress", "completed"]
+    assert events[1].data == {"status": "running", "progress_percentage": 30, "current_step": "clips"}
+
+def test_resume_from_last_event_id(broadcaster):
+    async def scenario():
+        for percentage in (10, 20, 30):
+            broadcaster.publish_progress("a1", {"progress_percentage": percentage})
+        broadcaster.publish("a1", "failed", {"error": "panne"})
+        return await collect(broadcaster.subscribe("a1", last_event_id=2))
+
+    events = asyncio.run(scenario())
+    assert [(e.event_id, e.event) for e in events] == [(3, "progress"), (4, "failed")]
+
+def test_heartbeat_while_idle(broadcaster):
+    async def scenario():
+        return await collect(broadcaster.subscribe("a1"), limit=2)
+
+    assert asyncio.run(scenario()) == [None, None]
+
+def test_sse_format(broadcaster):
+    async def scenario():
+        return broadcaster.publish("a1", "completed", {"ok": True})
+
+    assert asyncio.run(scenario()).to_sse() == 'id: 1\nevent: completed\ndata: {"ok": true}\n\n'
+
+def test_follow_job_store_relays_other_worker_progress(broadcaster):
+    store = InMemoryJobStore()
+    store.create_job("a1", "pipeline", "running")
+
+    async def scenario():
+        broadcaster.follow_job_store(store, "a1")
+        task = asyncio.create_task(collect(broadcaster.subscribe("a1")))
+        await asyncio.sleep(0.02)
+        store.update_job("a1", progress={"progress_percentage": 60})
+        await asyncio.sleep(0.03)
+        store.update_job("a1", status="completed", result={"final_video_url": "/v.mp4"})
+        return await asyncio.wait_for(task, timeout=1)
+
+    events = [e for e in asyncio.run(scenario()) if e is not None]
+    assert events[-1].event == "completed"
+    assert events[-1].data == {"final_video_url": "/v.mp4"}
+    assert any(e.event == "progress" and e.data.get("progress_percentage") == 60 for e in events)
@@ -0,0 +1,109 @@
+import asyncio
+
+from services.rate_limiter import ProviderRateLimiter
+
+def limiter(concurrency=1, rate=0.0, burst=1) -> ProviderRateLimiter:
+    return ProviderRateLimiter({"wavespeed": {"concurrency": concurrency, "rate": rate, "burst": burst}})
+
+def test_concurrency_cap():
+    limits = limiter(concurrency=2, burst=10)
+    peak = active = 0
+
+    async def job():
+        nonlocal peak, active
+        async with limits.acquire("wavespeed", "model", owner="a1"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def scenario():
+        await asyncio.gather(*(job() for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert peak == 2
+    stats = limits.get_stats()["wavespeed:model"]
+    assert stats["granted"] == 6 and stats["active"] == 0
+
+def test_models_have_separate_limits():
+    limits = limiter(concurrency=1)
+
+    async def scenario():
+        async with limits.acquire("wavespeed", "model-a", owner="a1"):
+            await asyncio.wait_for(_hold(limits.acquire("wavespeed", "model-b", owner="a1")), timeout=1)
+
+    asyncio.run(scenario())
+
+async def _hold(context):
+    async with context:
+        pass
+
+def test_free_slot_goes_to_least_served_animation():
+    limits = limiter(concurrency=2, burst=10)
+    order = []
+
+    async def clip(owner, name, done=None):
+        async with limits.acquire("wavespeed", "model", owner=owner):
+            order.append(name)
+            if done is not None:
+                await done.wait()
+
+    async def scenario():
+        first_done, second_done = asyncio.Event(), asyncio.Event()
+        # a1 occupe les deux places puis met deux clips en attente avant le clip de a2
+        tasks = [asyncio.create_task(clip("a1", "a1-0", first_done)),
+                 asyncio.create_task(clip("a1", "a1-1", second_done))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(clip("a1", "a1-2")), asyncio.create_task(clip("a1", "a1-3"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(clip("a2", "a2-0")))
+        await asyncio.sleep(0)
+        first_done.set()
+        await asyncio.sleep(0.01)
+        second_done.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order[:3] == ["a1-0", "a1-1", "a2-0"]
+
+def test_token_bucket_spaces_submissions():
+    limits = limiter(concurrency=10, rate=50.0, burst=1)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            async with limits.acquire("wavespeed", "model", owner="a1"):
+                pass
+        return loop.time() - start
+
+    # Un jeton immédiat puis un toutes les 20 ms
+    assert asyncio.run(scenario()) >= 0.035
+
+def test_throttle_blocks_until_retry_after():
+    limits = limiter(concurrency=10, burst=10)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        limits.throttle("wavespeed", "model", retry_after=0.05)
+        start = loop.time()
+        async with limits.acquire("wavespeed", "model", owner="a1"):
+            pass
+        return loop.time() - start
+
+    assert asyncio.run(scenario()) >= 0.045
+    assert limits.get_stats()["wavespeed:model"]["throttled"] == 1
+
+def test_cancelled_waiter_does_not_leak_slot():
+    limits = limiter(concurrency=1, burst=10)
+
+    async def scenario():
+        async with limits.acquire("wavespeed", "model", owner="a1"):
+            waiting = asyncio.create_task(_hold(limits.acquire("wavespeed", "model", owner="a2")))
+            await asyncio.sleep(0)
+            waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        await asyncio.wait_for(_hold(limits.acquire("wavespeed", "model", owner="a3")), timeout=1)
+        return limits.get_stats()["wavespeed:model"]["active"]
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from services.job_store import InMemoryJobStore
+from services.request_coalescer import RequestCoalescer
+
+@pytest.fixture
+def store():
+    return InMemoryJobStore()
+
+@pytest.fixture
+def coalescer(store):
+    return RequestCoalescer(job_store=store)
+
+def test_fingerprint_normalizes_text_parameters():
+    a = RequestCoalescer.fingerprint("quick", prompt="Un  Chat\tcurieux ", duration=30)
+    b = RequestCoalescer.fingerprint("quick", prompt="un chat curieux", duration=30)
+    assert a == b
+    assert a != RequestCoalescer.fingerprint("quick", prompt="un chat curieux", duration=60)
+    assert a != RequestCoalescer.fingerprint("pipeline", prompt="un chat curieux", duration=30)
+
+def test_identical_request_joins_in_flight_job(coalescer, store):
+    fingerprint = RequestCoalescer.fingerprint("pipeline", theme="space", duration=30)
+    assert coalescer.get_leader(fingerprint) is None
+    store.create_job("a1", "pipeline", "running")
+    coalescer.register(fingerprint, "a1")
+    assert coalescer.get_leader(fingerprint) == "a1"
+    assert coalescer.get_stats() == {"in_flight": 1, "leaders": 1, "coalesced": 1}
+
+def test_finished_job_is_not_joined(coalescer, store):
+    fingerprint = RequestCoalescer.fingerprint("pipeline", theme="space", duration=30)
+    store.create_job("a1", "pipeline", "running")
+    coalescer.register(fingerprint, "a1")
+    store.update_job("a1", status="failed")
+    assert coalescer.get_leader(fingerprint) is None
+    assert coalescer.get_stats()["in_flight"] == 0
+
+def test_track_releases_fingerprint_even_on_failure(coalescer, store):
+    fingerprint = RequestCoalescer.fingerprint("pipeline", theme="space", duration=30)
+    store.create_job("a1", "pipeline", "running")
+    coalescer.register(fingerprint, "a1")
+
+    async def broken():
+        raise RuntimeError("panne")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(coalescer.track(fingerprint, "a1", broken)())
+    assert coalescer.get_leader(fingerprint) is None
+
+def test_release_ignores_newer_leader(coalescer, store):
+    fingerprint = RequestCoalescer.fingerprint("pipeline", theme="space", duration=30)
+    store.create_job("a2", "pipeline", "running")
+    coalescer.register(fingerprint, "a2")
+    coalescer.release(fingerprint, "a1")
+    assert coalescer.get_leader(fingerprint) == "a2"
+
+def test_shared_job_cancellable_only_by_last_follower(coalescer, store):
+    fingerprint = RequestCoalescer.fingerprint("pipeline", theme="space", duration=30)
+    store.create_job("a1", "pipeline", "running")
+    coalescer.register(fingerprint, "a1")
+    assert coalescer.get_leader(fingerprint) == "a1"
+    assert coalescer.get_leader(fingerprint) == "a1"
+    # Trois clients suivent le job: les deux premiers départs ne font que détacher
+    assert not coalescer.detach("a1")
+    assert not coalescer.detach("a1")
+    assert coalescer.detach("a1")
+
+def test_job_without_followers_is_cancellable(coalescer):
+    assert coalescer.detach("non-regroupé")
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+from models.schemas import AnimationTheme, Scene, StoryIdea, StoryPlan
+from services.story_pool import StoryPlanPool
+
+def make_plan(text: str, scene_count: int = 2) -> StoryPlan:
+    idea = StoryIdea(caption=text, idea=text, environment="forêt", sound="oiseaux")
+    scenes = [Scene(scene_number=i + 1, description=f"{text} {i}", duration=10, prompt=text)
+              for i in range(scene_count)]
+    return StoryPlan(story_idea=idea, scenes=scenes)
+
+class FakePlanner:
+    """Planificateur factice: sert les plans (ou exceptions) de `outputs` dans l'ordre"""
+
+    def __init__(self, outputs, scene_count: int = 2):
+        self.outputs = list(outputs)
+        self.calls = 0
+        self.scene_creator = SimpleNamespace(calculate_scene_distribution=lambda duration: [10] * scene_count)
+
+    async def generate_story_plan(self, theme, duration):
+        self.calls += 1
+        output = self.outputs.pop(0) if self.outputs else make_plan(f"plan {self.calls}")
+        if isinstance(output, Exception):
+            raise output
+        return output
+
+class FakeIdeaGenerator:
+    def __init__(self, refused=()):
+        self.refused = set(refused)
+
+    async def validate_idea(self, idea):
+        return idea.idea not in self.refused
+
+def make_pool(planner, idea_generator=None, size=2, low_water=1):
+    return StoryPlanPool(planner, idea_generator or FakeIdeaGenerator(), size=size, low_water=low_water,
+                         themes=[AnimationTheme.SPACE], durations=[20])
+
+async def settle(pool):
+    """Attend la fin des remplissages en cours"""
+    await asyncio.gather(*pool._refills.values())
+
+def test_disabled_pool_serves_nothing():
+    pool = make_pool(FakePlanner([]), size=0)
+    assert not pool.enabled
+    assert pool.take(AnimationTheme.SPACE, 20) is None
+
+def test_fills_then_serves_each_plan_once():
+    planner = FakePlanner([make_plan("a"), make_plan("b"), make_plan("c")])
+    pool = make_pool(planner)
+
+    async def scenario():
+        await pool.start()
+        await settle(pool)
+        served = [pool.take(AnimationTheme.SPACE, 20), pool.take(AnimationTheme.SPACE, 20)]
+        await settle(pool)
+        served.append(pool.take(AnimationTheme.SPACE, 20))
+        await pool.close()
+        return served
+
+    served = asyncio.run(scenario())
+    assert [plan.story_idea.idea for plan in served] == ["a", "b", "c"]
+    assert pool.get_stats()["hits"] == 3
+
+def test_empty_pool_is_a_miss():
+    pool = make_pool(FakePlanner([]))
+    assert pool.take(AnimationTheme.SPACE, 20) is None
+    assert pool.get_stats()["misses"] == 1
+
+def test_rejects_incomplete_duplicate_and_refused_plans():
+    planner = FakePlanner([
+        make_plan("incomplet", scene_count=1), make_plan("a"), make_plan("a"),
+        make_plan("refusé"), make_plan("b"), make_plan("c")
+    ])
+    pool = make_pool(planner, FakeIdeaGenerator(refused=["refusé"]), size=3)
+
+    async def scenario():
+        await pool.start()
+        await settle(pool)
+        plans = list(pool._plans[(AnimationTheme.SPACE, 20)])
+        await pool.close()
+        return plans
+
+    assert [plan.story_idea.idea for plan in asyncio.run(scenario())] == ["a", "b", "c"]
+    assert pool.discarded == 3
+
+def test_generation_failure_backs_off():
+    planner = FakePlanner([RuntimeError("OpenAI indisponible")])
+    pool = make_pool(planner)
+
+    async def scenario():
+        await pool.start()
+        await settle(pool)
+        pool.take(AnimationTheme.SPACE, 20)
+        refilling = pool.get_stats()["refilling"]
+        await pool.close()
+        return refilling
+
+    # Pas de nouvelle tentative avant STORY_POOL_RETRY_DELAY
+    assert asyncio.run(scenario()) == 0
+    assert planner.calls == 1
@@ -1,19 +1,45 @@
 import asyncio
-import aiohttp
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 from config import config
 from models.schemas import VideoClip, AudioTrack
+from .http_client import ProviderHttpClient, ProviderHTTPError, http_client as shared_http_client
+from .job_waiter import JobCompletionWaiter, completion_waiter as shared_completion_waiter
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter, retry_after
+from .endpoint_registry import ProviderEndpointRegistry, endpoint_registry as shared_endpoint_registry
+from .metrics import metrics
+from .eta_estimator import eta_estimator
+from .local_assembler import LocalVideoAssembler
 
 class VideoAssembler:
     """Service d'assemblage vidéo final via FAL AI FFmpeg (basé sur le workflow zseedance.json)"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[ProviderHttpClient] = None,
+        completion_waiter: Optional[JobCompletionWaiter] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        endpoints: Optional[ProviderEndpointRegistry] = None
+    ):
         self.fal_api_key = config.FAL_API_KEY
         self.ffmpeg_model = config.FAL_FFMPEG_MODEL
-        self.base_url = "https://queue.fal.run"
+        self.http_client = http_client or shared_http_client
+        self.completion_waiter = completion_waiter or shared_completion_waiter
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        # Variante d'URL FAL AI qui répond (disjoncteur sur les variantes en échec)
+        self.endpoints = endpoints or shared_endpoint_registry
     
-    async def assemble_final_video(self, video_clips: List[VideoClip], audio_track: AudioTrack = None) -> str:
-        """Assemble la vidéo finale à partir des clips et de l'audio"""
+    async def assemble_final_video(
+        self,
+        video_clips: List[VideoClip],
+        audio_track: AudioTrack = None,
+        provider_job_id: Optional[str] = None,
+        on_submitted: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Assemble la vidéo finale à partir des clips et de l'audio
+        
+        provider_job_id reprend l'attente d'un assemblage déjà soumis (sans le resoumettre);
+        on_submitted reçoit l'identifiant d'un nouveau job dès sa soumission.
+        """
         
         # Filtrer les clips valides
         valid_clips = [clip for clip in video_clips if clip.video_url and clip.status == "completed"]
@@ -25,20 +51,28 @@ class VideoAssembler:
             # 1. Créer la structure des pistes (inspirée de zseedance.json)
             tracks_config = self._create_tracks_configuration(valid_clips, audio_track)
             
-            # 2. Soumettre la requête d'assemblage
-            assembly_data = await self._submit_video_assembly(tracks_config)
-            
-            if not assembly_data or "request_id" not in assembly_data:
-                raise Exception("Réponse invalide de l'API FAL AI FFmpeg")
-            
-            request_id = assembly_data["request_id"]
-            
-            # 3. Attendre le traitement (équivalent du "Wait for Final Video" dans n8n)
-            total_duration = sum(clip.duration for clip in valid_clips)
-            await asyncio.sleep(min(total_duration * 2, 120))  # Attente adaptative
-            
-            # 4. Récupérer le résultat
-            result = await self._get_assembly_result(request_id)
+            # Place réservée auprès du régulateur global pendant toute la durée du job
+            async with self.rate_limiter.acquire("fal_ffmpeg", self.ffmpeg_model):
+                # 2. Soumettre la requête d'assemblage (sauf job repris)
+                request_id = provider_job_id
+                if request_id is None:
+                    assembly_data = await self._submit_video_assembly(tracks_config)
+                    
+                    if not assembly_data or "request_id" not in assembly_data:
+                        raise Exception("Réponse invalide de l'API FAL AI FFmpeg")
+                    
+                    request_id = assembly_data["request_id"]
+                    if on_submitted:
+                        on_submitted(request_id)
+                
+                # 3. Attendre le traitement et récupérer le résultat (webhook ou polling adaptatif)
+                try:
+                    result = await self._get_assembly_result(request_id)
+                except asyncio.CancelledError:
+                    # Animation annulée: abandonner aussi le job côté FAL AI (sauf arrêt du serveur)
+                    if self.completion_waiter.should_cancel_provider_job():
+                        self._cancel_video_assembly(request_id)
+                    raise
             
             if not result or "video_url" not in result:
                 raise Exception("Erreur lors de l'assemblage vidéo")
@@ -93,13 +127,6 @@ class VideoAssembler:
     async def _submit_video_assembly(self, tracks_config: Dict[str, Any]) -> Dict[str, Any]:
         """Soumet une requête d'assemblage vidéo à FAL AI FFmpeg"""
         
-        url = f"{self.base_url}/{self.ffmpeg_model}"
-        
-        headers = {
-            "Authorization": f"Key {self.fal_api_key}",
-            "Content-Type": "application/json"
-        }
-        
         # Configuration additionnelle pour l'assemblage
         assembly_params = {
             **tracks_config,
@@ -108,59 +135,91 @@ class VideoAssembler:
             "framerate": 24  # Standard pour les dessins animés
         }
         
-        async with aiohttp.ClientSession() as session:
+        return await self.endpoints.call("fal", lambda base_url: self._submit_to(base_url, assembly_params))
+
+    async def _submit_to(self, base_url: str, assembly_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Soumission sur une variante d'URL FAL AI"""
+        
+        url = self.completion_waiter.with_webhook(
+            f"{base_url}/{self.ffmpeg_model}", "fal", "fal_webhook"
+        )
+        
+        headers = {
+            "Authorization": f"Key {self.fal_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        with metrics.time(metrics.job_phase_duration, stage="assembly", phase="submit"):
+            session = await self.http_client.get_session(url)
             async with session.post(url, json=assembly_params, headers=headers) as response:
+                if response.status == 429:
+                    self.rate_limiter.throttle("fal_ffmpeg", self.ffmpeg_model, retry_after(response))
                 if response.status not in [200, 201]:
                     error_text = await response.text()
-                    raise Exception(f"Erreur API FAL AI FFmpeg {response.status}: {error_text}")
-                
+                    raise ProviderHTTPError(response.status, f"Erreur API FAL AI FFmpeg {response.status}: {error_text}")
+            
                 return await response.json()
 
+    def _cancel_video_assembly(self, request_id: str):
+        """Demande à FAL AI d'annuler un assemblage (sans attendre la réponse)"""
+        self.http_client.send_in_background(
+            "PUT",
+            f"{self.endpoints.preferred('fal')}/{self.ffmpeg_model}/requests/{request_id}/cancel",
+            headers={"Authorization": f"Key {self.fal_api_key}"}
+        )
+
     async def _get_assembly_result(self, request_id: str) -> Dict[str, Any]:
         """Récupère le résultat de l'assemblage vidéo"""
         
-        url = f"{self.base_url}/{self.ffmpeg_model}/requests/{request_id}"
+        return await self.completion_waiter.wait_for(
+            "assembly",
+            request_id,
+            lambda: self._check_assembly_result(request_id),
+            timeout=config.ASSEMBLY_JOB_TIMEOUT
+        )
+
+    async def _check_assembly_result(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Interroge FAL AI une fois: résultat si terminé, None si encore en cours"""
+        
+        try:
+            return await self.endpoints.call("fal", lambda base_url: self._check_at(base_url, request_id))
+        except ProviderHTTPError as e:
+            # Erreur transitoire (ou disjoncteur ouvert): réessayer au prochain poll (timeout global)
+            print(f"Avertissement: récupération assemblage {e.status}: {e}")
+            return None
+
+    async def _check_at(self, base_url: str, request_id: str) -> Optional[Dict[str, Any]]:
+        """Poll sur une variante d'URL FAL AI"""
+        
+        url = f"{base_url}/{self.ffmpeg_model}/requests/{request_id}"
         
         headers = {
             "Authorization": f"Key {self.fal_api_key}"
         }
         
-        max_retries = 12
-        retry_delay = 15  # secondes
-        
-        for attempt in range(max_retries):
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Vérifier si l'assemblage est terminé
-                        if result.get("status") == "completed":
-                            # Extraire l'URL vidéo du résultat
-                            if "video" in result:
-                                return {"video_url": result["video"]["url"]}
-                            elif "outputs" in result and len(result["outputs"]) > 0:
-                                return {"video_url": result["outputs"][0]}
-                            else:
-                                raise Exception("Aucune vidéo assemblée générée")
-                        
-                        elif result.get("status") == "failed":
-                            raise Exception(f"Assemblage vidéo échoué: {result.get('error', 'Erreur inconnue')}")
-                        
-                        # Si en cours, attendre et réessayer
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_delay)
-                            continue
-                    
+        session = await self.http_client.get_session(url)
+        async with session.get(url, headers=headers) as response:
+            if response.status == 200:
+                result = await response.json()
+                
+                # Vérifier si l'assemblage est terminé
+                if result.get("status") == "completed":
+                    # Extraire l'URL vidéo du résultat
+                    if "video" in result:
+                        return {"video_url": result["video"]["url"]}
+                    elif "outputs" in result and len(result["outputs"]) > 0:
+                        return {"video_url": result["outputs"][0]}
                     else:
-                        error_text = await response.text()
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Erreur lors de la récupération assemblage {response.status}: {error_text}")
-        
-        raise Exception("Timeout: L'assemblage vidéo n'a pas abouti dans les temps")
+                        raise Exception("Aucune vidéo assemblée générée")
+                
+                elif result.get("status") == "failed":
+                    raise Exception(f"Assemblage vidéo échoué: {result.get('error', 'Erreur inconnue')}")
+                
+                # Encore en cours
+                return None
+            
+            error_text = await response.text()
+            raise ProviderHTTPError(response.status, error_text)
 
     async def create_simple_sequence(self, video_clips: List[VideoClip]) -> str:
         """Crée une séquence simple sans audio (méthode fallback)"""
@@ -187,12 +246,11 @@ class VideoAssembler:
         }
         
         try:
-            assembly_data = await self._submit_video_assembly(simple_config)
-            request_id = assembly_data["request_id"]
-            
-            await asyncio.sleep(60)  # Attente fixe pour séquence simple
-            
-            result = await self._get_assembly_result(request_id)
+            async with self.rate_limiter.acquire("fal_ffmpeg", self.ffmpeg_model):
+                assembly_data = await self._submit_video_assembly(simple_config)
+                request_id = assembly_data["request_id"]
+                
+                result = await self._get_assembly_result(request_id)
             return result["video_url"]
             
         except Exception as e:
@@ -205,10 +263,10 @@ class VideoAssembler:
             return False
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.head(video_url) as response:
-                    content_type = response.headers.get("content-type", "")
-                    return response.status == 200 and "video" in content_type
+            session = await self.http_client.get_session(video_url)
+            async with session.head(video_url) as response:
+                content_type = response.headers.get("content-type", "")
+                return response.status == 200 and "video" in content_type
         except:
             return False
 
@@ -223,4 +281,22 @@ class VideoAssembler:
         duration_factor = total_duration  # 1 seconde par seconde de vidéo
         complexity_factor = num_clips * 10  # 10 secondes par clip supplémentaire
         
-        return base_time + duration_factor + complexity_factor 
\ No newline at end of file
+        # Durée apprise sur les générations passées, si disponible
+        return int(eta_estimator.estimate(
+            "assembly", base_time + duration_factor + complexity_factor,
+            num_clips, video_clips[0].duration if video_clips else 0
+        ))
+
+def create_video_assembler(
+    backend: str = None,
+    http_client: Optional[ProviderHttpClient] = None,
+    completion_waiter: Optional[JobCompletionWaiter] = None,
+    rate_limiter: Optional[ProviderRateLimiter] = None
+):
+    """Crée l'assembleur configuré (ASSEMBLY_BACKEND: fal ou local)"""
+    backend = (backend or config.ASSEMBLY_BACKEND).lower()
+    if backend == "local":
+        return LocalVideoAssembler(http_client=http_client)
+    if backend == "fal":
+        return VideoAssembler(http_client=http_client, completion_waiter=completion_waiter, rate_limiter=rate_limiter)
+    raise ValueError(f"Backend d'assemblage inconnu: {backend}")
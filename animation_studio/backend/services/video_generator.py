@@ -1,20 +1,55 @@
 import asyncio
-import aiohttp
+import math
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 from config import config
 from models.schemas import Scene, VideoClip
+from .http_client import ProviderHttpClient, ProviderHTTPError, http_client as shared_http_client
+from .job_waiter import JobCompletionWaiter, completion_waiter as shared_completion_waiter
+from .rate_limiter import ProviderRateLimiter, rate_limiter as shared_rate_limiter, retry_after
+from .metrics import metrics
+from .eta_estimator import eta_estimator
+from .clip_cache import ClipCache, clip_cache as shared_clip_cache
+from .clip_retry import ClipRetryBudget, ClipRetryPolicy
+from .endpoint_registry import ProviderEndpointRegistry, endpoint_registry as shared_endpoint_registry
 
 class VideoGenerator:
     """Service de génération vidéo via Wavespeed AI SeedANce"""
     
-    def __init__(self):
-        self.base_url = config.WAVESPEED_BASE_URL
+    def __init__(
+        self,
+        http_client: Optional[ProviderHttpClient] = None,
+        completion_waiter: Optional[JobCompletionWaiter] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        clip_cache: Optional[ClipCache] = None,
+        retry_policy: Optional[ClipRetryPolicy] = None,
+        endpoints: Optional[ProviderEndpointRegistry] = None
+    ):
         self.api_key = config.WAVESPEED_API_KEY
         self.model = config.WAVESPEED_MODEL
+        self.http_client = http_client or shared_http_client
+        self.completion_waiter = completion_waiter or shared_completion_waiter
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.clip_cache = clip_cache or shared_clip_cache
+        # Relances, doublon contre la latence de queue et budget de soumissions
+        self.retry_policy = retry_policy or ClipRetryPolicy(self.completion_waiter)
+        # Variante d'URL Wavespeed qui répond (disjoncteur sur les variantes en échec)
+        self.endpoints = endpoints or shared_endpoint_registry
     
-    async def generate_video_clip(self, scene: Scene) -> VideoClip:
-        """Génère un clip vidéo pour une scène donnée via Wavespeed AI"""
+    async def generate_video_clip(
+        self,
+        scene: Scene,
+        provider_job_id: Optional[str] = None,
+        on_submitted: Optional[Callable[[str], None]] = None,
+        budget: Optional[ClipRetryBudget] = None
+    ) -> VideoClip:
+        """Génère un clip vidéo pour une scène donnée via Wavespeed AI
+        
+        provider_job_id reprend l'attente d'une prédiction déjà soumise (sans la resoumettre);
+        on_submitted reçoit l'identifiant de la prédiction qui porte le clip (nouvelle tentative
+        dès sa soumission, doublon seulement s'il l'emporte).
+        Les relances et doublons consomment budget (budget de l'animation, sinon du clip).
+        """
         
         # Préparer les paramètres selon l'API Wavespeed (inspiré de zseedance.json)
         video_params = {
@@ -23,23 +58,51 @@ class VideoGenerator:
             "prompt": scene.prompt
         }
         
-        try:
-            # 1. Soumettre la requête de génération
-            video_data = await self._submit_video_generation(video_params)
-            
-            if not video_data or "data" not in video_data:
-                raise Exception("Réponse invalide de l'API Wavespeed")
-            
-            prediction_id = video_data["data"]["id"]
-            
-            # 2. Attendre le traitement (équivalent du "Wait for clips" dans n8n)
-            await asyncio.sleep(min(scene.duration * 10, 140))  # Attente adaptative basée sur la durée
-            
-            # 3. Récupérer le résultat
-            result = await self._get_video_result(prediction_id)
+        # Scène déjà générée avec les mêmes paramètres: servir le clip en cache
+        cache_key = ClipCache.make_key(
+            self.model, scene.prompt, scene.duration, config.VIDEO_ASPECT_RATIO, config.VIDEO_RESOLUTION
+        )
+        cached = self.clip_cache.get(cache_key) if config.CLIP_CACHE_ENABLED else None
+        if cached:
+            return VideoClip(
+                scene_number=scene.scene_number,
+                video_url=self.clip_cache.clip_url(cache_key, cached),
+                duration=scene.duration,
+                status="completed"
+            )
+        
+        async def attempt(prediction_id: Optional[str], submitted: Callable[[str], None]) -> Dict[str, Any]:
+            # Place réservée auprès du régulateur global pendant toute la durée du job
+            async with self.rate_limiter.acquire("wavespeed", self.model):
+                # 1. Soumettre la requête de génération (sauf prédiction reprise)
+                if prediction_id is None:
+                    video_data = await self._submit_video_generation(video_params)
+                    
+                    if not video_data or "data" not in video_data:
+                        raise Exception("Réponse invalide de l'API Wavespeed")
+                    
+                    prediction_id = video_data["data"]["id"]
+                submitted(prediction_id)
+                
+                # 2. Attendre le traitement et récupérer le résultat (webhook ou polling adaptatif)
+                # (Wavespeed n'expose pas d'annulation: un clip annulé ou un doublon perdant se
+                # termine côté fournisseur, mais sa place est libérée immédiatement)
+                result = await self._get_video_result(prediction_id)
             
             if not result or "video" not in result:
                 raise Exception("Erreur lors de la récupération du résultat vidéo")
+            return result
+        
+        try:
+            # Relances sur erreur transitoire, doublon si le clip traîne (dans la limite du budget)
+            result = await self.retry_policy.run(attempt, provider_job_id, budget, on_submitted)
+            
+            if config.CLIP_CACHE_ENABLED:
+                self.clip_cache.store_in_background(cache_key, result["video"]["url"], {
+                    "model": self.model,
+                    "prompt": scene.prompt,
+                    "duration": scene.duration
+                })
             
             return VideoClip(
                 scene_number=scene.scene_number,
@@ -60,76 +123,94 @@ class VideoGenerator:
     async def _submit_video_generation(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Soumet une requête de génération vidéo à Wavespeed AI"""
         
-        url = f"{self.base_url}/{self.model}"
+        return await self.endpoints.call("wavespeed", lambda base_url: self._submit_to(base_url, params))
+
+    async def _submit_to(self, base_url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Soumission sur une variante d'URL Wavespeed"""
+        
+        url = self.completion_waiter.with_webhook(
+            f"{base_url}/{self.model}", "wavespeed", "webhook"
+        )
         
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
         
-        async with aiohttp.ClientSession() as session:
+        with metrics.time(metrics.job_phase_duration, stage="video", phase="submit"):
+            session = await self.http_client.get_session(url)
             async with session.post(url, json=params, headers=headers) as response:
+                if response.status == 429:
+                    self.rate_limiter.throttle("wavespeed", self.model, retry_after(response))
                 if response.status != 200:
                     error_text = await response.text()
-                    raise Exception(f"Erreur API Wavespeed {response.status}: {error_text}")
-                
+                    raise ProviderHTTPError(response.status, f"Erreur API Wavespeed {response.status}: {error_text}")
+            
                 return await response.json()
 
     async def _get_video_result(self, prediction_id: str) -> Dict[str, Any]:
         """Récupère le résultat d'une génération vidéo"""
         
-        url = f"{self.base_url}/predictions/{prediction_id}/result"
+        return await self.completion_waiter.wait_for(
+            "video",
+            prediction_id,
+            lambda: self._check_video_result(prediction_id),
+            timeout=config.VIDEO_JOB_TIMEOUT
+        )
+
+    async def _check_video_result(self, prediction_id: str) -> Optional[Dict[str, Any]]:
+        """Interroge Wavespeed une fois: résultat si terminé, None si encore en cours"""
+        
+        try:
+            return await self.endpoints.call("wavespeed", lambda base_url: self._check_at(base_url, prediction_id))
+        except Exception as e:
+            if not self.endpoints.is_endpoint_failure(e):
+                raise
+            # Endpoint en échec (ou disjoncteur ouvert): réessayer au prochain poll (timeout global)
+            # plutôt que faire échouer le clip et resoumettre une prédiction encore en cours
+            print(f"Avertissement: récupération vidéo {prediction_id}: {e}")
+            return None
+
+    async def _check_at(self, base_url: str, prediction_id: str) -> Optional[Dict[str, Any]]:
+        """Poll sur une variante d'URL Wavespeed"""
+        
+        url = f"{base_url}/predictions/{prediction_id}/result"
         
         headers = {
             "Authorization": f"Bearer {self.api_key}"
         }
         
-        max_retries = 10
-        retry_delay = 15  # secondes
-        
-        for attempt in range(max_retries):
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Vérifier si la génération est terminée
-                        if result.get("status") == "completed":
-                            return result
-                        elif result.get("status") == "failed":
-                            raise Exception(f"Génération vidéo échouée: {result.get('error', 'Erreur inconnue')}")
-                        
-                        # Si en cours, attendre et réessayer
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_delay)
-                            continue
-                    
-                    elif response.status == 404:
-                        # Prédiction non trouvée, réessayer
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_delay)
-                            continue
-                    
-                    else:
-                        error_text = await response.text()
-                        raise Exception(f"Erreur lors de la récupération {response.status}: {error_text}")
-        
-        raise Exception("Timeout: La génération vidéo n'a pas abouti dans les temps")
+        session = await self.http_client.get_session(url)
+        async with session.get(url, headers=headers) as response:
+            if response.status == 200:
+                result = await response.json()
+                
+                # Vérifier si la génération est terminée
+                if result.get("status") == "completed":
+                    return result
+                elif result.get("status") == "failed":
+                    raise Exception(f"Génération vidéo échouée: {result.get('error', 'Erreur inconnue')}")
+                
+                # Encore en cours
+                return None
+            
+            elif response.status == 404:
+                # Prédiction pas encore visible, réessayer
+                return None
+            
+            else:
+                error_text = await response.text()
+                raise ProviderHTTPError(response.status, f"Erreur lors de la récupération {response.status}: {error_text}")
 
     async def generate_all_clips(self, scenes: List[Scene]) -> List[VideoClip]:
         """Génère tous les clips vidéo pour une liste de scènes"""
         
         clips = []
         
-        # Générer les clips en parallèle avec limitation pour éviter la surcharge
-        semaphore = asyncio.Semaphore(3)  # Maximum 3 générations simultanées
-        
-        async def generate_with_semaphore(scene: Scene) -> VideoClip:
-            async with semaphore:
-                return await self.generate_video_clip(scene)
-        
-        # Créer les tâches
-        tasks = [generate_with_semaphore(scene) for scene in scenes]
+        # Générer les clips en parallèle (limités par le régulateur global Wavespeed),
+        # relances et doublons pris sur un budget commun
+        budget = ClipRetryBudget()
+        tasks = [self.generate_video_clip(scene, budget=budget) for scene in scenes]
         
         # Exécuter toutes les tâches
         clips = await asyncio.gather(*tasks, return_exceptions=True)
@@ -156,9 +237,9 @@ class VideoGenerator:
             return False
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.head(url) as response:
-                    return response.status == 200
+            session = await self.http_client.get_session(url)
+            async with session.head(url) as response:
+                return response.status == 200
         except:
             return False
 
@@ -171,8 +252,13 @@ class VideoGenerator:
         # Temps supplémentaire selon la durée de la scène
         duration_factor = sum(scene.duration for scene in scenes) * 2
         
-        # Temps de traitement parallèle (avec limitation à 3 simultanés)
-        parallel_factor = max(1, len(scenes) / 3)
+        # Temps de traitement parallèle (limité par le plafond de jobs Wavespeed)
+        parallel_factor = max(1, len(scenes) / self.rate_limiter.max_concurrency("wavespeed"))
+        
+        # Durée d'un clip apprise sur les générations passées, si disponible
+        clip_time = eta_estimator.estimate("clip", None, len(scenes), scenes[0].duration if scenes else 0)
+        if clip_time is not None:
+            return int(clip_time * math.ceil(parallel_factor))
         
         total_time = (base_time_per_scene * parallel_factor) + duration_factor
         
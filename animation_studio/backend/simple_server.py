@@ -1,43 +1,19 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+#!/usr/bin/env python3
+"""
+Serveur de test pour Animation Studio
 
-app = FastAPI(title="Animation Studio API")
+Ancien serveur autonome: lance désormais l'application unique (main.py) avec le
+moteur "demo" sur le port 8008: pipeline complet avec fournisseurs simulés aux durées réalistes.
+Équivalent à: PIPELINE_ENGINE=demo PORT=8008 python start.py
+"""
 
-# Configuration CORS simple
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+import os
 
-@app.get("/")
-async def root():
-    return {"message": "Animation Studio API - Serveur de test"}
-
-@app.get("/diagnostic")
-async def diagnostic():
-    return {
-        "openai_configured": True,
-        "wavespeed_configured": True,
-        "fal_configured": True,
-        "all_systems_operational": True,
-        "details": {"test": "Server is running"}
-    }
-
-@app.get("/themes")
-async def get_themes():
-    return {
-        "themes": {
-            "space": {"name": "Space", "description": "Aventure spatiale", "icon": "🚀"},
-            "nature": {"name": "Nature", "description": "Aventure nature", "icon": "🌳"},
-            "adventure": {"name": "Adventure", "description": "Aventure héroïque", "icon": "🏰"}
-        },
-        "durations": [30, 60, 120],
-        "default_duration": 30
-    }
+# Valeurs par défaut de ce serveur (avant le chargement de la configuration)
+os.environ.setdefault("PIPELINE_ENGINE", "demo")
+os.environ.setdefault("PORT", "8008")
+os.environ.setdefault("HOST", "localhost")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="localhost", port=8008, log_level="info")
+    from start import run
+    run()
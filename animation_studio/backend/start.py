@@ -26,12 +26,13 @@ except ImportError as e:
     print(f"❌ Erreur configuration: {e}")
     sys.exit(1)
 
-# Démarrage immédiat
-if __name__ == "__main__":
+def run():
+    """Démarre l'application unique (moteur choisi par PIPELINE_ENGINE)"""
     import uvicorn
     from main import app
     
     print(f"🚀 Serveur RAPIDE sur: http://{config.HOST}:{config.PORT}")
+    print(f"⚙️ Moteur: {config.PIPELINE_ENGINE}")
     print(f"📚 Documentation: http://{config.HOST}:{config.PORT}/docs")
     print("⚡ Mode accéléré - validation complète disponible via /diagnostic")
     print("🛑 Ctrl+C pour arrêter")
@@ -44,4 +45,8 @@ if __name__ == "__main__":
         reload=False,
         log_level="warning",  # Moins de logs = plus rapide
         access_log=False      # Désactiver logs d'accès
-    ) 
\ No newline at end of file
+    )
+
+# Démarrage immédiat
+if __name__ == "__main__":
+    run() 
\ No newline at end of file
@@ -4,6 +4,8 @@ taskkill /F /IM python.exe 2>nul
 timeout /t 3 /nobreak >nul
 
 echo 🎬 DÉMARRAGE SERVEUR VRAIE GÉNÉRATION...
-echo 🚫 AUCUN FALLBACK - AUCUNE VIDÉO PRÉCRÉÉE
+echo 🚫 AUCUNE VIDÉO PRÉCRÉÉE - vrais fournisseurs uniquement
 echo 📍 Port: 8012
-python real_generation_server.py 
\ No newline at end of file
+set PIPELINE_ENGINE=real
+set PORT=8012
+python start.py 
\ No newline at end of file
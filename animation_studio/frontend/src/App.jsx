@@ -30,7 +30,12 @@ function App() {
     try {
       const response = await fetch('http://localhost:8011/themes');
       const data = await response.json();
-      setThemes(data.themes || []);
+      // Thèmes indexés par identifiant: { space: { name, icon, ... }, ... }
+      setThemes(Object.entries(data.themes || {}).map(([id, theme]) => ({
+        id,
+        name: theme.name,
+        emoji: theme.icon
+      })));
     } catch (error) {
       console.error('Erreur:', error);
     }
@@ -80,15 +85,20 @@ function App() {
     try {
       const response = await fetch(`http://localhost:8011/status/${id}`);
       const data = await response.json();
+      // { type: "progress" | "result", data: AnimationProgress | AnimationResult }
+      const payload = data.data || {};
       
-      setProgress(data.progress || 0);
-      setCurrentStepText(data.current_step || '');
+      if (data.type === 'progress') {
+        setProgress(payload.progress_percentage || 0);
+        setCurrentStepText(payload.current_step || '');
+      }
       
-      if (data.status === 'completed') {
-        setResult(data.result);
+      if (payload.status === 'completed') {
+        setProgress(100);
+        setResult(payload);
         setCurrentStep('video');
-      } else if (data.status === 'error') {
-        console.error('Erreur:', data.error);
+      } else if (payload.status === 'failed' || payload.status === 'cancelled') {
+        console.error('Erreur:', payload.error_message);
         setCurrentStep('generate');
       } else {
         setTimeout(() => checkProgress(id), 1500);
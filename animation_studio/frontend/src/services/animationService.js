@@ -68,6 +68,27 @@ class AnimationService {
     }
   }
 
+  streamAnimationStatus(animationId, onEvent) {
+    // Flux SSE: deltas de progression, fins de clips, puis résultat final
+    // (EventSource renvoie Last-Event-ID automatiquement à la reconnexion)
+    const source = new EventSource(`${this.api.defaults.baseURL}/status/${animationId}/stream`);
+    let progress = {};
+
+    source.addEventListener('progress', (event) => {
+      progress = { ...progress, ...JSON.parse(event.data) };
+      onEvent('progress', progress);
+    });
+    source.addEventListener('clip', (event) => onEvent('clip', JSON.parse(event.data)));
+    ['completed', 'failed'].forEach((type) => {
+      source.addEventListener(type, (event) => {
+        source.close();
+        onEvent(type, JSON.parse(event.data));
+      });
+    });
+
+    return () => source.close();
+  }
+
   async checkHealth() {
     try {
       const response = await this.api.get('/health');